@@ -1,26 +1,39 @@
-import tkinter as tk
-from tkinter import messagebox, ttk
 import random
-import os
+import tkinter as tk
+from tkinter import messagebox
+import ordlager
+import highscore
+import repris
+from topplista_vy import Topplista
+from losare import optimum
+import likhet
+from canvas_brade import CanvasBräda
+from layout import tolka_layout, delmotorer, layout_för
+from sparpunkt import Sparpunkt
+from vandschema import VändSchema
 
 #Klass som innehåller alla funktioner för Memory-spelet. Inklusive logik, gränssnitt och highscore-hantering.
 class MemoryGame:
 
     #Klassens konstruktör. Initierar spelet genom att sätta upp nödvändiga variabler och visa startlayouten.
-    def __init__(self, fönster, ord_fil="memo.txt", highscore_fil="highscore.txt"): #Parameter. Tkinter-Widget. Referencer till objekt
+    def __init__(self, fönster, ord_fil="memo.txt", highscore_fil="highscore.txt", fördröjning=1000, partilogg="partier.memlog", frö=None,
+                 sparfil="a_memory_19.memspar", sparintervall=1): #Parameter. Tkinter-Widget. Referencer till objekt
         self.fönster = fönster #Huvudfönstret för spelet
         self.ord_fil = ord_fil  #Fil för ordlistan
         self.highscore_fil = highscore_fil  #Fil för highscores
+        self.highscore = highscore.öppna(highscore_fil)  #Topplistor per storlek. En fil som slutar på .db lagras i SQLite
+        self.partilogg = partilogg  #Vunna partier med alla drag, så att resultaten kan kontrolleras med repris.py
+        self.frö = frö  #Samma frö ger samma bräde, None slumpar fram ett nytt frö för varje spel
+        self.svårighet = None  #Andel förväxlingsbara ord på brädet (se likhet.py), None väljer orden helt slumpmässigt
         self.namn = ""  #Spelarens namn
-        self.matris = []  #Spelbrädsmatrisen. Innehåller en lista av rader
-        self.synlig = []  #Spårar vilka rutor som är synliga
-        self.knappar = []  #Knappar för spelmatrisen
-        self.försök = 0  #Räknar antal försök spelaren kör
-        self.hittade_par = 0  #Antal matchade par
-        self.storlek = (0, 0)  #Storlek på spelmatrisen (rader, kolumner)
+        self.motor = None  #Spelmotorn. Håller brädet, synliga rutor, försök och hittade par
+        self.bräda = None  #Canvas som ritar spelmatrisen
+        self.layout = None  #Brädets storlek, eller flera bräden som spelas samtidigt (se layout.py)
         self.totala_par = 0  #Totala antalet par i spelet
-        self.första_val = None  #Koordinater för första valda rutan
-        self.låst = False  #För att förhindra snabba klick
+        self.fördröjning = fördröjning  #Millisekunder som ett felmatchat par visas
+        self.schema = None  #Kö för klicken. Ett felmatchat par döljs när tiden går ut eller när nästa ruta vänds
+        self.sparpunkt = Sparpunkt(sparfil, sparintervall)  #Det pågående spelet sparas var sparintervall:e vänd ruta, så att det kan fortsätta
+        self.fönster.protocol("WM_DELETE_WINDOW", self.stäng)  #Sparar ett pågående spel när fönstret stängs
         self.startlayout()  #Visa startlayouten
 
     #Visar startlayouten där spelaren kan ange sitt namn och välja storlek på spelbrädet.
@@ -31,10 +44,15 @@ class MemoryGame:
         namn_entry = tk.Entry(self.fönster)
         namn_entry.pack(pady=5)
 
-        tk.Label(self.fönster, text="Välj storlek (t.ex. 4x3):").pack()
+        tk.Label(self.fönster, text="Välj storlek (t.ex. 4x3, eller 2*4x3 för två bräden):").pack()
         storlek_entry = tk.Entry(self.fönster)
         storlek_entry.pack(pady=5)
 
+        tk.Label(self.fönster, text="Välj svårighet:").pack()
+        nivåer = ["blandad", *likhet.SVÅRIGHETER] #Blandad väljer orden utan att titta på hur lika de är
+        nivå_val = tk.StringVar(value=nivåer[0])
+        tk.OptionMenu(self.fönster, nivå_val, *nivåer).pack(pady=5)
+
         #Felhantering vid inläsning av användarens data
         def starta_spel():
             namn = namn_entry.get().strip() #Tar bort oödiga mellanslag
@@ -44,41 +62,56 @@ class MemoryGame:
 
             storlek_text = storlek_entry.get().strip()
             try:
-                if "x" not in storlek_text:
-                    raise ValueError("Storleken måste anges i formatet 3x4 eller 4x3")
-
-                rader, kolumner = storlek_text.split("x")
-                if not rader.isdigit() or not kolumner.isdigit():
-                    raise ValueError("Både rader och kolumner måte vara heltal")
-                
-                rader, kolumner = int(rader), int(kolumner)
-
-                if rader*kolumner %2 !=0:
-                    raise ValueError("Matrisstolek måste vara jämn")
-                
-                if rader*kolumner //2 > self.läs_max_ord():
-                    raise ValueError(f"Matrisstorleken kräver fler ord än vad som finns ({self.läs_max_ord()} par)!")
+                max_ord = self.läs_max_ord()
+                if max_ord is None:
+                    return
+                #Kontrollerar formatet, att varje bräde har ett jämnt antal rutor och att orden räcker till
+                #varje bräde innan layouten byggs, så en för stor storlek avvisas direkt
+                layout = tolka_layout(storlek_text, max_ord=max_ord)
             except ValueError as e:
                 messagebox.showerror("Error", f"Ogiltig storlek: {e}")
                 return
 
             #Sparar värden i instansvariabler. Anropar. 
             self.namn = namn 
-            self.storlek = (rader, kolumner)
-            self.totala_par = (rader * kolumner) // 2
+            self.layout = layout
+            self.totala_par = layout.totala_par
+            self.svårighet = likhet.SVÅRIGHETER.get(nivå_val.get())
             self.initiera_spel()
 
         start_knapp = tk.Button(self.fönster, text="Starta spelet", command=starta_spel)
         start_knapp.pack(pady=15)
 
+        if self.sparpunkt.finns(): #Ett spel som inte blev klart förra gången
+            fortsätt_knapp = tk.Button(self.fönster, text="Fortsätt sparat spel",
+                                       command=lambda: self.fortsätt_sparat(namn_entry.get().strip()))
+            fortsätt_knapp.pack()
+
         highscore_knapp = tk.Button(self.fönster, text="Visa Highscore", command=self.visa_highscore_popup)
         highscore_knapp.pack(pady=20)
 
+    #Läser in det sparade spelet med spelarens namn och visar brädet som det såg ut.
+    #Ett spel som sparades utan namn (t.ex. i C-Memory) får namnet från startlayouten.
+    def fortsätt_sparat(self, namn=""):
+        try:
+            sparat = self.sparpunkt.läs(ordlager.hämta_ord(self.ord_fil))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Fel", f"Det sparade spelet kunde inte läsas: {e}")
+            return
+        if not (sparat.namn or namn):
+            messagebox.showerror("Error", "Du måste först ange ett namn!")
+            return
+        self.namn = sparat.namn or namn
+        self.motor = sparat.motor
+        self.layout = layout_för(self.motor) #Storleken och brädena kommer från det sparade spelet
+        self.totala_par = self.layout.totala_par
+        self.bygg_gränssnitt()
+        self.bräda.visa_synliga(self.motor)
+
     #Läser in det maximala antalet ord från ordlistfilen.
     def läs_max_ord(self):
         try:
-            with open(self.ord_fil, 'r') as f:
-                return len(f.readlines()) #läser alla rader i filen och returnerar en lista där varje element är en rad i filen.
+            return ordlager.antal_ord(self.ord_fil) #Antalet unika ord efter normalisering, läses ur den kompilerade ordlistans huvud.
         except FileNotFoundError:
             messagebox.showerror("Fel", f"Filen '{self.ord_fil}' hittades inte.")
             self.fönster.quit() #Förhindra att spelet fortsätter utan ord.
@@ -89,120 +122,71 @@ class MemoryGame:
         self.skapa_matris(ordlista)
         self.bygg_gränssnitt()
 
-    #Läser antal rader i ordlistfilen
+    #Hämtar ordlistan ur ordlagret. Orden för spelet väljs av fröet i skapa_matris.
     def läs_ord(self):
         try:
-            with open(self.ord_fil, 'r', encoding='utf-8') as f:
-                ordlista = [rad.strip() for rad in f.readlines()]
-            return random.sample(ordlista, self.totala_par) * 2
+            return ordlager.hämta_ord(self.ord_fil)
         except FileNotFoundError:
             messagebox.showerror("Fel", f"Filen '{self.ord_fil}' hittades inte.")
             self.fönster.quit()
 
-    #Skapar en matris för spelet genom att slumpa och arrangera orden i rader och kolumner.
+    #Skapar spelmotorn som väljer ord, duplicerar dem till par och blandar dem över rader och kolumner.
     def skapa_matris(self, ordlista):
-        random.shuffle(ordlista)
-        rader, kolumner = self.storlek #Hämtar antalet rader och kolumner från self.storlek.
-        self.matris = [ordlista[i * kolumner:(i + 1) * kolumner] for i in range(rader)] #Hämtar listan som motsvarar en hel rad i spelbrädan.
-        self.synlig = [[False] * kolumner for _ in range(rader)] #Inga rutor är synliga vid spelstart
+        frö = self.frö if self.frö is not None else random.getrandbits(64) #Fröet bestämmer både orden och placeringen
+        grannar = likhet.hämta_grannar(self.ord_fil) if self.svårighet is not None else None #Indexet byggs en gång och sparas bredvid ordlistan
+        self.motor = self.layout.skapa_motor(ordlista, frö, True, grannar, self.svårighet) #Inga rutor är synliga vid spelstart. Flera bräden får en motor var.
 
-    #Bygger gränssnittet för spelet med knappar för varje cell.
+    #Bygger gränssnittet för spelet. Hela matrisen ritas på en enda canvas istället för en knapp per cell.
     def bygg_gränssnitt(self):
+        if self.schema is not None: #Stoppar timern för ett felmatchat par på brädet som rivs
+            self.schema.avbryt()
         for widget in self.fönster.winfo_children(): #Returnerar en lista över alla widgetar som redan finns i fönstret.
             widget.destroy()
 
-        self.knappar = []
-        rader, kolumner = self.storlek
-        for rad in range(rader):
-            rad_knappar = []
-            for kol in range(kolumner):
-                knapp = tk.Button(
-                    self.fönster, text="---", width=10, height=3,
-                    command=lambda r=rad, k=kol: self.vald_ruta(r, k) #Lambda används för att passera rad och kolumn till vald_ruta.
-                )
-                knapp.grid(row=rad, column=kol)
-                rad_knappar.append(knapp)
-            self.knappar.append(rad_knappar)
-
-    #Hanterar spelarens klick på en ruta, visar ordet och kontrollerar om det bildar ett par.
-    def vald_ruta(self, rad, kol):
-        if self.låst or self.synlig[rad][kol]:
-            return
-
-        self.synlig[rad][kol] = True
-        self.knappar[rad][kol].config(text=self.matris[rad][kol]) #Uppdaterar knappens text med det ord som finns i motsvarande position i matrisen.
-
-        if not self.första_val:
-            self.första_val = (rad, kol)
-        else:
-            self.låst = True
-            self.fönster.after(1000, lambda: self.utvärdera_par(rad, kol))
-
-    #Utvärderar om de två valda rutorna bildar ett par och hanterar resultatet
-    def utvärdera_par(self, rad2, kol2):
-        if not self.första_val:
-            return
-
-        rad1, kol1 = self.första_val #Hämtar koordinaterna från första valet
+        self.bräda = CanvasBräda(self.fönster, self.layout, self.vald_ruta) #Canvasen slår upp rutan för klickets koordinater i layouten.
+        self.bräda.pack(expand=True, fill=tk.BOTH)
+        self.schema = VändSchema(self.motor, self.fönster, self.bräda.visa, self.bräda.dölj,
+                                 self.avsluta_spel, self.fördröjning,
+                                 lambda: self.sparpunkt.efter_drag(self.motor, self.namn)) #Sparar efter varje vänd ruta
 
-        if self.matris[rad1][kol1] == self.matris[rad2][kol2]:
-            self.hittade_par += 1
-            if self.hittade_par == self.totala_par:
-                self.avsluta_spel()
-        else: #Om de inte matchar vänder sig korten
-            self.synlig[rad1][kol1] = False
-            self.synlig[rad2][kol2] = False
-            self.knappar[rad1][kol1].config(text="---")
-            self.knappar[rad2][kol2].config(text="---")
-
-        self.första_val = None
-        self.låst = False
-        self.försök += 1
+    #Hanterar spelarens klick på en ruta. Klicket läggs i schemats kö, som vänder rutan, visar ordet
+    #och döljer felmatchade par. Brädet låses aldrig, så spelaren kan fortsätta klicka direkt.
+    def vald_ruta(self, index):
+        self.schema.klick(index)
 
     #Skriver grattis och sparar highscore
     def avsluta_spel(self):
-        messagebox.showinfo("Grattis, du har klarat av spelet!", f"Du lyckades matcha alla ord på {self.försök+1} försök!")
+        self.schema.avbryt() #Klick som kom efter sista paret körs inte
+        messagebox.showinfo("Grattis, du har klarat av spelet!", f"Du lyckades matcha alla ord på {self.motor.försök} försök!")
         self.spara_highscore()
         self.visa_highscore_popup()
 
-    #Sparar spelarens resultat i highscore-filen.
+    #Sparar spelarens resultat i highscore-filen. Med flera bräden sparas ett resultat per bräde.
     def spara_highscore(self):
-        rader, kolumner = self.storlek
-        ny_rad = f"{self.namn},{self.försök+1},{rader}x{kolumner}\n"
+        for motor in delmotorer(self.motor):
+            self.highscore.lägg_till(self.namn, motor.försök, f"{motor.rader}x{motor.kolumner}") #Läggs till sist i filen och i topplistan för storleken
+            if repris.kan_sparas(motor): #Partiet med alla drag, för att kunna spelas upp igen
+                repris.spara_parti(self.partilogg, self.namn, motor)
 
-        if not os.path.exists(self.highscore_fil):
-            with open(self.highscore_fil, 'w') as f:
-                f.write(ny_rad)
-        else:
-            with open(self.highscore_fil, 'a') as f:
-                f.write(ny_rad)
+    #Stänger fönstret. Ett spel som inte är klart sparas först, så att det kan fortsätta nästa gång.
+    def stäng(self):
+        if self.motor is not None and not self.motor.är_vunnet():
+            self.sparpunkt.spara(self.motor, self.namn)
+        self.fönster.destroy()
 
     #Visar highscore-listan i ett nytt popup-fönster efter spelets slut.
     def visa_highscore_popup(self):
         popup = tk.Toplevel(self.fönster)
         popup.title("Highscore listan")
 
-        tree = ttk.Treeview(popup, columns=("Namn", "Antal försök", "Storlek"), show="headings")
-        tree.heading("Namn", text="Namn")
-        tree.heading("Antal försök", text="Antal försök")
-        tree.heading("Storlek", text="Storlek")
-
-        with open(self.highscore_fil, 'r') as f:
-            highscore_data = f.readlines()
-
-        highscores = []
-        for rad in highscore_data:
-            namn, försök, storlek = rad.strip().split(",")
-            rader, kolumner = map(int, storlek.split("x"))
-            svårighet = rader * kolumner
-            highscores.append((int(försök), svårighet, namn, storlek))
-
-        highscores.sort()
-
-        for försök, svårighet, namn, storlek in highscores:
-            tree.insert("", "end", values=(namn, försök, storlek))
+        #Vyn hämtar bara de rader som syns från highscore-lagret, även när det finns miljontals resultat.
+        #Sista kolumnen jämför varje resultat med det förväntade antalet försök med perfekt minne.
+        topplista = Topplista(popup, self.highscore, optimum=optimum)
+        topplista.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
 
-        tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+        felaktiga = self.highscore.statistik["felaktiga"] #Rader i highscore-filen som inte gick att läsa
+        if felaktiga:
+            tk.Label(popup, text=f"{felaktiga} felaktiga rader i highscore-filen hoppades över").pack()
 
         #Avslutar spelet
         def stäng_och_avsluta():
@@ -1,25 +1,34 @@
 import random
-import os
+import ordlager
+import highscore
+import repris
+from motor import OGILTIG, FÖRSTA, MISS
+from terminal import Renderare, celler, cellbredd, får_plats, MAX_CELLBREDD
+from layout import tolka_layout, delmotorer, layout_för
+from sparpunkt import Sparpunkt
 
 class MemoryGame:
     highscore_fil = "highscore.txt"
+    partilogg = "partier.memlog"  # Vunna partier, så att resultaten kan kontrolleras med repris.py
+    sparfil = "b_memory_3.memspar"  # Det pågående spelet, varje variant har en egen fil
+    sparintervall = 1  # Antal turer mellan sparpunkterna för det pågående spelet, 0 sparar inte
 
     def __init__(self):
         self.fil = "memo.txt"
-        self.storlek = 6  # Standardstorlek
-        self.matris = []
-        self.synlig = []
-        self.hittade_par = 0
-        self.försök = 0
+        self.layout = tolka_layout("6")  # Standardstorlek. Tolkar också drag som "B3", eller "2B3" med flera bräden
+        self.frö = None  # Sätts för att spela ett bestämt bräde, annars får varje spel ett nytt frö
+        self.motor = None  # Spelmotorn, skapas i skapa_matris
+        self.renderare = None  # Ritar brädet, skapas i skapa_matris
         self.totala_par = 0
+        self.highscore = highscore.öppna(self.highscore_fil)  # Topplistorna, textfil eller SQLite (.db)
+        self.sparpunkt = Sparpunkt(self.sparfil, self.sparintervall)  # Det pågående spelet, så att det kan fortsätta efter en krasch
         
     #Läser in ord från filen och hanterar filrelaterade fel.
     def läs_ord(self):
         try:
-            with open(self.fil, 'r', encoding='utf-8') as f:
-                ordlista = [rad.strip() for rad in f.readlines()]
-            if len(ordlista) < self.totala_par:
-                raise ValueError(f"Filen {self.fil} måste innehålla minst {self.totala_par} ord.")
+            ordlista = ordlager.hämta_ord(self.fil)
+            if får_plats(ordlista) < self.totala_par:
+                raise ValueError(f"Filen {self.fil} måste innehålla minst {self.totala_par} ord som är högst {MAX_CELLBREDD} tecken.")
             return ordlista
         except FileNotFoundError:
             print(f"Fel: Filen '{self.fil}' hittades inte. Kontrollera att filen finns.")
@@ -33,131 +42,123 @@ class MemoryGame:
 
     #Skapar en slumpmässigt blandad matris med dolda ord.
     def skapa_matris(self, ordlista):
-        valda_ord = random.sample(ordlista, self.totala_par)
-        alla_ord = valda_ord * 2
-        random.shuffle(alla_ord)
-        self.matris = [alla_ord[i:i + self.storlek] for i in range(0, len(alla_ord), self.storlek)]
-        self.synlig = [[False] * self.storlek for _ in range(self.storlek)]
+        #Drar index istället för att kopiera listan, så att bara de valda orden läses ur ordlistan
+        # Fröet väljer orden och placeringen, och alla drag loggas, så att partiet kan spelas upp igen
+        frö = self.frö if self.frö is not None else random.getrandbits(64)
+        self.motor = self.layout.skapa_motor(ordlista, frö, logga=True, max_bredd=MAX_CELLBREDD)
+        self.skapa_renderare(ordlista)
+
+    def skapa_renderare(self, ordlista=None):
+        """Skapar renderaren för layouten. Rutornas bredd kommer från ordlistans hinkar, eller från orden på brädet."""
+        self.renderare = Renderare(0, 0, cellbredd(ordlista, self.motor.ord), layout=self.layout)
+
+    def fortsätt_sparat(self):
+        """Frågar om ett sparat spel ska fortsätta. Returnerar spelarens namn, eller None för ett nytt spel."""
+        if not self.sparpunkt.finns():
+            return None
+        if input("Det finns ett sparat spel. Vill du fortsätta det? (j/n): ").strip().lower() != "j":
+            return None
+        try:
+            sparat = self.sparpunkt.läs(ordlager.hämta_ord(self.fil))
+        except (OSError, ValueError) as e:
+            print(f"Det sparade spelet kunde inte läsas ({e}), ett nytt spel startar.")
+            return None
+        self.motor = sparat.motor
+        self.layout = layout_för(self.motor)
+        self.skapa_renderare()
+        return sparat.namn or input("Ange ditt namn: ").strip()  # Spel från C-Memory sparas utan namn
 
 
-    #Skriver ut spelmatrisen.
+    #Skriver ut spelmatrisen. Bara de rutor som har ändrats skrivs ut igen.
     def skriv_ut_matris(self):
-        header = "   " + "   ".join(map(str, range(1, self.storlek + 1)))
-        print(header)
-        for rad_idx, rad in enumerate(self.matris):
-            synliga_raden = [
-                cell if self.synlig[rad_idx][col_idx] else "---"
-                for col_idx, cell in enumerate(rad)
-            ]
-            print(chr(65 + rad_idx), " ".join(f"{c:>3}" for c in synliga_raden))
-        print("=" * 30)
-
-    def validera_input(self, val):
-        """Validerar användarens input."""
-        if len(val) != 2 or not val[0].isalpha() or not val[1].isdigit():
-            return False
-        rad, kol = val[0].upper(), val[1]
-        if not ('A' <= rad < chr(65 + self.storlek)) or not (1 <= int(kol) <= self.storlek):
-            return False
-        return True
+        self.renderare.rita(celler(self.motor))
+
+    def välj_rutor(self):
+        """Läser en tur. Båda rutorna kan anges på samma rad, t.ex. "A1 F6", och returnerar händelsen för den andra."""
+        fråga = "Välj två rutor (t.ex. A1 F6): "
+        fel = ""
+        while True:
+            try:
+                index_lista = self.layout.tolka_drag(input(fel + fråga))
+            except ValueError as e:
+                fel = f"{e}. "
+                continue
+
+            fel = ""
+            vände = False
+            for index in index_lista:
+                händelse = self.motor.flip(index)
+                if händelse == OGILTIG:
+                    fel = "Rutan är redan vänd. " if self.motor.är_synlig(index) else "Rutan ligger på ett annat bräde. "
+                    break
+                if händelse != FÖRSTA:
+                    return händelse
+                vände = True
+
+            # Bara den första rutan angavs, visa dess ord innan den andra väljs
+            if vände:
+                self.skriv_ut_matris()
+                print()
+                fråga = "Välj andra rutan (t.ex. F6): "
 
     def välj_svårighetsgrad(self):
-        """Låter spelaren välja storleken på matrisen."""
+        """Låter spelaren välja storleken på matrisen, eller flera bräden som spelas samtidigt."""
         while True:
             try:
                 print("Välj svårighetsgrad:")
-                print("2x2 (lätt) upp till 10x10 (svårt)")
-                val = int(input("Ange matrisens storlek (t.ex. 2 för 2x2): ").strip())
-                if 2 <= val <= 10:
-                    self.storlek = val
-                    self.totala_par = (val * val) // 2
+                print("2x2 (lätt) upp till 10x10 (svårt), t.ex. 4x3, eller 2*4x4 för två bräden")
+                layout = tolka_layout(input("Ange matrisens storlek (t.ex. 2 för 2x2): "), max_sida=10)
+                if all(2 <= sida <= 10 for bräda in layout.brädor for sida in bräda):
+                    self.layout = layout
+                    self.totala_par = layout.ord_som_krävs  # Varje bräde väljer sina ord för sig
                     break
                 else:
                     print("Felaktig inmatning. Ange en storlek mellan 2 och 10.")
-            except ValueError:
-                print("Felaktig inmatning. Ange en siffra mellan 2 och 10.")
+            except ValueError as e:
+                print(f"Felaktig inmatning. {e}.")
 
     def spara_highscore(self, namn):
-        """Sparar spelarens resultat i highscore-filen."""
-        data = self.läs_highscore()
-        if self.storlek not in data:
-            data[self.storlek] = []
-
-        # Lägg till spelarens resultat
-        data[self.storlek].append(f"{namn},{self.försök}")
-
-        # Sortera highscore för denna storlek baserat på antal försök
-        data[self.storlek] = sorted(data[self.storlek], key=lambda x: int(x.split(',')[1]))[:10]
-
-        with open(self.highscore_fil, "w", encoding="utf-8") as f:
-            for storlek, poster in data.items():
-                for post in poster:
-                    f.write(f"{storlek},{post}\n")
-
-    def läs_highscore(self):
-        """Läser in highscore-data från filen."""
-        if not os.path.exists(self.highscore_fil):
-            return {}
-        data = {}
-        with open(self.highscore_fil, "r", encoding="utf-8") as f:
-            for rad in f:
-                storlek, post = rad.strip().split(',', 1)
-                storlek = int(storlek)
-                if storlek not in data:
-                    data[storlek] = []
-                data[storlek].append(post)
-        return data
+        """Sparar spelarens resultat, ett per bräde. Raden läggs till sist i highscore-filen, som inte skrivs om."""
+        for motor in delmotorer(self.motor):
+            self.highscore.lägg_till(namn, motor.försök, f"{motor.rader}x{motor.kolumner}")
+            if repris.kan_sparas(motor):  # Ett fortsatt spel kan sakna logg, då sparas bara resultatet
+                repris.spara_parti(self.partilogg, namn, motor)
 
     def visa_highscore(self):
         """Visar highscore-listan."""
-        data = self.läs_highscore()
         print("\nTopplistor:")
-        for storlek, lista in data.items():
-            print(f"\nHighscore för {storlek}x{storlek}:")
-            for idx, entry in enumerate(lista, start=1):
-                namn, försök = entry.split(',')
+        for storlek in self.highscore.storlekar():
+            print(f"\nHighscore för {storlek}:")
+            for idx, (namn, försök) in enumerate(self.highscore.topplista(storlek), start=1):
                 print(f"{idx}. {namn} - {försök} försök")
+        if self.highscore.statistik["felaktiga"]:
+            print(f"\n({self.highscore.statistik['felaktiga']} felaktiga rader i highscore-filen hoppades över)")
 
     def spela(self):
         """Huvudfunktion för att spela spelet."""
-        self.välj_svårighetsgrad()
-        namn = input("Ange ditt namn: ").strip()
-        ordlista = self.läs_ord()
-        self.skapa_matris(ordlista)
-
-        while self.hittade_par < self.totala_par:
+        namn = self.fortsätt_sparat()
+        if namn is None:
+            self.välj_svårighetsgrad()
+            namn = input("Ange ditt namn: ").strip()
+            ordlista = self.läs_ord()
+            self.skapa_matris(ordlista)
+
+        meddelande = ""
+        while not self.motor.är_vunnet():
+            # Ett felmatchat par syns kvar tills nästa ruta vänds, då döljer motorn det
             self.skriv_ut_matris()
             print()
+            if meddelande:
+                print(meddelande)
 
-            # Första valet
-            val1 = input("Välj första rutan (t.ex. A1): ").strip()
-            while not self.validera_input(val1):
-                val1 = input("Felaktig inmatning. Välj igen (t.ex. A1): ").strip()
-            rad1, kol1 = ord(val1[0].upper()) - 65, int(val1[1]) - 1
-            self.synlig[rad1][kol1] = True
-            self.skriv_ut_matris()
-            print()
-
-            # Andra valet
-            val2 = input("Välj andra rutan (t.ex. F6): ").strip()
-            while not self.validera_input(val2) or val2 == val1:
-                val2 = input("Felaktig inmatning. Välj igen (t.ex. F6): ").strip()
-            rad2, kol2 = ord(val2[0].upper()) - 65, int(val2[1]) - 1
-            self.synlig[rad2][kol2] = True
-            self.skriv_ut_matris()
-
-            # Kontrollera om orden matchar
-            if self.matris[rad1][kol1] == self.matris[rad2][kol2]:
-                print("Grattis! Du hittade ett par.\n")
-                self.hittade_par += 1
-            else:
-                print("Tyvärr, ingen match.\n")
-                self.synlig[rad1][kol1] = False
-                self.synlig[rad2][kol2] = False
-
-            self.försök += 1
+            # En fråga per tur, motorn räknar försöket och kontrollerar om orden matchar
+            händelse = self.välj_rutor()
+            meddelande = "Grattis! Du hittade ett par." if händelse != MISS else "Tyvärr, ingen match."
+            self.sparpunkt.efter_drag(self.motor, namn)
 
-        print(f"Grattis! Du har matchat alla par på {self.försök} försök!")
+        self.skriv_ut_matris()
+        print()
+        print(f"Grattis! Du har matchat alla par på {self.motor.försök} försök!")
         self.spara_highscore(namn)
         self.visa_highscore()
 
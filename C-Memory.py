@@ -1,25 +1,32 @@
 import random #Importerar biblioteket för att använda slumpmässiga funktioner
+import ordlager #Delat lager för ordlistan, läser filen en gång
+from motor import OGILTIG, FÖRSTA, MISS #Händelserna från spelmotorn som håller brädet och räknar par
+from terminal import Renderare, celler, cellbredd, får_plats, MAX_CELLBREDD #Ritar bara om de rutor som har ändrats
+from layout import tolka_layout, layout_för #Brädets storlek, eller flera bräden, och tolkning av drag som "B3" och "A1 F6"
+from sparpunkt import Sparpunkt #Sparar det pågående spelet så att det kan fortsätta efter en krasch
+
+SPARFIL = "c_memory.memspar" #Det pågående spelet, varje variant har en egen fil
 
 
 class MemoryGame: 
-    def __init__(self, fil: str, storlek: int = 6):
+    def __init__(self, fil: str, storlek="6", frö=None, sparintervall=1):
         self.fil = fil 
-        self.storlek = storlek
-        self.matris = []
-        self.synlig = []
-        self.hittade_par = 0
-        self.totala_par = (storlek * storlek) // 2
+        self.layout = tolka_layout(str(storlek)) #"6", "4x3" eller "2*4x4" för två bräden. Översätter också drag till rutornas index
+        self.frö = frö #Samma frö ger samma bräde, None slumpar fram ett nytt frö för varje spel
+        self.motor = None #Skapas i skapa_matris
+        self.renderare = None #Skapas i skapa_matris när ordens längd är känd
+        self.totala_par = self.layout.ord_som_krävs #Ord som krävs, varje bräde väljer sina ord för sig
+        self.sparpunkt = Sparpunkt(SPARFIL, sparintervall) #Spelet sparas var sparintervall:e tur och tas bort när det är vunnet
 
     def läs_ord(self):
         #Läser in ord från filen och hanterar filrelaterade fel
         try:
-            #Läser alla rader i txt filen och ta bort eventuella mellanslag
-            with open(self.fil, 'r', encoding='utf-8') as f:
-                ordlista = [rad.strip() for rad in f.readlines()]
+            #Hämtar orden från det delade ordlagret, txt filen läses bara om när den har ändrats
+            ordlista = ordlager.hämta_ord(self.fil)
 
-            #Kontrollera att filen innehåller minst antal ord som krävs
-            if len(ordlista) < self.totala_par:
-                raise ValueError(f"Filen {self.fil} måste innehålla minst {self.totala_par} ord.")
+            #Kontrollera att filen innehåller minst antal ord som krävs och som får plats i en ruta
+            if får_plats(ordlista) < self.totala_par:
+                raise ValueError(f"Filen {self.fil} måste innehålla minst {self.totala_par} ord som är högst {MAX_CELLBREDD} tecken.")
             return ordlista
         
         # Felmeddelande om filen inte hittade
@@ -34,96 +41,109 @@ class MemoryGame:
 
     def skapa_matris(self, ordlista):
         #Skapar en slumpmässigt blandad matris med dolda ord
-        valda_ord = random.sample(ordlista, self.totala_par)
-        alla_ord = valda_ord * 2 #Duplicera orden för att skapa par
-        random.shuffle(alla_ord) # Blanda orden slumpmässigt
-
-        # Dela upp de blandade orden i en 2D-matris
-        self.matris = [alla_ord[i:i + self.storlek] for i in range(0, len(alla_ord), self.storlek)]
-        # Skapa en synlighetsmatris som börjar med att alla rutor är dolda
-        self.synlig = [[False] * self.storlek for _ in range(self.storlek)]
-
-    def skriv_ut_matris(self):
-       #Skriver ut spelmatrisen, där endast --- visas innan spelaren har vänt på dem
-        
-        #Skriver ut antal kolumnrubriker
-        header = "   " + "   ".join(map(str, range(1, self.storlek + 1)))
-        print(header)
-
-        #Skriver ut raderna i matrisen
-        for rad_idx, rad in enumerate(self.matris):
-            #Visa endast ord om rutan är synlig, annars "---"
-            synliga_raden = [
-                cell if self.synlig[rad_idx][col_idx] else "---"
-                for col_idx, cell in enumerate(rad)
-            ]
-            print(chr(65 + rad_idx), " ".join(f"{c:>3}" for c in synliga_raden))
-        print("=" * 30) #En visuell separator under matrisen
-
-    def validera_input(self, val):
-        #Validerar användarens input.
-        #Kontrollera att inmatningen har exakt två tecken
-        if len(val) != 2 or not val[0].isalpha() or not val[1].isdigit():
-            return False
-        
-        rad, kol = val[0].upper(), val[1]
-        #Kontrollera att inmatningen är inom matrisens gränser
-        if not ('A' <= rad < chr(65 + self.storlek)) or not (1 <= int(kol) <= self.storlek):
+        #Fröet väljer orden och placeringen med en egen slumpgenerator för spelet, så brädet kan återskapas
+        frö = self.frö if self.frö is not None else random.getrandbits(64)
+
+        #Motorn duplicerar orden till par, blandar dem och börjar med att alla rutor är dolda
+        #Bara ord som får plats i en ruta väljs, så rutornas bredd kommer direkt från ordlistans hinkar
+        #Dragen loggas, så att ett sparat spel kan fortsätta och sparas som parti i de andra varianterna
+        self.motor = self.layout.skapa_motor(ordlista, frö, logga=True, max_bredd=MAX_CELLBREDD)
+        self.skapa_renderare(ordlista)
+
+    def skapa_renderare(self, ordlista=None):
+        #Renderaren ritar layouten med lika breda rutor, räknat i terminalens teckenpositioner.
+        #Utan ordlista (ett sparat spel) mäts orden på brädet
+        bredd = cellbredd(ordlista, self.motor.ord)
+        self.renderare = Renderare(0, 0, bredd, layout=self.layout)
+
+    def fortsätt_sparat(self):
+        #Läser in det sparade spelet. Om det inte går att läsa startar ett nytt spel istället
+        try:
+            self.motor = self.sparpunkt.läs(ordlager.hämta_ord(self.fil)).motor
+        except (OSError, ValueError) as e:
+            print(f"Det sparade spelet kunde inte läsas ({e}), ett nytt spel startar.")
             return False
+        self.layout = layout_för(self.motor) #Storleken och brädena kommer från det sparade spelet
+        self.skapa_renderare()
         return True
 
-    def kör(self):
-        #spelar spelet
+    def skriv_ut_matris(self):
+        #Skriver ut spelmatrisen, där endast --- visas innan spelaren har vänt på dem.
+        #Renderaren skriver bara ut de rutor som har ändrats sedan förra gången
+        self.renderare.rita(celler(self.motor))
+
+    def välj_rutor(self):
+        #Läser en tur från spelaren. Båda rutorna kan anges på samma rad, t.ex. "A1 F6".
+        #Om bara en ruta anges visas dess ord innan spelaren väljer den andra. Returnerar händelsen för andra rutan
+        fråga = "Välj två rutor (t.ex. A1 F6): "
+        fel = ""
+        while True:
+            try:
+                index_lista = self.layout.tolka_drag(input(fel + fråga))
+            except ValueError as e:
+                fel = f"{e}. "
+                continue
+
+            fel = ""
+            vände = False
+            for index in index_lista:
+                händelse = self.motor.flip(index)
+                if händelse == OGILTIG:
+                    fel = "Rutan är redan vänd. " if self.motor.är_synlig(index) else "Rutan ligger på ett annat bräde. "
+                    break
+                if händelse != FÖRSTA:
+                    return händelse
+                vände = True
+
+            if vände:
+                #Visar den första rutans ord och frågar efter den andra
+                self.skriv_ut_matris()
+                print()
+                fråga = "Välj andra rutan (t.ex. F6): "
+
+    def kör(self, fortsätt=False):
+        #spelar spelet, med fortsätt=True fortsätter det sparade spelet
         print("\nVälkommen till spelet Memory!!, försök och matcha alla ord gömda bakom rutorna 🎉 \n ") 
         
         #Läser in orden från txt filen och skapa matrisen
-        ordlista = self.läs_ord()
-        self.skapa_matris(ordlista)
-
-        #Huvudloop
-        while self.hittade_par < self.totala_par:
+        if not (fortsätt and self.fortsätt_sparat()):
+            ordlista = self.läs_ord()
+            self.skapa_matris(ordlista)
+
+        #Huvudloop, en fråga per tur
+        meddelande = ""
+        while not self.motor.är_vunnet():
+            #Ett felmatchat par syns kvar tills nästa ruta vänds, då döljer motorn det
             self.skriv_ut_matris()
-            print()  #Lägger till en tom rad innan valprompterna
+            print()  #Lägger till en tom rad innan meddelandet och frågan
+            if meddelande:
+                print(meddelande)
 
-            #Första valet av spelaren 
-            val1 = input("Välj första rutan (t.ex. A1): ").strip()
-            while not self.validera_input(val1):
-                val1 = input("Felaktig inmatning. Välj igen (t.ex. A1): ").strip()
-            rad1, kol1 = ord(val1[0].upper()) - 65, int(val1[1]) - 1
+            händelse = self.välj_rutor()
+            self.sparpunkt.efter_drag(self.motor)
 
-            print()  #Lägg till en tom rad innan matrisen skrivs ut
-            self.synlig[rad1][kol1] = True
-            self.skriv_ut_matris()
-            print()  #Lägg till en tom rad innan nästa valpromp
-
-            #Andra valet från spelaren
-            val2 = input("Välj andra rutan (t.ex. F6): ").strip()
-            while not self.validera_input(val2) or val2 == val1:
-                val2 = input("Felaktig inmatning. Välj igen (t.ex. F6): ").strip()
-            rad2, kol2 = ord(val2[0].upper()) - 65, int(val2[1]) - 1
-
-            print()  # Lägg till en tom rad innan matrisen skrivs ut
-            self.synlig[rad2][kol2] = True
-            self.skriv_ut_matris()
-
-            # Kontrollera om orden matchar varandra
-            if self.matris[rad1][kol1] == self.matris[rad2][kol2]:
-                print("Grattis! Du hittade ett par.")
-                self.hittade_par += 1
+            # Motorn har redan kontrollerat om orden matchar varandra
+            if händelse != MISS:
+                meddelande = "Grattis! Du hittade ett par."
             else:
-                print()  # Lägg till en tom rad innan feedback
-                print("Tyvärr, ingen match.")
-                self.synlig[rad1][kol1] = False
-                self.synlig[rad2][kol2] = False
-
-            # Lämna mellanrum och vänta på användaren
-            print("\n" + "-" * 30)
-            input("Tryck på Enter för att fortsätta...")
-            print("\n" * 3)  # Lägg till mellanrum för tydligare separation
+                meddelande = "Tyvärr, ingen match."
 
+        self.skriv_ut_matris()
+        print()
         print("Grattis! Du har matchat alla par av ord i spelbrädan!! 🎉")
 
 
 if __name__ == "__main__":
-    spel = MemoryGame("memo.txt")
+    #Ett spel som inte blev klart förra gången kan fortsätta
+    if Sparpunkt(SPARFIL).finns() and input("Det finns ett sparat spel. Vill du fortsätta det? (j/n): ").strip().lower() == "j":
+        MemoryGame("memo.txt").kör(fortsätt=True)
+        exit()
+
+    #Frågar efter storleken tills den går att använda, tomt svar ger 6x6
+    while True:
+        try:
+            spel = MemoryGame("memo.txt", input("Välj storlek (t.ex. 6, 4x3 eller 2*4x4 för två bräden): ").strip() or "6")
+            break
+        except ValueError as e:
+            print(f"Fel: {e}")
     spel.kör()
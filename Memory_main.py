@@ -3,163 +3,193 @@
 #Denna kod kan ge mig ett C, men jag siktar på ett A
 import random
 import tkinter as tk
-import os
-
-# Ladda ord från filen och välj slumpmässigt ett visst antal ord
-def load_words(filename="memo.txt", word_count=18):
-    with open(filename, 'r') as file:
-        words = [line.strip() for line in file.readlines()]
-    selected_words = random.sample(words, word_count)
-    words_to_place = selected_words * 2
-    random.shuffle(words_to_place)
-    return words_to_place
+import highscore
+import ordlager
+import repris
+from motor import MISS, motor_för_frö
+from layout import Layout, tolka_layout, delmotorer, layout_för
+from sparpunkt import Sparpunkt
+from terminal import Renderare, celler, cellbredd, MAX_CELLBREDD
+from canvas_brade import CanvasBräda
+from vandschema import VändSchema
+
+# Filen för det pågående spelet, varje variant har en egen fil
+CHECKPOINT_FILE = "memory_main.memspar"
+
+# Skapa ett nytt spel. Motorn håller brädet, vilka celler som är avslöjade och räknarna.
+# Orden och placeringen bestäms av ett frö (samma seed ger samma bräde) och alla drag loggas,
+# så att spelet kan spelas upp igen (se repris.py)
+# size kan vara ett tal (6 ger 6x6), en text som "4x3" eller "2*4x4" (två bräden), eller en Layout
+def create_game(size=6, filename="memo.txt", seed=None):
+    layout = to_layout(size)
+    if seed is None:
+        seed = random.getrandbits(64)
+    return layout.skapa_motor(ordlager.hämta_ord(filename), seed, logga=True, max_bredd=MAX_CELLBREDD)
+
+# Äldre hjälpfunktioner som returnerar listor istället för en motor. De finns kvar för kod som
+# fortfarande anropar dem, nya spel skapas med create_game.
+
+# Ladda word_count ord från filen, duplicerade till par och blandade. Samma seed ger samma ord och ordning
+def load_words(filename="memo.txt", word_count=18, seed=None):
+    if seed is None:
+        seed = random.getrandbits(64)
+    game = motor_för_frö(ordlager.hämta_ord(filename), 2, word_count, seed)
+    return [game.ord_vid(i) for i in range(len(game))]
 
 # Skapa matrisen med ord
 def create_board(words, size=6):
-    board = []
-    idx = 0
-    for row in range(size):
-        board.append(words[idx:idx + size])
-        idx += size
-    return board
+    return [words[idx:idx + size] for idx in range(0, size * size, size)]
 
 # Skapa en matris för att hålla koll på avslöjade celler.
 def create_hidden_board(size=6, max_word_len=3):
     return [['_' * max_word_len for _ in range(size)] for _ in range(size)]
 
-# Skriv ut brädet
-def print_board(board):
-    for row in board:
-        print(" ".join(row))
-    print("\n")
+# Läs in spelet som sparades senast. Kastar OSError eller ValueError om det inte går att läsa
+def resume_game(filename="memo.txt", checkpoint=None):
+    return (checkpoint or Sparpunkt(CHECKPOINT_FILE)).läs(ordlager.hämta_ord(filename)).motor
+
+# Gör om en storlek till en layout som säger var brädena och cellerna ligger
+def to_layout(size):
+    return size if isinstance(size, Layout) else tolka_layout(str(size))
+
+# Skriv ut brädet, dolda celler visas som understreck. Bara ändrade celler skrivs ut igen
+def print_board(game, renderer):
+    renderer.rita(celler(game, '_' * renderer.bredd))
+
+# Kontrollera om spelet är över. Motorn räknar hittade par vid varje drag, så ingen genomsökning behövs
+def is_game_won(game):
+    return game.hittade_par == game.totala_par
 
-# Kontrollera om spelet är över
-def is_game_won(hidden_board):
-    for row in hidden_board:
-        if '_' in ''.join(row):  # Kontrollera om några ord är dolda
-            return False
-    return True
+# Highscore-lagren hålls öppna mellan spelen så att filen bara läses in en gång
+highscore_stores = {}
 
-# Uppdatera och spara highscore-listan i en fil
+# Spara ett vunnet spel sist i partiloggen, ett parti per bräde. Bräden utan logg hoppas över
+def save_game(game, filename="partier.memlog"):
+    for board in delmotorer(game):
+        if repris.kan_sparas(board):
+            repris.spara_parti(filename, "-", board)
+
+# Uppdatera highscore för varje bräde i spelet
+def update_highscores(game, filename="highscores.txt"):
+    for board in delmotorer(game):
+        update_highscore(board.försök, f"{board.rader}x{board.kolumner}", filename)
+
+# Uppdatera och spara highscore-listan i en fil. size är ett tal för kvadratiska bräden eller en text som "4x3"
 def update_highscore(attempts, size, filename="highscores.txt"):
-    highscores = []
-
-    # Läs existerande highscore från fil
-    if os.path.exists(filename):
-        with open(filename, 'r') as file:
-            for line in file:
-                entry = line.strip().split(",")
-                highscores.append((int(entry[0]), int(entry[1])))
-
-    # Lägg till den nuvarande poängen
-    highscores.append((attempts, size))
-    highscores.sort(key=lambda x: (x[0], x[1]))  # Sortera efter försök och storlek
-
-    # Spara de fem bästa resultaten
-    with open(filename, 'w') as file:
-        for score in highscores[:5]:
-            file.write(f"{score[0]},{score[1]}\n")
+    size = f"{size}x{size}" if isinstance(size, int) else size
+    if filename not in highscore_stores:
+        highscore_stores[filename] = highscore.öppna(filename, topp=5)
+    store = highscore_stores[filename]
+
+    # Lägg till den nuvarande poängen sist i filen, de fem bästa per storlek hålls i minnet
+    store.lägg_till("-", attempts, size)
     
     # Visa highscore
     print("\nHighscore-lista:")
-    for idx, (attempt, size) in enumerate(highscores[:5], start=1):
+    for idx, (_, attempt) in enumerate(store.topplista(size), start=1):
         print(f"{idx}. Försök: {attempt}, Storlek: {size}")
 
 # Funktion för att hantera spelet i textläge
-def play_memory_game():
-    size = 6
-    words = load_words(word_count=18)
-    max_word_len = max(len(word) for word in words)
-    board = create_board(words, size)
-    hidden_board = create_hidden_board(size, max_word_len)
-    attempts = 0
-
-    while not is_game_won(hidden_board):
-        print_board(hidden_board)
+# Med flera bräden anges cellerna som "bräde rad kolumn", brädena räknas från 0 som raderna.
+# Med game fortsätter ett sparat spel. Spelet sparas efter varje drag och tas bort när det är vunnet
+def play_memory_game(size=6, game=None, checkpoint=None):
+    # Cellernas bredd kommer från ordlistans hinkar för ett nytt spel, för ett sparat spel mäts orden
+    words = None
+    if game is None:
+        layout = to_layout(size)
+        game = create_game(layout)
+        words = ordlager.hämta_ord("memo.txt")
+    else:
+        layout = layout_för(game)
+    checkpoint = checkpoint or Sparpunkt(CHECKPOINT_FILE)
+    renderer = Renderare(0, 0, cellbredd(words, game.ord), radnamn=str, första_kolumn=0, layout=layout)
+    several = len(layout.brädor) > 1
+    prompt = "(bräde rad kolumn)" if several else "(rad kolumn)"
+
+    # Index för en cell som "rad kolumn" eller "bräde rad kolumn", IndexError om cellen inte finns
+    def read_cell(text):
+        numbers = list(map(int, input(text).split()))
+        if len(numbers) != (3 if several else 2) or min(numbers) < 0:
+            raise ValueError
+        return layout.index(*numbers) if several else layout.index(0, *numbers)
+
+    while not is_game_won(game):
+        print_board(game, renderer)
         try:
-            r1, c1 = map(int, input("Välj första cell (rad kolumn): ").split())
-            r2, c2 = map(int, input("Välj andra cell (rad kolumn): ").split())
-            attempts += 1
-
-            if (r1, c1) == (r2, c2):
+            i1 = read_cell(f"Välj första cell {prompt}: ")
+            i2 = read_cell(f"Välj andra cell {prompt}: ")
+            if i1 == i2:
                 print("Du valde samma cell två gånger. Försök igen!")
                 continue
+            if game.är_synlig(i1) or game.är_synlig(i2):
+                print("Cellen är redan avslöjad. Försök igen!")
+                continue
+
+            if several and layout.bräda(i1)[0] != layout.bräda(i2)[0]:
+                print("Båda cellerna måste ligga på samma bräde. Försök igen!")
+                continue
+
+            game.flip(i1)
+            result = game.flip(i2)
+            print_board(game, renderer)
             
-            hidden_board[r1][c1] = board[r1][c1]
-            hidden_board[r2][c2] = board[r2][c2]
-            print_board(hidden_board)
-            
-            if board[r1][c1] == board[r2][c2]:
+            if result != MISS:
                 print("Matchning!")
             else:
                 print("Ingen matchning.")
-                hidden_board[r1][c1] = '_' * max_word_len
-                hidden_board[r2][c2] = '_' * max_word_len
+                game.dölj()
+            checkpoint.efter_drag(game)
         except (ValueError, IndexError):
-            print("Ogiltig inmatning. Ange rad och kolumn mellan 0 och 5.")
+            print(f"Ogiltig inmatning. Ange {prompt[1:-1]} för en cell på brädet {layout.text()}.")
 
-    print(f"Grattis! Du har matchat alla ord på {attempts} försök.")
-    update_highscore(attempts, size)
+    print(f"Grattis! Du har matchat alla ord på {game.försök} försök.")
+    save_game(game)
+    update_highscores(game)
 
 # Grafisk version med tkinter
 class MemoryGameGUI:
-    def __init__(self, root, size=6):
+    # delay är antalet millisekunder som ett felmatchat par visas. Med game fortsätter ett sparat spel
+    def __init__(self, root, size=6, delay=1000, game=None, checkpoint=None):
         self.root = root
-        self.size = size
-        self.attempts = 0
-        self.first_click = None
-        self.words = load_words(word_count=(size * size) // 2)
-        self.board = create_board(self.words, size)
-        self.hidden_board = create_hidden_board(size, max(len(word) for word in self.words))
-        self.buttons = [[None for _ in range(size)] for _ in range(size)]
+        self.game = game or create_game(to_layout(size))
+        self.layout = layout_för(self.game)
+        self.checkpoint = checkpoint or Sparpunkt(CHECKPOINT_FILE)
+        self.hidden = '_' * max(len(word) for word in self.game.ord)
         self.create_widgets()
+        self.board.visa_synliga(self.game)
+        # Klicken köas och körs i ordning, ett felmatchat par göms när tiden går ut eller nästa cell vänds.
+        # Spelet sparas efter varje vänd cell
+        self.scheduler = VändSchema(self.game, self.root, self.board.visa, self.board.dölj,
+                                    self.show_winner, delay, lambda: self.checkpoint.efter_drag(self.game))
 
+    # Hela brädet ritas på en canvas, som räknar ut vilken cell som klickades från koordinaterna
     def create_widgets(self):
-        for r in range(self.size):
-            for c in range(self.size):
-                btn = tk.Button(self.root, text=self.hidden_board[r][c], width=10, height=3,
-                                command=lambda r=r, c=c: self.cell_click(r, c))
-                btn.grid(row=r, column=c)
-                self.buttons[r][c] = btn
-
-    def cell_click(self, r, c):
-        if self.hidden_board[r][c] != '_' * len(self.board[r][c]):  # Om cellen redan är synlig
-            return
-
-        self.hidden_board[r][c] = self.board[r][c]
-        self.buttons[r][c].config(text=self.board[r][c])
-
-        if self.first_click is None:
-            self.first_click = (r, c)
-        else:
-            r1, c1 = self.first_click
-            self.attempts += 1
-            if self.board[r1][c1] == self.board[r][c]:  # Om matchning
-                self.first_click = None
-            else:
-                self.root.after(1000, self.hide_cells, r1, c1, r, c)  # Göm om ej match
-                self.first_click = None
+        self.board = CanvasBräda(self.root, self.layout, self.cell_click, dold_text=self.hidden)
+        self.board.pack()
 
-        if is_game_won(self.hidden_board):
-            self.show_winner()
-
-    def hide_cells(self, r1, c1, r2, c2):
-        self.hidden_board[r1][c1] = '_' * len(self.board[r1][c1])
-        self.hidden_board[r2][c2] = '_' * len(self.board[r2][c2])
-        self.buttons[r1][c1].config(text=self.hidden_board[r1][c1])
-        self.buttons[r2][c2].config(text=self.hidden_board[r2][c2])
+    def cell_click(self, index):
+        self.scheduler.klick(index)
 
     def show_winner(self):
-        print(f"Grattis! Du vann spelet på {self.attempts} försök.")
-        update_highscore(self.attempts, self.size)
+        self.scheduler.avbryt()
+        print(f"Grattis! Du vann spelet på {self.game.försök} försök.")
+        save_game(self.game)
+        update_highscores(self.game)
         self.root.quit()
 
 if __name__ == "__main__":
     mode = input("Välj läge: 1 för textläge, 2 för grafiskt läge: ")
+    saved = None
+    if Sparpunkt(CHECKPOINT_FILE).finns() and input("Fortsätta det sparade spelet? (j/n): ").strip().lower() == "j":
+        try:
+            saved = resume_game()
+        except (OSError, ValueError) as e:
+            print(f"Det sparade spelet kunde inte läsas: {e}")
+    size = 6 if saved else input("Välj storlek (t.ex. 6, 4x3 eller 2*4x4 för två bräden): ").strip() or "6"
     if mode == "1":
-        play_memory_game()
+        play_memory_game(size, saved)
     elif mode == "2":
         root = tk.Tk()
         root.title("Memory Game")
-        game = MemoryGameGUI(root)
+        game = MemoryGameGUI(root, size, game=saved)
         root.mainloop()
@@ -0,0 +1,55 @@
+#Skapar många spelbräden på en gång med NumPy, t.ex. för simuleringar och förgenererade dagliga pussel.
+#Kräver numpy, vilket resten av spelet inte gör.
+#
+#Ett bräde är en heltalsmatris med ord-id, dvs. index i ordlistan. Alla bräden i en batch har samma storlek
+#och returneras som en array med formen (antal, rader, kolumner).
+from array import array
+
+import numpy as np
+
+from motor import MemoryMotor
+
+#Drar par olika ord-id per bräde. När listan är mycket större än antalet par dras id med återläggning
+#och bara de bräden som råkade få en dubblett dras om, annars väljs de par minsta av slumptal per ord.
+def _välj_ord(rng, antal, antal_ord, par):
+    if par * par > antal_ord:
+        return rng.random((antal, antal_ord)).argpartition(par - 1, axis=1)[:, :par]
+
+    valda = rng.integers(0, antal_ord, size=(antal, par))
+    while True:
+        sorterade = np.sort(valda, axis=1)
+        dubbletter = np.flatnonzero((sorterade[:, 1:] == sorterade[:, :-1]).any(axis=1))
+        if dubbletter.size == 0:
+            return valda
+        valda[dubbletter] = rng.integers(0, antal_ord, size=(dubbletter.size, par))
+
+#Skapar antal bräden med rader x kolumner rutor ur en ordlista med antal_ord ord.
+#rng kan vara en numpy Generator eller ett frö; samma frö ger samma bräden.
+def skapa_brädor(antal, rader, kolumner, antal_ord, rng=None):
+    rutor = rader * kolumner
+    if rader < 1 or kolumner < 1 or rutor % 2 != 0:
+        raise ValueError("Matrisstorleken måste vara jämn")
+    par = rutor // 2
+    if par > antal_ord:
+        raise ValueError(f"Brädet kräver {par} ord men ordlistan har bara {antal_ord}.")
+    rng = np.random.default_rng(rng)
+
+    valda = _välj_ord(rng, antal, antal_ord, par)
+    #Varje rad är en egen blandning av par-index 0, 0, 1, 1, ...
+    placering = rng.permuted(np.tile(np.repeat(np.arange(par), 2), (antal, 1)), axis=1)
+    brädor = np.take_along_axis(valda, placering, axis=1)
+    return brädor.reshape(antal, rader, kolumner).astype(np.int32, copy=False)
+
+#Översätter ett bräde till den matris med ord (lista av rader) som de äldre varianterna använder
+def till_matris(bräda, ordlista):
+    return [[ordlista[i] for i in rad] for rad in bräda.tolist()]
+
+#Skapar en spelmotor som spelar exakt det givna brädet
+def till_motor(bräda, ordlista):
+    rader, kolumner = bräda.shape
+    ord_id, kort, förekomster = np.unique(bräda.ravel(), return_inverse=True, return_counts=True)
+    if (förekomster != 2).any():
+        raise ValueError("Varje ord måste förekomma exakt två gånger på brädet.")
+    typkod = 'H' if len(ord_id) <= 0xFFFF else 'I'
+    return MemoryMotor([ordlista[i] for i in ord_id.tolist()], rader, kolumner,
+                       kort=array(typkod, kort.tolist()))
@@ -0,0 +1,75 @@
+#Spelbräde för Tk som ritas på en enda Canvas istället för en tk.Button per ruta.
+#Varje ruta är en rektangel och en text med taggen "r<index>", och ett klick översätts till en ruta
+#direkt från koordinaterna. Även stora bräden (30x30 och uppåt) byggs och rivs på en bråkdel av tiden.
+#Rutornas platser kommer från en layout (se layout.py), så flera bräden kan ritas på samma canvas.
+import tkinter as tk
+
+DOLD_FÄRG = "#d9d9d9"
+SYNLIG_FÄRG = "white"
+
+
+class CanvasBräda(tk.Frame):
+
+    #vid_klick anropas med rutans index när spelaren klickar på en ruta. Rullister visas
+    #om brädet är större än max_bredd x max_höjd pixlar.
+    def __init__(self, förälder, layout, vid_klick, cellbredd=80, cellhöjd=50,
+                 dold_text="---", max_bredd=1000, max_höjd=700):
+        super().__init__(förälder)
+        self.layout = layout
+        self.vid_klick = vid_klick
+        self.cellbredd = cellbredd
+        self.cellhöjd = cellhöjd
+        self.dold_text = dold_text
+
+        bredd, höjd = layout.kolumner * cellbredd, layout.rader * cellhöjd
+        self.canvas = tk.Canvas(self, width=min(bredd, max_bredd), height=min(höjd, max_höjd),
+                                scrollregion=(0, 0, bredd, höjd), highlightthickness=0)
+        if bredd > max_bredd:
+            x_list = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.canvas.xview)
+            self.canvas.configure(xscrollcommand=x_list.set)
+            x_list.pack(side=tk.BOTTOM, fill=tk.X)
+        if höjd > max_höjd:
+            y_list = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.canvas.yview)
+            self.canvas.configure(yscrollcommand=y_list.set)
+            y_list.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        #Item-id för rektangeln och texten i varje ruta, i samma ordning som rutorna
+        self._rutor = []
+        self._texter = []
+        skapa_rektangel = self.canvas.create_rectangle
+        skapa_text = self.canvas.create_text
+        for index in range(len(layout)):
+            rad, kol = layout.position(index)
+            x, y = kol * cellbredd, rad * cellhöjd
+            tagg = f"r{index}"
+            self._rutor.append(skapa_rektangel(x + 2, y + 2, x + cellbredd - 2, y + cellhöjd - 2,
+                                               fill=DOLD_FÄRG, outline="gray", tags=("ruta", tagg)))
+            self._texter.append(skapa_text(x + cellbredd / 2, y + cellhöjd / 2,
+                                           text=dold_text, tags=("text", tagg)))
+        self.canvas.bind("<Button-1>", self._klick)
+
+    #Översätter klickets koordinater till en ruta. Klick i mellanrummet mellan brädena ignoreras.
+    def _klick(self, händelse):
+        x = self.canvas.canvasx(händelse.x)
+        y = self.canvas.canvasy(händelse.y)
+        index = self.layout.ruta_vid(int(y // self.cellhöjd), int(x // self.cellbredd))
+        if index >= 0:
+            self.vid_klick(index)
+
+    #Visar ordet på en ruta
+    def visa(self, index, text):
+        self.canvas.itemconfigure(self._texter[index], text=text)
+        self.canvas.itemconfigure(self._rutor[index], fill=SYNLIG_FÄRG)
+
+    #Visar alla rutor som är synliga i motorn, t.ex. när ett sparat spel fortsätter
+    def visa_synliga(self, motor):
+        for index in range(len(motor)):
+            if motor.är_synlig(index):
+                self.visa(index, motor.ord_vid(index))
+
+    #Döljer flera rutor på en gång. Tk ritar om canvasen en gång när händelsen är klar.
+    def dölj(self, index_lista):
+        for index in index_lista:
+            self.canvas.itemconfigure(self._texter[index], text=self.dold_text)
+            self.canvas.itemconfigure(self._rutor[index], fill=DOLD_FÄRG)
@@ -0,0 +1,90 @@
+#Tolkning av drag i textläge, t.ex. "B3". Raden anges med bokstäver (A-Z, sedan AA, AB, ...) och
+#kolumnen med ett tal från 1, så brädet kan ha hur många rader och kolumner som helst.
+#Flera drag kan anges på samma rad, t.ex. "A1 F6" eller "AB12,C3".
+#
+#För vanliga brädstorlekar byggs en tabell med alla rutor i förväg, så ett drag tolkas med en enda uppslagning.
+import re
+from functools import lru_cache
+
+#Brädor med högst så här många rutor får en färdig tabell
+TABELL_GRÄNS = 1024
+
+_RUTA = re.compile(r"([A-Za-z]+)0*([1-9][0-9]*)")
+_AVGRÄNSARE = re.compile(r"[\s,;]+")
+
+
+#Namnet på en rad räknat från 0: A, B, ..., Z, AA, AB, ...
+def radnamn(rad):
+    namn = ""
+    rad += 1
+    while rad:
+        rad, rest = divmod(rad - 1, 26)
+        namn = chr(65 + rest) + namn
+    return namn
+
+#Radens nummer räknat från 0 för ett namn som "AB"
+def radnummer(namn):
+    rad = 0
+    for tecken in namn.upper():
+        rad = rad * 26 + ord(tecken) - 64
+    return rad - 1
+
+
+class Koordinater:
+
+    def __init__(self, rader, kolumner):
+        self.rader = rader
+        self.kolumner = kolumner
+        self._tabell = None
+        if rader * kolumner <= TABELL_GRÄNS:
+            self._tabell = {}
+            for rad in range(rader):
+                namn = radnamn(rad)
+                for kol in range(kolumner):
+                    index = rad * kolumner + kol
+                    self._tabell[f"{namn}{kol + 1}"] = index
+                    self._tabell[f"{namn.lower()}{kol + 1}"] = index
+
+    #Index för en ruta som "B3", eller None om rutan inte finns på brädet
+    def tolka(self, val):
+        if self._tabell is not None:
+            index = self._tabell.get(val)
+            if index is not None:
+                return index
+        träff = _RUTA.fullmatch(val)
+        if träff is None:
+            return None
+        rad = radnummer(träff.group(1))
+        kol = int(träff.group(2)) - 1
+        if rad >= self.rader or kol >= self.kolumner:
+            return None
+        return rad * self.kolumner + kol
+
+    #Tolkar alla drag på en rad och returnerar deras index. Kastar ValueError för det första ogiltiga draget.
+    def tolka_drag(self, text):
+        return tolka_drag(self.tolka, text)
+
+    #Namnet på rutan med det givna indexet, t.ex. "B3"
+    def namn(self, index):
+        rad, kol = divmod(index, self.kolumner)
+        return f"{radnamn(rad)}{kol + 1}"
+
+
+#Delar upp en rad i drag och tolkar varje drag med tolka, som ger index eller None.
+#Kastar ValueError för det första ogiltiga draget. Används även av layout.Layout.
+def tolka_drag(tolka, text):
+    index_lista = []
+    for val in _AVGRÄNSARE.split(text.strip()):
+        if not val:
+            continue
+        index = tolka(val)
+        if index is None:
+            raise ValueError(f"Ogiltig ruta: {val}")
+        index_lista.append(index)
+    return index_lista
+
+
+#Delade koordinater för en brädstorlek, så att tabellen bara byggs en gång per storlek
+@lru_cache(maxsize=64)
+def koordinater(rader, kolumner):
+    return Koordinater(rader, kolumner)
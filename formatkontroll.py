@@ -0,0 +1,215 @@
+#Självkontroll för de binära filformaten: kompilerade ordlistor (ordbinar.py), partiloggar (repris.py),
+#pusselpaket (pusselpaket.py) och sparpunkter (sparpunkt.py). Varje kontroll kodar något, läser tillbaka
+#det och jämför, och där det går spelas spelet klart och partiet spelas upp med repris.py.
+#
+#Kör:  python -m formatkontroll            (några sekunder)
+#      python -m formatkontroll --stor     (även bräden över motor.LAT_GRÄNS, tar längre tid)
+#Avslutas med kod 1 om någon kontroll misslyckas.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+import unicodedata
+
+import ordbinar
+import ordlager
+import repris
+import sparpunkt
+from layout import tolka_layout, delmotorer
+from motor import FlerMotor, LAT_GRÄNS, motor_för_frö
+from pusselpaket import Pusselpaket, skapa_paket
+
+
+#Skriver en ordlista med antal ord till en fil, med dubbletter, tomma rader, CRLF och ord i NFD
+def _skriv_ordlista(fil, antal):
+    with open(fil, "w", encoding="utf-8", newline="") as f:
+        for i in range(antal):
+            f.write(f"ord{i}\r\n" if i % 7 == 0 else f"ord{i}\n")
+        f.write("\nord1\n")
+        f.write(unicodedata.normalize("NFD", "åäö") + "\n")
+        f.write("brett" * 5 + "\n")
+
+#Vänder rätt par på alla bräden tills spelet är vunnet
+def _vinn(motor):
+    motor.dölj()
+    start = motor.start if isinstance(motor, FlerMotor) else [0]
+    for första, bräda in zip(start, delmotorer(motor)):
+        rutor = {}
+        for i in range(len(bräda)):
+            if not bräda.är_synlig(i) or i == bräda.första_val:
+                rutor.setdefault(bräda.kort[i], []).append(i)
+        if bräda.första_val >= 0:
+            motor.flip(första + next(i for i in rutor.pop(bräda.kort[bräda.första_val]) if i != bräda.första_val))
+        for a, b in rutor.values():
+            motor.flip(första + a)
+            motor.flip(första + b)
+    if not motor.är_vunnet():
+        raise AssertionError("spelet blev inte vunnet")
+
+#Sparar varje bräde i en partilogg, läser tillbaka loggen och kontrollerar att alla partier går att spela upp
+def _kontrollera_repris(katalog, motor, namn="Kalle"):
+    logg = os.path.join(katalog, "kontroll.memlog")
+    if os.path.exists(logg):
+        os.remove(logg)
+    for bräda in delmotorer(motor):
+        repris.spara_parti(logg, namn, bräda)
+    partier = list(repris.läs_partier(logg))
+    if len(partier) != len(delmotorer(motor)):
+        raise AssertionError("fel antal partier i loggen")
+    for parti, bräda in zip(partier, delmotorer(motor)):
+        if parti.namn != namn or parti.försök != bräda.försök or repris.spela_upp(parti) != bräda.försök:
+            raise AssertionError(f"partiet {parti.rader}x{parti.kolumner} gick inte att spela upp")
+
+def _samma_motor(a, b):
+    for fält in ("rader", "kolumner", "frö", "försök", "hittade_par", "totala_par", "dolda",
+                 "första_val", "väntande_a", "väntande_b"):
+        if getattr(a, fält) != getattr(b, fält):
+            raise AssertionError(f"{fält} skiljer sig: {getattr(a, fält)} != {getattr(b, fält)}")
+    if bytes(a.synlig) != bytes(b.synlig) or bytes(a.logg or b"") != bytes(b.logg or b""):
+        raise AssertionError("synliga rutor eller loggen skiljer sig")
+    for i in range(min(len(a), 4096)):
+        if a.ord_vid(i) != b.ord_vid(i):
+            raise AssertionError(f"ordet på ruta {i} skiljer sig")
+
+
+def kontrollera_ordbinar(katalog, stor):
+    källa = os.path.join(katalog, "ord.txt")
+    _skriv_ordlista(källa, 500)
+    mål = ordbinar.kompilera(källa)
+    ordlista = ordbinar.BinärOrdlista(mål)
+    väntat = list(ordbinar.läs_textfil(källa))
+    if list(ordlista) != väntat or len(set(väntat)) != len(väntat):
+        raise AssertionError("den kompilerade listan skiljer sig från textfilen")
+    if unicodedata.normalize("NFC", "åäö") not in väntat:
+        raise AssertionError("orden normaliserades inte till NFC")
+    if ordlista.största_bredd != max(map(ordbinar.visningsbredd, väntat)):
+        raise AssertionError("största_bredd stämmer inte")
+    for bredd in range(ordlista.största_bredd + 1):
+        högst = [ordlista[i] for i in ordlista.högst(bredd)]
+        if sorted(högst) != sorted(o for o in väntat if ordbinar.visningsbredd(o) <= bredd):
+            raise AssertionError(f"hinkarna stämmer inte för bredd {bredd}")
+        if ordlista.antal_högst(bredd) != len(högst):
+            raise AssertionError(f"antal_högst stämmer inte för bredd {bredd}")
+    ordlista.stäng()
+
+def kontrollera_repris(katalog, stor):
+    ordlista = ordlager.hämta_ord(os.path.join(katalog, "ord.txt"))
+    storlekar = [(2, 2), (6, 6), (4, 3), (20, 20)] + ([(400, 700)] if stor else [])
+    for frö, (rader, kolumner) in enumerate(storlekar):
+        if rader * kolumner // 2 > len(ordlista):
+            ordlista = range(rader * kolumner // 2)
+        motor = motor_för_frö(ordlista, rader, kolumner, frö, logga=True)
+        _vinn(motor)
+        _kontrollera_repris(katalog, motor, "Kålle")
+
+def kontrollera_pusselpaket(katalog, stor):
+    källa = os.path.join(katalog, "ord.txt")
+    storlekar = [(4, 4), (6, 6)]
+    if stor:
+        stor_källa = os.path.join(katalog, "stor.txt")
+        with open(stor_källa, "w", encoding="utf-8") as f:
+            f.writelines(f"w{i}\n" for i in range(LAT_GRÄNS))
+        storlekar.append((400, 700))
+    for rader, kolumner in storlekar:
+        fil = källa if rader * kolumner <= 1000 else stor_källa
+        paket_fil = skapa_paket(os.path.join(katalog, f"{rader}x{kolumner}.mempak"), rader, kolumner, 2, fil, frö=7)
+        paket = Pusselpaket(paket_fil)
+        for n in range(len(paket)):
+            motor = paket.motor(n, logga=True)
+            #Brädet ska vara detsamma som motorn ger fröet med den ursprungliga ordlistan
+            egen = motor_för_frö(ordlager.hämta_ord(fil), rader, kolumner, motor.frö)
+            if any(motor.ord_vid(i) != egen.ord_vid(i) for i in range(len(motor))):
+                raise AssertionError(f"bräde {n} i paketet {rader}x{kolumner} skiljer sig från motor_för_frö")
+            _vinn(motor)
+            _kontrollera_repris(katalog, motor)
+        paket.stäng()
+
+def kontrollera_sparpunkt(katalog, stor):
+    ordlista = ordlager.hämta_ord(os.path.join(katalog, "ord.txt"))
+    fil = os.path.join(katalog, "spel.memspar")
+    fall = [("6", True), ("4x3", False), ("2*4x4", True), ("3*2x2", False)]
+    if stor:
+        fall.append(("600x600", True))
+    for storlek, logga in fall:
+        layout = tolka_layout(storlek)
+        lista = ordlista if layout.ord_som_krävs <= len(ordlista) else [f"w{i}" for i in range(layout.ord_som_krävs)]
+        motor = layout.skapa_motor(lista, 11, logga)
+        #Några drag: ett par, en miss som fortfarande visas och ett halvt försök
+        bräda = delmotorer(motor)[0]
+        a = bräda.kort.index(bräda.kort[0], 1) if hasattr(bräda.kort, "index") else \
+            next(i for i in range(1, len(bräda)) if bräda.kort[i] == bräda.kort[0])
+        for index in (0, a, 1, 2, 3):
+            motor.flip(index)
+
+        punkt = sparpunkt.Sparpunkt(fil)
+        punkt.spara(motor, "Stina")
+        sparat = punkt.läs(lista)
+        if sparat.namn != "Stina":
+            raise AssertionError("namnet sparades inte")
+        for original, återställd in zip(delmotorer(motor), delmotorer(sparat.motor)):
+            _samma_motor(original, återställd)
+        if isinstance(motor, FlerMotor) and (motor.aktiv, motor.väntande_a) != (sparat.motor.aktiv, sparat.motor.väntande_a):
+            raise AssertionError("FlerMotor återställdes inte")
+
+        #Båda ska fortsätta likadant, och det återställda spelet ska gå att spara som parti
+        _vinn(motor)
+        _vinn(sparat.motor)
+        if sparat.motor.försök != motor.försök:
+            raise AssertionError("det återställda spelet tog ett annat antal försök")
+        if logga:
+            _kontrollera_repris(katalog, sparat.motor)
+        elif any(repris.kan_sparas(b) for b in delmotorer(sparat.motor)):
+            raise AssertionError("ett spel utan logg ska inte kunna sparas som parti")
+
+        #Ett vunnet spel tas bort, och en skadad fil avvisas
+        punkt.efter_drag(sparat.motor)
+        if punkt.finns():
+            raise AssertionError("ett vunnet spel togs inte bort")
+    data = bytearray(sparpunkt.koda(motor_för_frö(ordlista, 4, 4, 1)))
+    data[len(data) // 2] ^= 1
+    try:
+        sparpunkt.avkoda(bytes(data))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("en skadad sparpunkt lästes utan fel")
+
+
+KONTROLLER = {
+    "ordbinar": kontrollera_ordbinar,
+    "repris": kontrollera_repris,
+    "pusselpaket": kontrollera_pusselpaket,
+    "sparpunkt": kontrollera_sparpunkt,
+}
+
+
+def kör(stor=False):
+    katalog = tempfile.mkdtemp(prefix="memory_kontroll_")
+    fel = 0
+    try:
+        for namn, kontroll in KONTROLLER.items():
+            try:
+                kontroll(katalog, stor)
+                print(f"OK   {namn}")
+            except Exception:
+                fel += 1
+                print(f"FEL  {namn}")
+                traceback.print_exc()
+    finally:
+        ordlager.töm_cache()
+        shutil.rmtree(katalog, ignore_errors=True)
+    return fel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kontrollerar att de binära filformaten kan skrivas och läsas tillbaka.")
+    parser.add_argument("--stor", action="store_true", help="ta med bräden över motor.LAT_GRÄNS")
+    args = parser.parse_args(argv)
+    if kör(args.stor):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
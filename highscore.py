@@ -0,0 +1,211 @@
+#Lagring av highscores. Alla resultat läggs till sist i en loggfil med raderna "namn,försök,storlek",
+#och de bästa resultaten för varje brädstorlek hålls i en hög i minnet. Att spara ett resultat
+#kostar O(log K) och att hämta topplistan för en storlek O(K), oavsett hur många spel som har loggats.
+#När loggen har vuxit för mycket skrivs den om så att bara topplistorna finns kvar.
+#
+#Flera processer kan dela loggen. Både tillägg och omskrivning tar ett flock-lås på loggen, och
+#omskrivningen läser in filen igen under låset, så att rader från andra processer inte försvinner.
+#På system utan fcntl (Windows) låses loggen inte.
+#
+#Gränssnittet delas med SqliteHighscore i highscore_sqlite.py. I båda lagren gäller alla(), sida() och
+#antal() bara resultaten i topplistorna, de topp bästa för varje storlek, så topplistevyn visar samma
+#lista oavsett vilket lager highscore.öppna väljer.
+import heapq
+import os
+from collections import Counter
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+#Läser en rad i loggen och returnerar (namn, försök, storlek). Namnet får innehålla kommatecken.
+#Äldre filer från Memory_main ("försök,storlek") och B-Memory ("storlek,namn,försök") läses också.
+#Kastar ValueError om raden inte går att tolka.
+def tolka_rad(rad):
+    rad = rad.rstrip("\r\n")
+    fält = rad.rsplit(",", 2)
+    if len(fält) == 2:
+        försök, storlek = int(fält[0]), int(fält[1])
+        namn, storlek = "-", f"{storlek}x{storlek}"
+    elif len(fält) == 3 and "x" not in fält[2]:
+        storlek, rest = rad.split(",", 1)
+        namn, försök = rest.rsplit(",", 1)
+        försök, storlek = int(försök), int(storlek)
+        storlek = f"{storlek}x{storlek}"
+    elif len(fält) == 3:
+        namn, försök, storlek = fält[0], int(fält[1]), fält[2]
+        rader, kolumner = storlek.split("x")
+        if not rader.isdigit() or not kolumner.isdigit():
+            raise ValueError(f"Ogiltig storlek: {storlek}")
+    else:
+        raise ValueError(f"Ogiltig rad: {rad}")
+    if försök <= 0:
+        raise ValueError(f"Ogiltigt antal försök: {försök}")
+    return namn, försök, storlek
+
+#Läser en highscore-fil rad för rad och ger (namn, försök, storlek) för varje giltig rad.
+#Rader som inte går att tolka hoppas över. Om statistik ges (t.ex. en Counter) räknas
+#"poster" och "felaktiga" upp i den. Hela filen hålls aldrig i minnet.
+def läs_poster(fil, statistik=None):
+    if statistik is None:
+        statistik = Counter()
+    with open(fil, 'r', encoding='utf-8', errors='replace') as f:
+        for rad in f:
+            if not rad.strip():
+                continue
+            try:
+                post = tolka_rad(rad)
+            except ValueError:
+                statistik["felaktiga"] += 1
+                continue
+            statistik["poster"] += 1
+            yield post
+
+#Öppnar loggen för att lägga till rader och låser den tills filen stängs. Om loggen skrevs om medan
+#låset väntade öppnas den nya filen istället, så att inga rader hamnar i den gamla som har ersatts.
+def _öppna_låst(fil):
+    while True:
+        f = open(fil, 'a', encoding='utf-8')
+        if fcntl is None:
+            return f
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if os.fstat(f.fileno()).st_ino == os.stat(fil).st_ino:
+                return f
+        except FileNotFoundError:
+            pass
+        f.close()
+
+#Antal rutor för en storlek som "4x3"
+def rutor(storlek):
+    rader, kolumner = storlek.split("x")
+    return int(rader) * int(kolumner)
+
+#Sorteringar som sida() stöder. Lika värden behåller ordningen resultaten sparades i.
+_NYCKLAR = {
+    "försök": lambda post: post[1],
+    "storlek": lambda post: (rutor(post[2]), post[2], post[1]),
+    "namn": lambda post: post[0].casefold(),
+}
+SORTERINGAR = tuple(_NYCKLAR)
+
+
+class HighscoreLager:
+
+    #topp är antalet resultat som sparas per storlek. Loggen komprimeras när den har fler än
+    #komprimera_efter rader utöver de som ligger i topplistorna.
+    def __init__(self, fil="highscore.txt", topp=10, komprimera_efter=1000):
+        self.fil = fil
+        self.topp = topp
+        self.komprimera_efter = komprimera_efter
+        self._högar = {}  #storlek -> hög med (-försök, -löpnummer, namn), sämsta resultatet överst
+        self._sorterade = {}  #storlek -> cachad topplista, rensas när storleken får ett nytt resultat
+        self._vyer = {}  #sortering -> alla behållna resultat i den ordningen, rensas vid varje ändring
+        self._löpnummer = 0  #Ordningen resultaten kom in i, vid lika försök vinner det äldsta
+        self.statistik = Counter()  #Antal giltiga och felaktiga rader vid inläsningen
+        if os.path.exists(fil):
+            for post in läs_poster(fil, self.statistik):
+                self._lägg_i_hög(*post)
+        self._rader = self.statistik["poster"] + self.statistik["felaktiga"]  #Antal rader i loggfilen
+
+    def _lägg_i_hög(self, namn, försök, storlek):
+        self._löpnummer += 1
+        post = (-försök, -self._löpnummer, namn)
+        hög = self._högar.setdefault(storlek, [])
+        if len(hög) < self.topp:
+            heapq.heappush(hög, post)
+        elif post > hög[0]:
+            heapq.heapreplace(hög, post)
+        else:
+            return
+        self._sorterade.pop(storlek, None)
+        self._vyer.clear()
+
+    #Sparar ett resultat. Raden läggs till sist i loggen med en enda skrivning.
+    def lägg_till(self, namn, försök, storlek):
+        with _öppna_låst(self.fil) as f:
+            f.write(f"{namn},{försök},{storlek}\n")
+        self._rader += 1
+        self._lägg_i_hög(namn, försök, storlek)
+        if self._rader - self.antal_behållna() > self.komprimera_efter:
+            self.komprimera()
+
+    #Sparar många resultat med en enda skrivning till loggen
+    def lägg_till_många(self, poster):
+        poster = list(poster)
+        with _öppna_låst(self.fil) as f:
+            f.write("".join(f"{namn},{försök},{storlek}\n" for namn, försök, storlek in poster))
+        self._rader += len(poster)
+        for post in poster:
+            self._lägg_i_hög(*post)
+        if self._rader - self.antal_behållna() > self.komprimera_efter:
+            self.komprimera()
+
+    #Topplistan för en storlek som en lista med (namn, försök), bästa resultatet först
+    def topplista(self, storlek, k=None):
+        lista = self._sorterade.get(storlek)
+        if lista is None:
+            lista = [(namn, -försök) for försök, _, namn in sorted(self._högar.get(storlek, ()), reverse=True)]
+            self._sorterade[storlek] = lista
+        return lista if k is None else lista[:k]
+
+    def storlekar(self):
+        return list(self._högar)
+
+    #Alla resultat som finns i topplistorna, som (namn, försök, storlek) i den ordning de sparades
+    def alla(self):
+        poster = [(-löp, namn, -försök, storlek)
+                  for storlek, hög in self._högar.items() for försök, löp, namn in hög]
+        poster.sort()
+        return [(namn, försök, storlek) for _, namn, försök, storlek in poster]
+
+    #Hämtar resultaten i topplistorna med plats start till start + antal i den valda sorteringen, som
+    #(namn, försök, storlek). Används av topplistevyn, som bara hämtar de rader som syns.
+    def sida(self, start, antal, sortering="försök", fallande=False):
+        vy = self._vyer.get(sortering)
+        if vy is None:
+            vy = sorted(self.alla(), key=_NYCKLAR[sortering])
+            self._vyer[sortering] = vy
+        if fallande:
+            slut = len(vy) - start
+            return vy[max(slut - antal, 0):max(slut, 0)][::-1]
+        return vy[start:start + antal]
+
+    #Antal resultat i topplistorna
+    def antal(self):
+        return self.antal_behållna()
+
+    def antal_behållna(self):
+        return sum(len(hög) for hög in self._högar.values())
+
+    #Skriver om loggen så att den bara innehåller topplistorna. Den nya filen skrivs först
+    #till en temporär fil och byter sedan plats med den gamla. Loggen är låst under hela omskrivningen,
+    #och topplistorna byggs om från filen först, så att resultat som andra processer har lagt till
+    #sedan loggen lästes in också kommer med.
+    def komprimera(self):
+        with _öppna_låst(self.fil):
+            self._högar = {}
+            self._sorterade.clear()
+            self._vyer.clear()
+            for post in läs_poster(self.fil):
+                self._lägg_i_hög(*post)
+            temp = f"{self.fil}.{os.getpid()}.tmp"
+            with open(temp, 'w', encoding='utf-8') as f:
+                for namn, försök, storlek in self.alla():
+                    f.write(f"{namn},{försök},{storlek}\n")
+            os.replace(temp, self.fil)
+        self._rader = self.antal_behållna()
+
+
+#Filändelser som lagras i SQLite
+SQLITE_ÄNDELSER = (".db", ".sqlite", ".sqlite3")
+
+#Öppnar highscore-lagret för en fil. Filer som slutar på .db eller .sqlite lagras i SQLite
+#(se highscore_sqlite.py), som tål att flera processer skriver samtidigt.
+def öppna(fil="highscore.txt", **inställningar):
+    if fil.endswith(SQLITE_ÄNDELSER):
+        from highscore_sqlite import SqliteHighscore
+        return SqliteHighscore(fil, **inställningar)
+    return HighscoreLager(fil, **inställningar)
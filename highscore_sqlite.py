@@ -0,0 +1,150 @@
+#SQLite-backend för highscores, för kiosker som delar en highscore-fil. Har samma gränssnitt som
+#HighscoreLager i highscore.py. Databasen körs i WAL-läge så att många processer kan skriva samtidigt
+#utan att resultat går förlorade, och topplistor hämtas via ett index på (storlek, försök).
+#
+#Precis som i HighscoreLager gäller alla(), sida() och antal() bara resultaten i topplistorna, de topp
+#bästa för varje storlek, även om databasen har kvar alla resultat. poster() ger alla sparade resultat.
+#
+#Importera en gammal textfil:  python highscore_sqlite.py highscore.txt highscore.db
+import sqlite3
+import sys
+from collections import Counter
+
+from highscore import läs_poster
+
+#Antal rutor för storleken, t.ex. 12 för "4x3", för sorteringen efter storlek.
+_RUTOR = "CAST(storlek AS INTEGER) * CAST(substr(storlek, instr(storlek, 'x') + 1) AS INTEGER)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS highscore (
+    id      INTEGER PRIMARY KEY,
+    namn    TEXT NOT NULL,
+    försök  INTEGER NOT NULL,
+    storlek TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS highscore_storlek_försök ON highscore (storlek, försök, id);
+"""
+
+#Resultaten i topplistorna. Storlekarna hittas en i taget med indexet (storlek > föregående), och för varje
+#storlek hämtas de topp bästa via samma index, så frågan läser O(storlekar * topp) rader oavsett databasens storlek.
+_TOPPLISTOR = """
+WITH RECURSIVE storlekar(storlek) AS (
+    SELECT min(storlek) FROM highscore
+    UNION ALL
+    SELECT (SELECT min(storlek) FROM highscore WHERE storlek > storlekar.storlek) FROM storlekar
+    WHERE storlekar.storlek IS NOT NULL
+), topplistor AS (
+    SELECT highscore.* FROM storlekar JOIN highscore ON highscore.id IN (
+        SELECT id FROM highscore WHERE storlek = storlekar.storlek ORDER BY försök, id LIMIT :topp)
+)
+"""
+
+#ORDER BY för varje sortering i sida()
+_ORDNING = {
+    "försök": ("försök", "id"),
+    "storlek": (_RUTOR, "storlek", "försök", "id"),
+    "namn": ("namn COLLATE NOCASE", "id"),
+}
+
+
+class SqliteHighscore:
+
+    #topp är antalet resultat per storlek i topplistorna. Med batchstorlek > 1 samlas resultat
+    #i minnet och skrivs i en transaktion när bufferten är full, vid töm() eller före en läsning.
+    def __init__(self, fil="highscore.db", topp=10, batchstorlek=1, timeout=30.0):
+        self.fil = fil
+        self.topp = topp
+        self.batchstorlek = batchstorlek
+        self._buffert = []
+        self.statistik = Counter()  #Giltiga och felaktiga rader från importera_text
+        self._db = sqlite3.connect(fil, timeout=timeout, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def lägg_till(self, namn, försök, storlek):
+        self._buffert.append((namn, försök, storlek))
+        if len(self._buffert) >= self.batchstorlek:
+            self.töm()
+
+    #Sparar många resultat i en och samma transaktion
+    def lägg_till_många(self, poster):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany("INSERT INTO highscore (namn, försök, storlek) VALUES (?, ?, ?)", poster)
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    #Skriver de buffrade resultaten till databasen
+    def töm(self):
+        if self._buffert:
+            poster, self._buffert = self._buffert, []
+            self.lägg_till_många(poster)
+
+    #Topplistan för en storlek som en lista med (namn, försök), bästa resultatet först
+    def topplista(self, storlek, k=None):
+        self.töm()
+        return self._db.execute(
+            "SELECT namn, försök FROM highscore WHERE storlek = ? ORDER BY försök, id LIMIT ?",
+            (storlek, self.topp if k is None else k)).fetchall()
+
+    def storlekar(self):
+        self.töm()
+        return [rad[0] for rad in self._db.execute("SELECT DISTINCT storlek FROM highscore")]
+
+    #Alla resultat som finns i topplistorna, som (namn, försök, storlek) i den ordning de sparades
+    def alla(self):
+        self.töm()
+        return self._db.execute(_TOPPLISTOR + "SELECT namn, försök, storlek FROM topplistor ORDER BY id",
+                                {"topp": self.topp}).fetchall()
+
+    #Hämtar resultaten med plats start till start + antal i den valda sorteringen, som (namn, försök, storlek).
+    #Bara resultaten i topplistorna sorteras, så en sida kostar O(storlekar * topp).
+    def sida(self, start, antal, sortering="försök", fallande=False):
+        self.töm()
+        riktning = " DESC" if fallande else ""
+        ordning = ", ".join(term + riktning for term in _ORDNING[sortering])
+        return self._db.execute(
+            _TOPPLISTOR + f"SELECT namn, försök, storlek FROM topplistor ORDER BY {ordning} LIMIT :antal OFFSET :start",
+            {"topp": self.topp, "antal": antal, "start": start}).fetchall()
+
+    #Antal resultat i topplistorna
+    def antal(self):
+        self.töm()
+        return self._db.execute(_TOPPLISTOR + "SELECT count(*) FROM topplistor", {"topp": self.topp}).fetchone()[0]
+
+    #Alla sparade resultat, som (namn, försök, storlek) i den ordning de sparades. Läses rad för rad.
+    def poster(self):
+        self.töm()
+        yield from self._db.execute("SELECT namn, försök, storlek FROM highscore ORDER BY id")
+
+    #Läser in en highscore-fil i textformat. Raderna skrivs i block om blockstorlek per transaktion
+    #och rader som inte går att tolka hoppas över. Returnerar en Counter med "poster" och "felaktiga".
+    def importera_text(self, fil, blockstorlek=10000):
+        statistik = Counter()
+        block = []
+        for post in läs_poster(fil, statistik):
+            block.append(post)
+            if len(block) >= blockstorlek:
+                self.lägg_till_många(block)
+                block = []
+        if block:
+            self.lägg_till_många(block)
+        self.statistik.update(statistik)
+        return statistik
+
+    def stäng(self):
+        self.töm()
+        self._db.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Användning: python highscore_sqlite.py highscore.txt highscore.db")
+        sys.exit(1)
+    databas = SqliteHighscore(sys.argv[2])
+    statistik = databas.importera_text(sys.argv[1])
+    print(f"Importerade {statistik['poster']} resultat till {sys.argv[2]}, hoppade över {statistik['felaktiga']} felaktiga rader")
+    databas.stäng()
@@ -0,0 +1,203 @@
+#Memory-servern fördelad på flera processer, för maskiner med många kärnor. En frontprocess tar emot
+#anslutningarna och lämnar över varje socket till en arbetarprocess, vald utifrån sessionens nummer.
+#Arbetaren kör samma protokoll som server.py i en egen händelseloop och sköter anslutningen tills den
+#stängs, så frontprocessen rör aldrig några drag och alla sessioner stannar hos sin arbetare.
+#
+#Resultat från vunna spel skickas till en enda skrivarprocess genom en kö. Skrivaren samlar ihop
+#resultaten och sparar dem i omgångar, så arbetarna aldrig slåss om highscore-filen eller partiloggen.
+#
+#Ordlistan och grannindexet (se likhet.py) läses in en gång i frontprocessen innan arbetarna skapas
+#med fork, så att alla arbetare delar samma minnessidor istället för att läsa in eller bygga om dem själva.
+#
+#Socketar lämnas över med SCM_RIGHTS och arbetarna skapas med fork, så servern kräver Unix.
+#Starta:  python klusterserver.py --port 4000 --arbetare 32
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import socket
+import struct
+
+import highscore
+import likhet
+import ordlager
+import repris
+from layout import delmotorer
+from server import MemoryServer, MAX_RAD, BATCHSTORLEK, spara_omgång
+
+_SESSION = struct.Struct("<Q")
+
+
+class _ArbetarServer(MemoryServer):
+
+    #Skickar resultaten och de kodade partierna till skrivarprocessen istället för att skriva själv.
+    #ordlista och grannar har lästs in av frontprocessen före fork.
+    def __init__(self, ord_fil, kö, partilogg, paket, ordlista, grannar):
+        super().__init__(ord_fil, None, partilogg, paket, ordlista, grannar)
+        self.kö = kö
+
+    def spara(self, namn, motor):
+        for bräda in delmotorer(motor):
+            parti = repris.koda_parti(namn, bräda) if self.partilogg and repris.kan_sparas(bräda) else None
+            self.kö.put((namn, bräda.försök, f"{bräda.rader}x{bräda.kolumner}", parti))
+
+
+def _arbetare(kontroll, ord_fil, kö, partilogg, paket, ordlista, grannar):
+    random.seed()  #Annars får alla arbetare som skapats med fork samma bräden
+    try:
+        asyncio.run(_arbeta(kontroll, ord_fil, kö, partilogg, paket, ordlista, grannar))
+    except KeyboardInterrupt:
+        pass
+
+async def _arbeta(kontroll, ord_fil, kö, partilogg, paket, ordlista, grannar):
+    server = _ArbetarServer(ord_fil, kö, partilogg, paket, ordlista, grannar)
+    loop = asyncio.get_running_loop()
+    klar = loop.create_future()
+    uppgifter = set()
+
+    #Tar emot en socket från frontprocessen. Ett tomt meddelande betyder att fronten har stängts.
+    def ta_emot():
+        try:
+            data, fds, _, _ = socket.recv_fds(kontroll, _SESSION.size, 1)
+        except OSError:
+            data, fds = b"", []
+        if not data:
+            loop.remove_reader(kontroll.fileno())
+            klar.set_result(None)
+            return
+        for fd in fds:
+            uppgift = loop.create_task(_anslut(server, socket.socket(fileno=fd)))
+            uppgifter.add(uppgift)
+            uppgift.add_done_callback(uppgifter.discard)
+
+    loop.add_reader(kontroll.fileno(), ta_emot)
+    await klar
+    if uppgifter:
+        await asyncio.wait(uppgifter)
+
+async def _anslut(server, sock):
+    läsare, skrivare = await asyncio.open_connection(sock=sock, limit=MAX_RAD)
+    await server.hantera_klient(läsare, skrivare)
+
+
+#Skrivarprocessen. Väntar på ett resultat och tar sedan med allt som redan står i kön, upp till batchstorlek.
+#None i kön betyder att skrivaren ska spara det som finns kvar och avsluta.
+#Ctrl-C ignoreras så att skrivaren hinner spara allt som arbetarna har skickat innan den avslutas.
+#Omgångarna sparas med server.spara_omgång, som skriver ut fel och fortsätter med nästa omgång.
+def _skriv_highscore(kö, highscore_fil, partilogg, batchstorlek=BATCHSTORLEK):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    lager = highscore.öppna(highscore_fil) if highscore_fil else None
+    slut = False
+    while not slut:
+        post = kö.get()
+        poster = []
+        while post is not None:
+            poster.append(post)
+            if len(poster) >= batchstorlek:
+                break
+            try:
+                post = kö.get_nowait()
+            except queue.Empty:
+                break
+        slut = post is None
+        spara_omgång(poster, lager, highscore_fil, partilogg)
+    if hasattr(lager, "stäng"):
+        lager.stäng()
+
+
+class KlusterServer:
+
+    #arbetare är antalet arbetarprocesser, som standard en per kärna
+    def __init__(self, ord_fil="memo.txt", highscore_fil="highscore.txt", arbetare=None, partilogg=None, paket=None):
+        self.ord_fil = ord_fil
+        self.highscore_fil = highscore_fil
+        self.partilogg = partilogg
+        self.paket = paket
+        self.antal_arbetare = arbetare or os.cpu_count() or 1
+        self.sessioner = 0  #Antal anslutningar som har lämnats över, ger nästa sessions nummer
+        self._kanaler = []
+        self._processer = []
+        self._kö = None
+        self._skrivare = None
+        self._lyssnare = None
+
+    #Startar skrivaren och arbetarna och börjar lyssna. Returnerar porten, som väljs fritt om port=0.
+    def starta(self, värd="127.0.0.1", port=4000, backlog=1024):
+        #Med fork ärver arbetarna ordlistan och grannindexet utan att de kopieras eller picklas
+        fork = multiprocessing.get_context("fork")
+        ordlista = ordlager.hämta_ord(self.ord_fil)
+        grannar = likhet.hämta_grannar(self.ord_fil)  #Byggs om här, en gång, om indexet är inaktuellt
+        self._kö = fork.Queue()
+        if self.highscore_fil or self.partilogg:
+            self._skrivare = fork.Process(target=_skriv_highscore,
+                                          args=(self._kö, self.highscore_fil, self.partilogg))
+            self._skrivare.start()
+        for _ in range(self.antal_arbetare):
+            front, arbetarsida = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            process = fork.Process(target=_arbetare, args=(arbetarsida, self.ord_fil, self._kö, self.partilogg,
+                                                           self.paket, ordlista, grannar))
+            process.start()
+            arbetarsida.close()
+            self._kanaler.append(front)
+            self._processer.append(process)
+        self._lyssnare = socket.create_server((värd, port), backlog=backlog)
+        return self._lyssnare.getsockname()[1]
+
+    #Tar emot anslutningar tills lyssnaren stängs. Sessionens nummer avgör vilken arbetare som får den.
+    def betjäna(self):
+        kanaler = self._kanaler
+        while True:
+            try:
+                anslutning, _ = self._lyssnare.accept()
+            except OSError:
+                return
+            with anslutning:
+                session = self.sessioner
+                self.sessioner += 1
+                socket.send_fds(kanaler[session % len(kanaler)], [_SESSION.pack(session)], [anslutning.fileno()])
+
+    #Stänger lyssnaren, låter arbetarna avsluta sina sessioner och skrivaren spara alla resultat
+    def stäng(self):
+        if self._lyssnare is not None:
+            try:
+                self._lyssnare.shutdown(socket.SHUT_RDWR)  #Väcker betjäna() om den väntar i accept
+            except OSError:
+                pass
+            self._lyssnare.close()
+        for kanal in self._kanaler:
+            kanal.shutdown(socket.SHUT_RDWR)  #Senare arbetare har ärvt kanalen, så bara close räcker inte
+            kanal.close()
+        for process in self._processer:
+            process.join()
+        if self._kö is not None:
+            self._kö.put(None)
+        if self._skrivare is not None:
+            self._skrivare.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-server fördelad på flera processer.")
+    parser.add_argument("--värd", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--arbetare", type=int, default=None, help="Antal arbetarprocesser, en per kärna som standard")
+    parser.add_argument("--ord", default="memo.txt", help="Ordlistfilen")
+    parser.add_argument("--highscore", default="highscore.txt", help="Highscore-fil, tom sträng för att inte spara")
+    parser.add_argument("--partilogg", default="partier.memlog", help="Logg med vunna partier, tom sträng för att inte logga")
+    parser.add_argument("--paket", default=None, help="Pusselpaket för kommandot PUSSEL")
+    argument = parser.parse_args()
+    kluster = KlusterServer(argument.ord, argument.highscore, argument.arbetare, argument.partilogg, argument.paket)
+    port = kluster.starta(argument.värd, argument.port)
+    print(f"Memory-servern lyssnar på {argument.värd}:{port} med {kluster.antal_arbetare} arbetare")
+    try:
+        kluster.betjäna()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        kluster.stäng()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#Layout för spelbräden: ett rektangulärt bräde, eller flera bräden som spelas samtidigt och placeras
+#bredvid varandra i ett rutnät. Rutorna numreras bräde för bräde och inom ett bräde radvis som i motor.py,
+#så bräde b har rutorna start[b] till start[b + 1] - 1.
+#
+#Layouten sparar bara var varje bräde börjar, både som rutnummer och som plats i rutnätet. En rutas plats,
+#rutan på en plats (för att översätta klick) och rutornas namn (för att tolka drag) räknas fram ur brädets
+#start med bisect och divmod, så layouten har ingen tabell per ruta och kostar lika lite för alla storlekar.
+#Renderaren i terminal.py och CanvasBräda ritar från samma layout, så ingen variant räknar själv med koordinater.
+#
+#Storlekar skrivs som "6" (6x6), "4x3" eller "3*4x4" (tre bräden med 4x4).
+#Drag på en layout med flera bräden skrivs med brädets nummer först, t.ex. "2B3" eller "2:B3".
+import bisect
+import math
+import random
+import re
+from functools import lru_cache
+
+import drag
+from motor import FlerMotor, motor_för_frö
+
+#Största antal bräden i en layout
+MAX_BRÄDOR = 64
+
+#Största antal rader eller kolumner på ett bräde och största antal rutor i en layout. Motorn har en post
+#per ruta, så storleken kontrolleras innan något byggs.
+MAX_SIDA = 1000
+MAX_RUTOR = 1 << 20
+
+_STORLEK = re.compile(r"(?:(\d+)\*)?(\d+)(?:x(\d+))?")
+_BRÄDRUTA = re.compile(r"([1-9][0-9]*):?([A-Za-z]+[0-9]+)")
+
+
+#Layouten ändras aldrig efter att den har skapats, så samma layout kan delas av alla spel med samma storlek
+class Layout:
+
+    #brädor är en lista med (rader, kolumner). per_rad är antalet bräden bredvid varandra, som standard
+    #så att rutnätet blir ungefär kvadratiskt. mellanrum är antalet tomma rutor mellan brädena.
+    def __init__(self, brädor, per_rad=None, mellanrum=1):
+        if not 1 <= len(brädor) <= MAX_BRÄDOR:
+            raise ValueError(f"Layouten måste ha mellan 1 och {MAX_BRÄDOR} bräden")
+        for rader, kolumner in brädor:
+            if rader < 1 or kolumner < 1 or rader * kolumner % 2 != 0:
+                raise ValueError("Matrisstorleken måste vara jämn")
+        if sum(rader * kolumner for rader, kolumner in brädor) > MAX_RUTOR:
+            raise ValueError(f"Layouten får ha högst {MAX_RUTOR} rutor")
+        self.brädor = tuple((rader, kolumner) for rader, kolumner in brädor)
+        per_rad = per_rad or math.ceil(math.sqrt(len(brädor)))
+        #Brädornas nummer för varje rad i rutnätet
+        self.rutnät = tuple(tuple(range(i, min(i + per_rad, len(brädor)))) for i in range(0, len(brädor), per_rad))
+
+        #Övre vänstra hörnet för varje bräde, räknat i rutor, och var varje rad i rutnätet och varje
+        #bräde på raden börjar, för att hitta brädet på en plats med bisect
+        self.plats = [None] * len(brädor)
+        self._rad_y = []
+        self._kol_x = []
+        y = bredd = 0
+        for rad in self.rutnät:
+            x = 0
+            self._rad_y.append(y)
+            self._kol_x.append([])
+            for b in rad:
+                self.plats[b] = (y, x)
+                self._kol_x[-1].append(x)
+                x += self.brädor[b][1] + mellanrum
+            bredd = max(bredd, x - mellanrum)
+            y += max(self.brädor[b][0] for b in rad) + mellanrum
+        self.rader, self.kolumner = y - mellanrum, bredd
+        self.plats = tuple(self.plats)
+
+        start = [0]
+        for rader, kolumner in self.brädor:
+            start.append(start[-1] + rader * kolumner)
+        self.start = tuple(start)
+
+    #Ett enda bräde med rader x kolumner
+    @classmethod
+    def ett(cls, rader, kolumner):
+        return cls([(rader, kolumner)])
+
+    #antal lika stora bräden
+    @classmethod
+    def lika(cls, antal, rader, kolumner, per_rad=None):
+        return cls([(rader, kolumner)] * antal, per_rad)
+
+    def __len__(self):
+        return self.start[-1]
+
+    @property
+    def totala_par(self):
+        return len(self) // 2
+
+    #Antal olika ord som ordlistan måste ha. Varje bräde väljer sina ord för sig.
+    @property
+    def ord_som_krävs(self):
+        return max(rader * kolumner for rader, kolumner in self.brädor) // 2
+
+    #Storleken som text, t.ex. "4x3" eller "3*4x4"
+    def text(self):
+        storlekar = [f"{rader}x{kolumner}" for rader, kolumner in self.brädor]
+        if len(set(storlekar)) == 1:
+            return storlekar[0] if len(storlekar) == 1 else f"{len(storlekar)}*{storlekar[0]}"
+        return ", ".join(storlekar)
+
+    #Brädet som rutan ligger på och rutans index på brädet
+    def bräda(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError("rutan finns inte i layouten")
+        b = bisect.bisect_right(self.start, index) - 1
+        return b, index - self.start[b]
+
+    #Index för rutan på rad, kolumn på ett bräde. Kastar IndexError om rutan inte finns.
+    def index(self, bräda, rad, kol):
+        rader, kolumner = self.brädor[bräda]
+        if not (0 <= rad < rader and 0 <= kol < kolumner):
+            raise IndexError("rutan finns inte på brädet")
+        return self.start[bräda] + rad * kolumner + kol
+
+    #Rutans rad och kolumn i hela rutnätet
+    def position(self, index):
+        b, lokal = self.bräda(index)
+        rad, kol = divmod(lokal, self.brädor[b][1])
+        y0, x0 = self.plats[b]
+        return y0 + rad, x0 + kol
+
+    #Rutan på en plats i rutnätet, eller -1 om platsen är utanför brädena
+    def ruta_vid(self, rad, kol):
+        r = bisect.bisect_right(self._rad_y, rad) - 1
+        if r < 0 or kol < 0:
+            return -1
+        c = bisect.bisect_right(self._kol_x[r], kol) - 1
+        if c < 0:
+            return -1
+        b = self.rutnät[r][c]
+        y0, x0 = self.plats[b]
+        rader, kolumner = self.brädor[b]
+        if 0 <= rad - y0 < rader and 0 <= kol - x0 < kolumner:
+            return self.start[b] + (rad - y0) * kolumner + kol - x0
+        return -1
+
+    #Index för en ruta som "B3", eller "2B3" när layouten har flera bräden. None om rutan inte finns.
+    def tolka(self, val):
+        if len(self.brädor) == 1:
+            return drag.koordinater(*self.brädor[0]).tolka(val)
+        träff = _BRÄDRUTA.fullmatch(val)
+        if träff is None:
+            return None
+        b = int(träff.group(1)) - 1
+        if b >= len(self.brädor):
+            return None
+        index = drag.koordinater(*self.brädor[b]).tolka(träff.group(2))
+        return None if index is None else self.start[b] + index
+
+    #Tolkar alla drag på en rad, t.ex. "A1 F6" eller "1A1 1F6"
+    def tolka_drag(self, text):
+        return drag.tolka_drag(self.tolka, text)
+
+    def namn(self, index):
+        b, lokal = self.bräda(index)
+        namn = drag.koordinater(*self.brädor[b]).namn(lokal)
+        return namn if len(self.brädor) == 1 else f"{b + 1}{namn}"
+
+    #Skapar motorn för layouten. Ett bräde ger en vanlig MemoryMotor, flera en FlerMotor där första
+    #brädet har fröet och resten får frön som dras ur det, så att hela layouten kan återskapas.
+    #max_bredd begränsar orden till dem som får plats i en ruta (se motor.motor_för_frö).
+    def skapa_motor(self, ordlista, frö, logga=False, grannar=None, svårighet=None, max_bredd=None):
+        if len(self.brädor) == 1:
+            return motor_för_frö(ordlista, *self.brädor[0], frö, logga, grannar, svårighet, max_bredd)
+        rng = random.Random(f"bräden:{frö}")
+        fröer = [frö] + [rng.getrandbits(64) for _ in self.brädor[1:]]
+        return FlerMotor(motor_för_frö(ordlista, rader, kolumner, f, logga, grannar, svårighet, max_bredd)
+                         for (rader, kolumner), f in zip(self.brädor, fröer))
+
+
+#Tolkar en storlek som "6", "4x3" eller "3*4x4". Kastar ValueError med ett meddelande som kan visas för spelaren.
+#Antalet bräden, sidorna, rutorna och (med max_ord) orden som varje bräde kräver kontrolleras innan
+#layouten byggs, så att en orimlig storlek avvisas direkt istället för att bygga stora tabeller först.
+def tolka_layout(text, max_sida=MAX_SIDA, max_rutor=MAX_RUTOR, max_ord=None):
+    träff = _STORLEK.fullmatch(text.strip().lower().replace(" ", ""))
+    if träff is None:
+        raise ValueError("Storleken anges som 6, 4x3 eller 3*4x4 för tre bräden")
+    antal = int(träff.group(1) or 1)
+    rader = int(träff.group(2))
+    kolumner = int(träff.group(3) or rader)
+    if not 1 <= antal <= MAX_BRÄDOR:
+        raise ValueError(f"Layouten måste ha mellan 1 och {MAX_BRÄDOR} bräden")
+    if not (1 <= rader <= max_sida and 1 <= kolumner <= max_sida):
+        raise ValueError(f"Brädet måste ha mellan 1 och {max_sida} rader och kolumner")
+    if antal * rader * kolumner > max_rutor:
+        raise ValueError(f"Brädena får ha högst {max_rutor} rutor tillsammans")
+    if rader * kolumner % 2 != 0:
+        raise ValueError("Matrisstorleken måste vara jämn")
+    if max_ord is not None and rader * kolumner // 2 > max_ord:
+        raise ValueError(f"Matrisstorleken kräver fler ord än vad som finns ({max_ord} par)!")
+    return delad_layout(antal, rader, kolumner)
+
+#Delade layouter för en storlek, så att t.ex. servern inte bygger en layout för varje session
+@lru_cache(maxsize=64)
+def delad_layout(antal, rader, kolumner):
+    return Layout.lika(antal, rader, kolumner)
+
+#Motorerna för varje bräde i en motor, för att spara resultat och partier bräde för bräde
+def delmotorer(motor):
+    return motor.motorer if isinstance(motor, FlerMotor) else [motor]
+
+#Layouten för en befintlig motor, t.ex. ett spel som har lästs in från en sparpunkt (se sparpunkt.py)
+def layout_för(motor):
+    brädor = [(bräda.rader, bräda.kolumner) for bräda in delmotorer(motor)]
+    if len(set(brädor)) == 1:
+        return delad_layout(len(brädor), *brädor[0])
+    return Layout(brädor)
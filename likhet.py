@@ -0,0 +1,251 @@
+#Index över ord som lätt förväxlas, för att kunna välja ord till ett bräde efter svårighet.
+#
+#Två ord är grannar om de skiljer sig med en enda ändring: ett tecken bytt, borttaget, tillagt eller två
+#intilliggande tecken som har bytt plats ("öga"/"äga", "eda"/"ed", "tre"/"ter"). Grannarna hittas med
+#symmetrisk borttagning: varje ord läggs i en hink för sig självt och för varje variant med ett tecken
+#borttaget, och bara ord som delar en hink jämförs. Det ger ungefär O(n * ordlängd) istället för O(n²).
+#
+#Indexet sparas i CSR-form bredvid ordlistan (memo.txt -> memo.txt.lik) och minnesmappas:
+#   huvud:    magiskt värde (8 byte), antal ord (uint32), antal grannar (uint32), källfilens mtime_ns (uint64)
+#   början:   antal + 1 st uint32, grannarna till ord i står på plats början[i] till början[i + 1]
+#   grannar:  alla grannlistor efter varandra som uint32
+#Ordens nummer är desamma som i ordlagret (se ordbinar.py), så indexet byggs från den kompilerade listan.
+#
+#Bygg och visa statistik:  python likhet.py memo.txt --svårighet 1
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+from collections import defaultdict
+
+import ordlager
+
+MAGI = b"MEMLIK\x01\x00"
+_HUVUD = struct.Struct("<8sIIQ")
+
+#Namngivna svårigheter: andelen av brädets ord som ska ha en förväxlingsbar granne på brädet
+SVÅRIGHETER = {"lätt": 0.0, "medel": 0.5, "svår": 1.0}
+
+#Cache med index. Nyckeln är ordlistans absoluta sökväg och värdet är (mtime, index).
+_cache = {}
+
+
+#Sant om orden skiljer sig med högst en ändring (byte, borttagning, tillägg eller byte av två grannar)
+def nära(a, b):
+    if a == b:
+        return True
+    if len(a) == len(b):
+        skillnader = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+        if len(skillnader) == 1:
+            return True
+        if len(skillnader) == 2:
+            i, j = skillnader
+            return j == i + 1 and a[i] == b[j] and a[j] == b[i]
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) != 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+#Grannarna till varje ord i ordlistan, som (början, grannar) i CSR-form
+def bygg_grannar(ordlista):
+    hinkar = defaultdict(list)
+    for i, ord_ in enumerate(ordlista):
+        nyckel = ord_.casefold()
+        hinkar[nyckel].append(i)
+        for j in range(len(nyckel)):
+            borttagen = nyckel[:j] + nyckel[j + 1:]
+            if borttagen != nyckel:
+                hinkar[borttagen].append(i)
+
+    listor = [set() for _ in range(len(ordlista))]
+    for medlemmar in hinkar.values():
+        if len(medlemmar) < 2:
+            continue
+        for x in range(len(medlemmar)):
+            a = medlemmar[x]
+            ord_a = ordlista[a].casefold()
+            for b in medlemmar[x + 1:]:
+                if b != a and b not in listor[a] and nära(ord_a, ordlista[b].casefold()):
+                    listor[a].add(b)
+                    listor[b].add(a)
+
+    början = array('I', [0])
+    grannar = array('I')
+    for lista in listor:
+        grannar.extend(sorted(lista))
+        början.append(len(grannar))
+    return början, grannar
+
+
+#Grannindex för en ordlista. Beter sig som en lista där element i är grannarna till ord i.
+class Grannar:
+
+    def __init__(self, början, grannar, källtid=0, mm=None):
+        self._början = början
+        self._grannar = grannar
+        self.källtid = källtid
+        self._mm = mm
+
+    #Läser ett sparat index. Tabellerna läses direkt ur den minnesmappade filen utan att kopieras.
+    @classmethod
+    def öppna(cls, fil):
+        with open(fil, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magi, antal, antal_grannar, källtid = _HUVUD.unpack_from(mm, 0)
+        if magi != MAGI:
+            mm.close()
+            raise ValueError(f"Filen '{fil}' är inte ett grannindex.")
+        start = _HUVUD.size
+        slut = start + (antal + 1) * 4
+        if sys.byteorder == "big":
+            början = array('I', mm[start:slut])
+            grannar = array('I', mm[slut:slut + antal_grannar * 4])
+            början.byteswap()
+            grannar.byteswap()
+        else:
+            vy = memoryview(mm)
+            början = vy[start:slut].cast('I')
+            grannar = vy[slut:slut + antal_grannar * 4].cast('I')
+        return cls(början, grannar, källtid, mm)
+
+    def spara(self, fil):
+        början = array('I', self._början)
+        grannar = array('I', self._grannar)
+        if sys.byteorder == "big":
+            början.byteswap()
+            grannar.byteswap()
+        temp = f"{fil}.{os.getpid()}.tmp"
+        try:
+            with open(temp, 'wb') as f:
+                f.write(_HUVUD.pack(MAGI, len(början) - 1, len(grannar), self.källtid))
+                f.write(början.tobytes())
+                f.write(grannar.tobytes())
+            os.replace(temp, fil)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def __len__(self):
+        return len(self._början) - 1
+
+    def __getitem__(self, i):
+        return self._grannar[self._början[i]:self._början[i + 1]]
+
+    #Antal grannar till ord i
+    def grad(self, i):
+        return self._början[i + 1] - self._början[i]
+
+
+#Grannindexet för en ordlistfil. Indexet sparas bredvid filen och byggs om när filen har ändrats.
+#Om indexet inte kan sparas (t.ex. skrivskyddad katalog) byggs det i minnet istället.
+def hämta_grannar(fil="memo.txt"):
+    sökväg = os.path.abspath(fil)
+    mtime = os.stat(sökväg).st_mtime_ns
+    post = _cache.get(sökväg)
+    if post is not None and post[0] == mtime:
+        return post[1]
+
+    indexfil = sökväg + ".lik"
+    grannar = None
+    try:
+        grannar = Grannar.öppna(indexfil)
+        if grannar.källtid != mtime:
+            grannar = None
+    except (OSError, ValueError):
+        pass
+    if grannar is None:
+        grannar = Grannar(*bygg_grannar(ordlager.hämta_ord(sökväg)), källtid=mtime)
+        try:
+            grannar.spara(indexfil)
+        except OSError:
+            pass
+    _cache[sökväg] = (mtime, grannar)
+    return grannar
+
+def töm_cache():
+    _cache.clear()
+
+
+#Väljer par olika ord så att ungefär andelen svårighet (0-1) av dem har en granne bland de andra valda orden.
+#De förväxlingsbara orden växer fram som kluster runt slumpvisa ord med grannar, och resten väljs så att
+#de inte har någon granne på brädet. Kostar O(par * antal grannar) och beror inte på ordlistans storlek.
+#Om ordlistan inte räcker till för svårigheten fylls brädet på med vanliga slumpvisa ord.
+def välj_ord(grannar, par, rng=random, svårighet=0.5):
+    antal = len(grannar)
+    if par > antal:
+        raise ValueError(f"Brädet kräver {par} ord men ordlistan har bara {antal}.")
+    mål = min(par, round(svårighet * par))
+    valda = []
+    tagna = set()
+    tålamod = 100 * par + 100  #Antal slumpvisa ord som får förkastas innan kraven släpps
+
+    def lägg_till(i):
+        valda.append(i)
+        tagna.add(i)
+
+    while len(valda) < mål and tålamod > 0:
+        kvar = mål - len(valda)
+        if kvar == 1 and valda:
+            #Ett ensamt nytt ord skulle inte ha någon granne, så ta en granne till ett redan valt ord
+            fria = [g for v in valda for g in grannar[v] if g not in tagna]
+            if fria:
+                lägg_till(rng.choice(fria))
+                break
+        i = rng.randrange(antal)
+        if i in tagna or grannar.grad(i) == 0:
+            tålamod -= 1
+            continue
+        kö = [i]
+        while kö and len(valda) < mål:
+            j = kö.pop(rng.randrange(len(kö)))
+            if j in tagna:
+                continue
+            lägg_till(j)
+            kö.extend(g for g in grannar[j] if g not in tagna)
+
+    while len(valda) < par:
+        i = rng.randrange(antal)
+        if i in tagna:
+            continue
+        if tålamod > 0 and any(g in tagna for g in grannar[i]):
+            tålamod -= 1
+            continue
+        lägg_till(i)
+    return valda
+
+#Andelen av de valda orden som har en granne bland de andra valda orden
+def förväxlingsgrad(grannar, valda):
+    if not valda:
+        return 0.0
+    tagna = set(valda)
+    return sum(1 for i in valda if any(g in tagna for g in grannar[i])) / len(valda)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bygg grannindexet för en ordlista och visa statistik.")
+    parser.add_argument("ordlista", help="ordlistfilen, t.ex. memo.txt")
+    parser.add_argument("--par", type=int, default=18, help="antal par i exempelbrädet")
+    parser.add_argument("--svårighet", type=float, default=None, help="välj ett exempelbräde med svårigheten 0-1")
+    args = parser.parse_args(argv)
+
+    grannar = hämta_grannar(args.ordlista)
+    ordlista = ordlager.hämta_ord(args.ordlista)
+    grader = [grannar.grad(i) for i in range(len(grannar))]
+    med_grannar = sum(1 for g in grader if g)
+    print(f"{len(grannar)} ord, {med_grannar} har minst en granne, högst {max(grader, default=0)} grannar")
+    if args.svårighet is not None:
+        valda = välj_ord(grannar, args.par, random.Random(), args.svårighet)
+        print(f"Förväxlingsgrad {förväxlingsgrad(grannar, valda):.2f}: {' '.join(ordlista[i] for i in valda)}")
+
+
+if __name__ == "__main__":
+    main()
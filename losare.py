@@ -0,0 +1,98 @@
+#Förväntat antal försök med perfekt minne för en brädstorlek, utan att simulera några spel.
+#
+#Ett läge beskrivs av (u, k): u rutor har aldrig vänts och k av de vända rutorna väntar på sin
+#partner bland de u osedda. Par där båda rutorna har setts matchas direkt och syns inte i läget.
+#Varje försök börjar med en osedd ruta a:
+#  - med sannolikheten k/u hör a ihop med en känd ruta, som vänds direkt: ett försök, (u-1, k-1)
+#  - annars vänds antingen en osedd ruta b till, som kan vara partnern till a (ett försök, (u-2, k)),
+#    partnern till en känd ruta (två försök, den andra matchas i nästa försök, (u-2, k)) eller ny
+#    (ett försök, (u-2, k+2)), eller en känd ruta, vilket alltid är en miss (ett försök, (u-1, k+1)).
+#    Det av de två valen som ger minst förväntat antal försök väljs.
+#Svaret för ett bräde med p par är E(2p, 0). Tabellen är densamma för alla storlekar och byggs ut
+#när en större storlek efterfrågas, så 6x6 efter 10x10 kostar ingenting.
+#
+#För bräden med fler än EXAKT_GRÄNS par används den asymptotiska formeln
+#(3 - 2 ln 2) p + 7/8 - 2 ln 2. Skillnaden mot det exakta värdet är ungefär 0,04/p, dvs. under 1e-4 där.
+#
+#Exempel:  python losare.py 4x4 6x6 10x10
+import argparse
+import json
+import math
+from functools import lru_cache
+
+from highscore import rutor
+
+#Största antal par som räknas ut exakt. Tabellen har då ungefär EXAKT_GRÄNS² lägen.
+EXAKT_GRÄNS = 400
+
+_TABELL = [[0.0]]  #_TABELL[u][k] = förväntat antal försök kvar, bara k med samma paritet som u används
+
+
+#Bygger ut tabellen till och med u = osedda
+def _fyll_till(osedda):
+    tabell = _TABELL
+    for u in range(len(tabell), osedda + 1):
+        rad = [0.0] * (u + 1)
+        förra = tabell[u - 1]
+        förrförra = tabell[u - 2] if u >= 2 else None
+        for k in range(u % 2, u + 1, 2):
+            värde = 0.0
+            if k:
+                värde += k / u * (1 + förra[k - 1])
+            nya = u - k
+            if nya:  #a är ny, så partnern finns bland de u-1 andra osedda rutorna
+                efter = förrförra[k]
+                osedd = (1 + efter) / (u - 1) + k * (2 + efter) / (u - 1)
+                if u - 2 - k > 0:
+                    osedd += (u - 2 - k) * (1 + förrförra[k + 2]) / (u - 1)
+                if k:
+                    osedd = min(osedd, 1 + förra[k + 1])
+                värde += nya / u * osedd
+            rad[k] = värde
+        tabell.append(rad)
+
+#Asymptotiskt förväntat antal försök för p par
+def uppskattning(par):
+    return (3 - 2 * math.log(2)) * par + 7 / 8 - 2 * math.log(2)
+
+#Förväntat antal försök med perfekt minne och bästa spel för ett bräde med rader x kolumner
+@lru_cache(maxsize=256)
+def förväntade_försök(rader, kolumner):
+    if rader < 1 or kolumner < 1 or rader * kolumner % 2 != 0:
+        raise ValueError("Matrisstorleken måste vara jämn")
+    par = rader * kolumner // 2
+    if par > EXAKT_GRÄNS:
+        return uppskattning(par)
+    _fyll_till(2 * par)
+    return _TABELL[2 * par][0]
+
+#Förväntat antal försök för en storlek som "6x6", för topplistorna. Bara antalet rutor spelar roll.
+def optimum(storlek):
+    return förväntade_försök(rutor(storlek), 1) if rutor(storlek) % 2 == 0 else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Förväntat antal försök i Memory med perfekt minne.")
+    parser.add_argument("storlekar", nargs="+", help="brädstorlekar, t.ex. 4x4 6x6 3x4")
+    parser.add_argument("--json", action="store_true", help="skriv resultatet som JSON")
+    args = parser.parse_args(argv)
+
+    resultat = {}
+    for storlek in args.storlekar:
+        if "x" not in storlek:
+            storlek = f"{storlek}x{storlek}"
+        resultat[storlek] = optimum(storlek)
+
+    if args.json:
+        print(json.dumps(resultat, indent=2))
+        return
+    print(f"{'Storlek':>8} {'Par':>6} {'Förväntat':>10}")
+    for storlek, värde in resultat.items():
+        if värde is None:
+            print(f"{storlek:>8}  udda antal rutor")
+        else:
+            print(f"{storlek:>8} {rutor(storlek) // 2:6} {värde:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
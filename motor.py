@@ -0,0 +1,317 @@
+#Spelmotor för Memory utan något gränssnitt. Text-, Tk- och nätverksversionerna driver alla samma motor
+#genom att anropa flip(index) och reagera på händelsen som returneras.
+#
+#Rutorna numreras radvis från 0, dvs. index = rad * kolumner + kolumn.
+#
+#Bräden med fler än LAT_GRÄNS rutor byggs lat: placeringen räknas ut för varje ruta när den behövs med en
+#permutation som bara beror på fröet (FeistelKort), och orden hålls som index i den delade ordlistan
+#(OrdUrval). Ett bräde med en miljon rutor tar då några MB istället för hundratals.
+import bisect
+import random
+from array import array
+from collections.abc import Sequence
+
+import likhet
+import ordlager
+
+#Händelser som flip returnerar
+OGILTIG = 0  #Rutan finns inte eller är redan synlig. Inget har ändrats.
+FÖRSTA = 1   #Första rutan i ett försök vändes
+PAR = 2      #Andra rutan matchade den första
+MISS = 3     #Andra rutan matchade inte. Båda visas tills dölj() anropas eller nästa ruta vänds.
+VUNNET = 4   #Sista paret hittades och spelet är slut
+
+#Största antalet rutor för ett bräde där placeringen blandas fram och lagras som en tabell
+LAT_GRÄNS = 1 << 18
+
+_MASK64 = (1 << 64) - 1
+
+
+class MemoryMotor:
+    __slots__ = ("rader", "kolumner", "ord", "kort", "synlig", "försök", "hittade_par",
+                 "totala_par", "dolda", "första_val", "väntande_a", "väntande_b", "frö", "logg")
+
+    #Skapar ett nytt bräde. ordlista innehåller ett ord per par. Om kort ges används den
+    #placeringen (ett par-id per ruta) istället för att blanda fram en ny. Med frö blandas korten
+    #med kort_för_frö, så att samma frö alltid ger samma placering och partiet kan spelas upp igen.
+    #Med logga=True sparas varje vänd ruta i self.logg (se repris.py).
+    def __init__(self, ordlista, rader, kolumner, rng=random, kort=None, frö=None, logga=False):
+        antal = rader * kolumner
+        if rader < 1 or kolumner < 1 or antal % 2 != 0:
+            raise ValueError("Matrisstorleken måste vara jämn")
+        par = antal // 2
+        if len(ordlista) < par:
+            raise ValueError(f"Brädet kräver {par} ord men bara {len(ordlista)} gavs.")
+
+        self.rader = rader
+        self.kolumner = kolumner
+        urval = ordlista[:par]
+        self.ord = urval if isinstance(urval, (range, OrdUrval)) else list(urval)
+        if kort is None and frö is None:
+            kort = FeistelKort(par, rng.getrandbits(64)) if antal > LAT_GRÄNS else _nya_kort(par, rng)
+        elif kort is None:
+            kort = kort_för_frö(par, frö)
+        elif len(kort) != antal:
+            raise ValueError("Placeringen måste ha en post per ruta.")
+        self.kort = kort  #Par-id för varje ruta
+        self.synlig = bytearray((antal + 7) >> 3)  #En bit per ruta
+        self.försök = 0
+        self.hittade_par = 0
+        self.totala_par = par
+        self.dolda = antal  #Antal rutor som inte visas just nu
+        self.första_val = -1
+        self.väntande_a = -1  #Felmatchat par som ska döljas
+        self.väntande_b = -1
+        self.frö = frö
+        self.logg = bytearray() if logga else None  #Vända rutor som varint, i den ordning de vändes
+
+    #Vänder rutan med det givna indexet och returnerar vad som hände.
+    def flip(self, index):
+        if self.väntande_a >= 0:
+            self.dölj()
+        if not 0 <= index < len(self.kort):
+            return OGILTIG
+        byte = index >> 3
+        bit = 1 << (index & 7)
+        synlig = self.synlig
+        if synlig[byte] & bit:
+            return OGILTIG
+        synlig[byte] |= bit
+        self.dolda -= 1
+        if self.logg is not None:
+            lägg_till_varint(self.logg, index)
+
+        första = self.första_val
+        if första < 0:
+            self.första_val = index
+            return FÖRSTA
+        self.första_val = -1
+        self.försök += 1
+        if self.kort[första] == self.kort[index]:
+            self.hittade_par += 1
+            return VUNNET if self.hittade_par == self.totala_par else PAR
+        self.väntande_a = första
+        self.väntande_b = index
+        return MISS
+
+    #Döljer det senast felmatchade paret. Returnerar de dolda rutorna, eller None om inget väntade.
+    def dölj(self):
+        a, b = self.väntande_a, self.väntande_b
+        if a < 0:
+            return None
+        self.synlig[a >> 3] &= ~(1 << (a & 7))
+        self.synlig[b >> 3] &= ~(1 << (b & 7))
+        self.dolda += 2
+        self.väntande_a = self.väntande_b = -1
+        return a, b
+
+    def är_synlig(self, index):
+        return bool(self.synlig[index >> 3] & (1 << (index & 7)))
+
+    def ord_vid(self, index):
+        return self.ord[self.kort[index]]
+
+    def är_vunnet(self):
+        return self.hittade_par == self.totala_par
+
+    def index(self, rad, kol):
+        return rad * self.kolumner + kol
+
+    def position(self, index):
+        return divmod(index, self.kolumner)
+
+    def __len__(self):
+        return len(self.kort)
+
+
+#Flera bräden som spelas samtidigt, med samma gränssnitt som MemoryMotor. Rutorna numreras bräde för
+#bräde (se layout.py). Båda rutorna i ett försök måste ligga på samma bräde, och försöken och paren
+#räknas ihop för alla bräden. Varje bräde har en egen motor med eget frö och egen logg.
+class FlerMotor:
+
+    def __init__(self, motorer):
+        self.motorer = list(motorer)
+        self.start = [0]  #Första rutan på varje bräde
+        for motor in self.motorer:
+            self.start.append(self.start[-1] + len(motor))
+        self.totala_par = sum(motor.totala_par for motor in self.motorer)
+        self.aktiv = -1  #Brädet där försökets första ruta vändes
+        self.väntande_a = -1  #Felmatchat par som ska döljas, som index i hela layouten
+        self.väntande_b = -1
+
+    @property
+    def försök(self):
+        return sum(motor.försök for motor in self.motorer)
+
+    @property
+    def hittade_par(self):
+        return sum(motor.hittade_par for motor in self.motorer)
+
+    def flip(self, index):
+        if self.väntande_a >= 0:
+            self.dölj()
+        if not 0 <= index < len(self):
+            return OGILTIG
+        b = self._bräda(index)
+        if self.aktiv >= 0 and b != self.aktiv:
+            return OGILTIG
+        motor = self.motorer[b]
+        händelse = motor.flip(index - self.start[b])
+        if händelse == FÖRSTA:
+            self.aktiv = b
+        elif händelse != OGILTIG:
+            self.aktiv = -1
+        if händelse == MISS:
+            self.väntande_a = motor.väntande_a + self.start[b]
+            self.väntande_b = motor.väntande_b + self.start[b]
+        elif händelse == VUNNET and not self.är_vunnet():
+            return PAR  #Brädet är klart men inte spelet
+        return händelse
+
+    def dölj(self):
+        if self.väntande_a < 0:
+            return None
+        b = self._bräda(self.väntande_a)
+        a, c = self.motorer[b].dölj()
+        self.väntande_a = self.väntande_b = -1
+        return a + self.start[b], c + self.start[b]
+
+    #Brädet som rutan ligger på, hittas med bisect över brädornas start så att ingen tabell per ruta behövs
+    def _bräda(self, index):
+        return bisect.bisect_right(self.start, index) - 1
+
+    def är_synlig(self, index):
+        b = self._bräda(index)
+        return self.motorer[b].är_synlig(index - self.start[b])
+
+    def ord_vid(self, index):
+        b = self._bräda(index)
+        return self.motorer[b].ord_vid(index - self.start[b])
+
+    def är_vunnet(self):
+        return all(motor.är_vunnet() for motor in self.motorer)
+
+    @property
+    def ord(self):
+        return [ord_ for motor in self.motorer for ord_ in motor.ord]
+
+    def __len__(self):
+        return self.start[-1]
+
+
+def _nya_kort(par, rng):
+    kort = array('H' if par <= 0xFFFF else 'I', range(par)) * 2
+    rng.shuffle(kort)
+    return kort
+
+#Placeringen av paren för ett frö. Beror bara på fröet och antalet par, inte på ordlistan.
+def blanda_kort(par, frö):
+    return _nya_kort(par, random.Random(frö))
+
+#Placeringen som motorn använder för ett frö: blanda_kort, eller FeistelKort för bräden över LAT_GRÄNS.
+#Allt som sparar eller spelar upp placeringar (pusselpaket.py, repris.py) måste gå via den här regeln.
+def kort_för_frö(par, frö):
+    return FeistelKort(par, frö) if 2 * par > LAT_GRÄNS else blanda_kort(par, frö)
+
+
+#Lat placering för stora bräden. Rutorna permuteras med ett Feistel-nätverk över det minsta antal
+#bitar som räcker, och värden utanför brädet permuteras igen tills de hamnar på brädet (cycle walking).
+#Ruta i får paret permutation(i) // 2, så varje par hamnar på exakt två rutor. Tar O(1) minne.
+class FeistelKort(Sequence):
+    __slots__ = ("_antal", "_halv", "_mask", "_nycklar")
+
+    def __init__(self, par, frö, varv=4):
+        self._antal = 2 * par
+        bitar = max(2, (self._antal - 1).bit_length())
+        self._halv = (bitar + 1) // 2
+        self._mask = (1 << self._halv) - 1
+        rng = random.Random(f"kort:{frö}")
+        self._nycklar = tuple(rng.getrandbits(64) for _ in range(varv))
+
+    def _permutera(self, x):
+        halv, mask = self._halv, self._mask
+        vänster, höger = x >> halv, x & mask
+        for nyckel in self._nycklar:
+            blandat = (höger ^ nyckel) * 0x9E3779B97F4A7C15 & _MASK64
+            blandat ^= blandat >> 29
+            vänster, höger = höger, vänster ^ (blandat & mask)
+        return vänster << halv | höger
+
+    def __len__(self):
+        return self._antal
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._antal
+        if not 0 <= index < self._antal:
+            raise IndexError("rutan finns inte på brädet")
+        x = self._permutera(index)
+        while x >= self._antal:
+            x = self._permutera(x)
+        return x >> 1
+
+
+#Orden för ett stort bräde som index i en delad ordlista, så att bara de ord som visas plockas fram
+class OrdUrval(Sequence):
+    __slots__ = ("ordlista", "ord_id")
+
+    def __init__(self, ordlista, ord_id):
+        self.ordlista = ordlista
+        self.ord_id = ord_id
+
+    def __len__(self):
+        return len(self.ord_id)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return OrdUrval(self.ordlista, self.ord_id[i])
+        return self.ordlista[self.ord_id[i]]
+
+#Lägger till ett heltal som varint (7 bitar per byte, lägsta först) sist i buffert
+def lägg_till_varint(buffert, tal):
+    while tal >= 0x80:
+        buffert.append(tal & 0x7F | 0x80)
+        tal >>= 7
+    buffert.append(tal)
+
+
+#Index för de ord som ett frö väljer ur en ordlista med antal_ord ord. Orden dras med en egen
+#slumpgenerator så att valet av ord inte hänger ihop med placeringen från blanda_kort.
+#Med grannar (se likhet.py) och svårighet 0-1 väljs orden så att ungefär den andelen av dem
+#kan förväxlas med ett annat ord på brädet.
+def välj_ord_index(antal_ord, par, frö, grannar=None, svårighet=None):
+    rng = random.Random(f"ord:{frö}")
+    if svårighet is None:
+        return rng.sample(range(antal_ord), par)
+    return likhet.välj_ord(grannar, par, rng, svårighet)
+
+#Skapar en motor ur en ordlista. Samma frö, ordlista och svårighet ger alltid samma ord på samma platser.
+#Med max_bredd väljs bara ord som är högst så många teckenpositioner breda, med hinkarna i en kompilerad
+#ordlista (se ordbinar.py). Får alla ord plats blir valet detsamma som utan max_bredd. Med svårighet
+#väljs orden ur hela listan, eftersom grannindexet gäller hela listan.
+def motor_för_frö(ordlista, rader, kolumner, frö, logga=False, grannar=None, svårighet=None, max_bredd=None):
+    par = rader * kolumner // 2
+    if par > len(ordlista):
+        raise ValueError(f"Brädet kräver {par} ord men ordlistan har bara {len(ordlista)}.")
+    if max_bredd is not None and svårighet is None and hasattr(ordlista, "högst") \
+            and ordlista.antal_högst(max_bredd) < len(ordlista):
+        tillåtna = ordlista.högst(max_bredd)
+        if par > len(tillåtna):
+            raise ValueError(f"Brädet kräver {par} ord men ordlistan har bara {len(tillåtna)} "
+                             f"som är högst {max_bredd} tecken breda.")
+        ord_id = [tillåtna[i] for i in välj_ord_index(len(tillåtna), par, frö)]
+    else:
+        ord_id = välj_ord_index(len(ordlista), par, frö, grannar, svårighet)
+    if 2 * par > LAT_GRÄNS:
+        valda_ord = OrdUrval(ordlista, array('I', ord_id))
+    else:
+        valda_ord = [ordlista[i] for i in ord_id]
+    return MemoryMotor(valda_ord, rader, kolumner, frö=frö, logga=logga)
+
+#Skapar en motor med ord ur ordlistfilen. Utan frö dras ett nytt frö ur rng.
+#svårighet väljer orden med grannindexet för filen, som byggs första gången det behövs.
+def ny_motor(rader, kolumner, fil="memo.txt", rng=random, frö=None, logga=False, svårighet=None):
+    if frö is None:
+        frö = rng.getrandbits(64)
+    grannar = likhet.hämta_grannar(fil) if svårighet is not None else None
+    return motor_för_frö(ordlager.hämta_ord(fil), rader, kolumner, frö, logga, grannar, svårighet)
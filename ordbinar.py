@@ -0,0 +1,225 @@
+#Förkompilerat binärt format för ordlistor.
+#
+#Filen består av ett huvud, en offsettabell, en UTF-8-blob och orden grupperade efter bredd:
+#   huvud:   magiskt värde (8 byte), antal ord (uint32), största visningsbredd B (uint32), källfilens mtime_ns (uint64)
+#   offsets: antal + 1 st uint32, ord nummer i ligger i blob[offsets[i]:offsets[i + 1]]
+#   blob:    alla ord efter varandra, kodade i UTF-8
+#   hinkar:  B + 2 st uint32, orden med bredden b står på plats hinkar[b] till hinkar[b + 1] i index
+#   index:   antal st uint32, ordens nummer sorterade efter visningsbredd
+#
+#Textfilen läses rad för rad och rensas innan den skrivs: Unicode normaliseras till NFC (så att "å" skrivet
+#som "a" + ring blir samma ord som "å"), radslut med CRLF, BOM, tomma rader och dubbletter tas bort.
+#Antalet ord i huvudet är därför antalet olika ord som ett bräde kan använda.
+#
+#Filen minnesmappas vid läsning, så att läsa ett ord med dess nummer kostar O(1) oavsett hur stor listan är.
+#Samma format används för ordtabellen i pusselpaket (se pusselpaket.py), då med start efter paketets brädor.
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from itertools import accumulate
+
+MAGI = b"MEMORD\x02\x00"
+MAGI_V1 = b"MEMORD\x01\x00"  #Utan hinkar. Finns kvar i äldre pusselpaket och kan fortfarande läsas.
+_HUVUD = struct.Struct("<8sIIQ")
+_OFFSET = struct.Struct("<I")
+_OFFSETPAR = struct.Struct("<II")
+
+#Antal teckenpositioner som ett ord tar i en terminal. Kombinerande tecken tar ingen plats och breda
+#tecken (t.ex. kinesiska) tar två.
+def visningsbredd(text):
+    if text.isascii():
+        return len(text)
+    bredd = 0
+    for tecken in text:
+        if unicodedata.combining(tecken) or unicodedata.category(tecken) == "Cf":
+            continue
+        bredd += 2 if unicodedata.east_asian_width(tecken) in "WF" else 1
+    return bredd
+
+#Läser ord ur en textfil rad för rad och normaliserar dem till NFC. Tar bort mellanslag, tomma rader,
+#dubbletter och rader som inte är giltig UTF-8. Om statistik ges (t.ex. en Counter) räknas "rader", "ord",
+#"tomma", "dubbletter", "ogiltiga", "normaliserade" och "crlf" upp i den.
+def läs_textfil(källa, statistik=None):
+    if statistik is None:
+        statistik = Counter()
+    sedda = set()
+    with open(källa, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+        for rad in f:
+            statistik["rader"] += 1
+            if rad.endswith("\r\n"):
+                statistik["crlf"] += 1
+            ord_ = rad.strip()
+            if not ord_:
+                statistik["tomma"] += 1
+                continue
+            if "\ufffd" in ord_:
+                statistik["ogiltiga"] += 1
+                continue
+            if not ord_.isascii():
+                normaliserat = unicodedata.normalize("NFC", ord_)
+                if normaliserat != ord_:
+                    statistik["normaliserade"] += 1
+                    ord_ = normaliserat
+            if ord_ in sedda:
+                statistik["dubbletter"] += 1
+                continue
+            sedda.add(ord_)
+            statistik["ord"] += 1
+            yield ord_
+
+#Läser igenom en textfil och returnerar statistiken från läs_textfil, utan att kompilera något
+def rapport(källa):
+    statistik = Counter()
+    for _ in läs_textfil(källa, statistik):
+        pass
+    return statistik
+
+#Hinkarna för en lista med bredder: var varje bredd börjar, och ordens nummer sorterade efter bredd
+def _hinkar(bredder):
+    största = max(bredder, default=0)
+    antal = [0] * (största + 2)
+    for bredd in bredder:
+        antal[bredd + 1] += 1
+    return array('I', accumulate(antal)), array('I', sorted(range(len(bredder)), key=bredder.__getitem__))
+
+#Skriver orden i binärformatet till en öppen fil, från filens nuvarande position
+def skriv(f, ordlista, mtime=0):
+    offsets = array('I', [0])
+    delar = []
+    bredder = []
+    for ord_ in ordlista:
+        data = ord_.encode('utf-8')
+        delar.append(data)
+        offsets.append(offsets[-1] + len(data))
+        bredder.append(visningsbredd(ord_))
+    början, index = _hinkar(bredder)
+    f.write(_HUVUD.pack(MAGI, len(delar), len(början) - 2, mtime))
+    if sys.byteorder == "big":
+        for tabell in (offsets, början, index):
+            tabell.byteswap()
+    f.write(offsets.tobytes())
+    f.writelines(delar)
+    f.write(början.tobytes())
+    f.write(index.tobytes())
+
+#Kompilerar en ordlista i textformat till binärformatet. Skriver först till en temporär fil
+#och byter sedan namn, så att en läsare aldrig ser en halvskriven fil. Returnerar målets sökväg.
+#statistik fylls i som för läs_textfil.
+def kompilera(källa, mål=None, statistik=None):
+    if mål is None:
+        mål = källa + ".bin"
+    mtime = os.stat(källa).st_mtime_ns
+
+    temp = f"{mål}.{os.getpid()}.tmp"
+    try:
+        with open(temp, 'wb') as f:
+            skriv(f, läs_textfil(källa, statistik), mtime)
+        os.replace(temp, mål)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return mål
+
+#Läser källfilens mtime ur huvudet på en kompilerad fil, eller None om filen saknas eller är ogiltig.
+def läs_källtid(fil):
+    try:
+        with open(fil, 'rb') as f:
+            huvud = f.read(_HUVUD.size)
+    except FileNotFoundError:
+        return None
+    if len(huvud) < _HUVUD.size:
+        return None
+    magi, _, _, mtime = _HUVUD.unpack(huvud)
+    return mtime if magi == MAGI else None
+
+
+#Minnesmappad ordlista. Beter sig som en skrivskyddad lista med ord.
+#start är positionen i filen där ordlistan börjar, eller en redan öppnad mmap kan ges istället för en fil.
+class BinärOrdlista(Sequence):
+
+    def __init__(self, fil, start=0):
+        if isinstance(fil, mmap.mmap):
+            self._mm = fil
+        else:
+            with open(fil, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magi, antal, största_bredd, self.källtid = _HUVUD.unpack_from(self._mm, start)
+        if magi not in (MAGI, MAGI_V1):
+            if self._mm is not fil:
+                self._mm.close()
+            raise ValueError(f"Filen '{fil}' är inte en kompilerad ordlista.")
+        self._antal = antal
+        self._offsets = start + _HUVUD.size
+        self._blob = start + _HUVUD.size + (antal + 1) * _OFFSET.size
+        self._index = None  #Ordens nummer sorterade efter bredd, i minnet för filer utan hinkar
+        if magi == MAGI_V1:
+            self._början, self._index = _hinkar([visningsbredd(ord_) for ord_ in self])
+        else:
+            (blobstorlek,) = _OFFSET.unpack_from(self._mm, self._blob - _OFFSET.size)
+            hinkar = self._blob + blobstorlek
+            self._början = array('I', self._mm[hinkar:hinkar + (största_bredd + 2) * _OFFSET.size])
+            if sys.byteorder == "big":
+                self._början.byteswap()
+            self._indexstart = hinkar + len(self._början) * _OFFSET.size
+        self.största_bredd = len(self._början) - 2
+
+    def __len__(self):
+        return self._antal
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._antal))]
+        if i < 0:
+            i += self._antal
+        if not 0 <= i < self._antal:
+            raise IndexError("ordindex utanför listan")
+        start, slut = _OFFSETPAR.unpack_from(self._mm, self._offsets + i * _OFFSET.size)
+        return self._mm[self._blob + start:self._blob + slut].decode('utf-8')
+
+    #Ordens nummer på platserna från och med a till b i bredd-indexet
+    def _index_del(self, a, b):
+        if self._index is not None:
+            return self._index[a:b]
+        del_ = array('I', self._mm[self._indexstart + a * _OFFSET.size:self._indexstart + b * _OFFSET.size])
+        if sys.byteorder == "big":
+            del_.byteswap()
+        return del_
+
+    #Nummer på alla ord med exakt den givna visningsbredden
+    def hink(self, bredd):
+        if not 0 <= bredd <= self.största_bredd:
+            return array('I')
+        return self._index_del(self._början[bredd], self._början[bredd + 1])
+
+    #Antal ord som är högst bredd tecken breda. Kostar O(1).
+    def antal_högst(self, bredd):
+        return self._början[max(0, min(bredd, self.största_bredd) + 1)]
+
+    #Nummer på alla ord som är högst bredd tecken breda, smalast först
+    def högst(self, bredd):
+        return self._index_del(0, self.antal_högst(bredd))
+
+    def stäng(self):
+        self._mm.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Användning: python ordbinar.py ordlista.txt [mål.bin]")
+        sys.exit(1)
+    statistik = Counter()
+    mål = kompilera(*sys.argv[1:], statistik=statistik)
+    ordlista = BinärOrdlista(mål)
+    print(f"Skrev {len(ordlista)} ord till {mål}")
+    print(f"{statistik['rader']} rader: {statistik['tomma']} tomma, {statistik['dubbletter']} dubbletter, "
+          f"{statistik['ogiltiga']} ogiltig UTF-8, {statistik['normaliserade']} normaliserade till NFC, "
+          f"{statistik['crlf']} med CRLF")
+    for bredd in range(ordlista.största_bredd + 1):
+        if ordlista.hink(bredd):
+            print(f"  bredd {bredd:>3}: {len(ordlista.hink(bredd))} ord")
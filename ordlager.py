@@ -0,0 +1,44 @@
+#Delat lager för ordlistor. Alla varianter av spelet hämtar sina ord härifrån
+#så att ordlistfilen bara läses och tolkas en gång per process.
+#
+#Textfilen kompileras vid behov till ett binärt format (se ordbinar.py) som minnesmappas,
+#så att ett spel bara kostar O(antal par) även för ordlistor med miljontals ord.
+import os
+
+import ordbinar
+
+#Cache med ordlistor. Nyckeln är filens absoluta sökväg och värdet är (mtime, ordlista).
+_cache = {}
+
+#Öppnar den kompilerade versionen av en textfil och kompilerar om den om den saknas eller är inaktuell.
+#Om den kompilerade filen inte kan skrivas (t.ex. skrivskyddad katalog) läses textfilen in i minnet istället.
+def _öppna(sökväg, mtime):
+    if sökväg.endswith(".bin"):
+        return ordbinar.BinärOrdlista(sökväg)
+    binärfil = sökväg + ".bin"
+    try:
+        if ordbinar.läs_källtid(binärfil) != mtime:
+            ordbinar.kompilera(sökväg, binärfil)
+        return ordbinar.BinärOrdlista(binärfil)
+    except OSError:
+        return tuple(ordbinar.läs_textfil(sökväg))
+
+#Returnerar ordlistan för filen som en skrivskyddad sekvens. Filen öppnas bara om när dess mtime
+#har ändrats sedan senaste gången. Kastar FileNotFoundError om filen saknas.
+def hämta_ord(fil="memo.txt"):
+    sökväg = os.path.abspath(fil)
+    mtime = os.stat(sökväg).st_mtime_ns
+    post = _cache.get(sökväg)
+    if post is None or post[0] != mtime:
+        post = (mtime, _öppna(sökväg, mtime))
+        _cache[sökväg] = post
+    return post[1]
+
+#Antal unika ord i filen, dvs. det största antalet par som ett spelbräde kan ha. Orden är redan
+#normaliserade och utan dubbletter, så talet står i den kompilerade filens huvud och kostar O(1).
+def antal_ord(fil="memo.txt"):
+    return len(hämta_ord(fil))
+
+#Tömmer cachen, t.ex. i tester eller när många olika ordlistor har lästs in.
+def töm_cache():
+    _cache.clear()
@@ -0,0 +1,264 @@
+#Prestandamätningar för alla varianter av spelet, utan fönster och utan inmatning.
+#
+#Mäter inläsning av ord (läs_ord/load_words), skapande av bräden (skapa_matris/create_game),
+#kontroll av vinst (is_game_won), drag mot motorn och tolkning av drag, sparpunkter för pågående
+#spel, samt att spara och läsa highscores. Varje mätning körs för flera brädstorlekar och storlekar på ordlistan.
+#
+#Resultatet kan skrivas som JSON och jämföras med en sparad baslinje:
+#  python prestanda.py --json resultat.json
+#  python prestanda.py --spara-baslinje baslinje.json
+#  python prestanda.py --baslinje baslinje.json --tolerans 0.25
+#Med --baslinje avslutas programmet med kod 1 om någon mätning har blivit långsammare än toleransen.
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import sys
+import tempfile
+import time
+import timeit
+
+import highscore
+import ordlager
+from drag import koordinater
+from layout import Layout
+from motor import MemoryMotor, blanda_kort, motor_för_frö
+from sparpunkt import Sparpunkt, koda, avkoda
+
+KATALOG = os.path.dirname(os.path.abspath(__file__))
+
+#Varianterna som jämförs. De äldre A-varianterna läser filen själva, de nyare går via ordlagret.
+ÄLDRE_VARIANTER = ("A-Memory.py", "A-Memory_14.py", "A-Memory_18.py")
+NYA_VARIANTER = ("A-Memory_19.py", "B-Memory_3.py", "C-Memory.py")
+
+BRÄDSTORLEKAR = ((4, 4), (6, 6), (10, 10), (20, 20))
+ORDLISTOR = (1_000, 100_000)
+STORA_ORDLISTOR = (1_000_000,)
+HIGHSCORE_RADER = (1_000, 100_000)
+
+
+#Laddar en variant som modul. Filnamnen innehåller bindestreck och kan inte importeras som vanligt.
+def ladda_variant(filnamn):
+    namn = "variant_" + filnamn[:-3].replace("-", "_")
+    if namn in sys.modules:
+        return sys.modules[namn]
+    spec = importlib.util.spec_from_file_location(namn, os.path.join(KATALOG, filnamn))
+    modul = importlib.util.module_from_spec(spec)
+    sys.modules[namn] = modul
+    spec.loader.exec_module(modul)
+    return modul
+
+#Skapar ett spelobjekt utan att anropa konstruktorn, som annars öppnar fönster eller frågar efter inmatning
+def _spel(filnamn, **attribut):
+    klass = ladda_variant(filnamn).MemoryGame
+    spel = klass.__new__(klass)
+    spel.__dict__.update(attribut)
+    return spel
+
+#Skriver en ordlista med antal unika ord till en fil
+def skapa_ordlista(fil, antal, rng):
+    sedda = set()
+    with open(fil, "w", encoding="utf-8") as f:
+        while len(sedda) < antal:
+            ord_ = "".join(rng.choices(string.ascii_lowercase + "åäö", k=rng.randint(3, 9)))
+            if ord_ not in sedda:
+                sedda.add(ord_)
+                f.write(ord_ + "\n")
+
+def skapa_highscorefil(fil, antal, rng):
+    with open(fil, "w", encoding="utf-8") as f:
+        for i in range(antal):
+            rader, kolumner = rng.choice(BRÄDSTORLEKAR)
+            f.write(f"spelare{i % 500},{rng.randint(rader * kolumner // 2, rader * kolumner * 2)},{rader}x{kolumner}\n")
+
+
+#Mäter en funktion. Antalet anrop per omgång väljs så att en omgång tar minst ungefär 0,2 s,
+#och tiden per anrop räknas ut för varje omgång. Returnerar median och minsta tid i sekunder.
+def mät(funktion, omgångar=5):
+    timer = timeit.Timer(funktion)
+    antal, _ = timer.autorange()
+    tider = [tid / antal for tid in timer.repeat(repeat=omgångar, number=antal)]
+    return {"median_s": statistics.median(tider), "min_s": min(tider), "anrop": antal}
+
+
+#Ett drag per ruta där varje par hittas direkt, med en miss före varje par. Ger ett helt spel.
+def _dragföljd(kort):
+    positioner = {}
+    for index, par in enumerate(kort):
+        positioner.setdefault(par, []).append(index)
+    följd = []
+    förra = None
+    for a, b in positioner.values():
+        if förra is not None:
+            följd += [a, förra]  #Miss: förra är redan hittad, så a vänds tillsammans med en synlig ruta
+        följd += [a, b]
+        förra = b
+    return följd
+
+def _spela(kort, följd, rader, kolumner):
+    motor = MemoryMotor(range(len(kort) // 2), rader, kolumner, kort=kort)
+    flip = motor.flip
+    for index in följd:
+        flip(index)
+    return motor
+
+
+#Alla mätningar som namn -> funktion. Namnen är nycklarna i resultatet och baslinjen.
+def mätningar(katalog, stor=False):
+    rng = random.Random(1)
+    fall = {}
+
+    for antal in ORDLISTOR + (STORA_ORDLISTOR if stor else ()):
+        fil = os.path.join(katalog, f"ord_{antal}.txt")
+        skapa_ordlista(fil, antal, rng)
+        ordlager.hämta_ord(fil)  #Kompilerar .bin-filen en gång, som första spelet gör
+
+        for variant in ÄLDRE_VARIANTER:
+            spel = _spel(variant, ord_fil=fil, totala_par=18)
+            fall[f"läs_ord/{variant}/{antal}"] = spel.läs_ord
+        for variant, spel in (("A-Memory_19.py", _spel("A-Memory_19.py", ord_fil=fil, totala_par=18)),
+                              ("B-Memory_3.py", _spel("B-Memory_3.py", fil=fil, totala_par=18)),
+                              ("C-Memory.py", _spel("C-Memory.py", fil=fil, totala_par=18))):
+            #Ny process: ordlagrets cache är tom men den kompilerade filen finns
+            fall[f"läs_ord/{variant}/{antal}"] = lambda spel=spel: (ordlager.töm_cache(), spel.läs_ord())
+            fall[f"läs_ord_cachad/{variant}/{antal}"] = spel.läs_ord
+        fall[f"load_words/Memory_main.py/{antal}"] = lambda fil=fil: (ordlager.töm_cache(), ordlager.hämta_ord(fil))
+
+    ordfil = os.path.join(katalog, f"ord_{ORDLISTOR[-1]}.txt")
+    ordlista = ordlager.hämta_ord(ordfil)
+    main = ladda_variant("Memory_main.py")
+    for rader, kolumner in BRÄDSTORLEKAR:
+        storlek = f"{rader}x{kolumner}"
+        par = rader * kolumner // 2
+        valda = list(ordlista[:par])
+
+        for variant in ÄLDRE_VARIANTER:
+            spel = _spel(variant, storlek=(rader, kolumner))
+            fall[f"skapa_matris/{variant}/{storlek}"] = lambda spel=spel, valda=valda: spel.skapa_matris(valda * 2)
+        a19 = _spel("A-Memory_19.py", layout=Layout.ett(rader, kolumner), frö=None, svårighet=None)
+        fall[f"skapa_matris/A-Memory_19.py/{storlek}"] = lambda spel=a19: spel.skapa_matris(ordlista)
+        if rader == kolumner:
+            b = _spel("B-Memory_3.py", layout=Layout.ett(rader, rader), totala_par=par, frö=None)
+            c = _spel("C-Memory.py", layout=Layout.ett(rader, rader), totala_par=par, frö=None)
+            fall[f"skapa_matris/B-Memory_3.py/{storlek}"] = lambda spel=b: spel.skapa_matris(ordlista)
+            fall[f"skapa_matris/C-Memory.py/{storlek}"] = lambda spel=c: spel.skapa_matris(ordlista)
+            fall[f"create_game/Memory_main.py/{storlek}"] = lambda n=rader: main.create_game(n, ordfil)
+
+        kort = blanda_kort(par, 1)
+        följd = _dragföljd(kort)
+        fall[f"drag/motor/{storlek}"] = lambda k=kort, f=följd, r=rader, c=kolumner: _spela(k, f, r, c)
+        halvvägs = _spela(kort, följd[:len(följd) // 2], rader, kolumner)
+        fall[f"is_game_won/Memory_main.py/{storlek}"] = lambda m=halvvägs: main.is_game_won(m)
+        #Ett spel halvvägs, som det ser ut när det sparas efter ett drag
+        pågående = motor_för_frö(ordlista, rader, kolumner, 1, logga=True)
+        for index in _dragföljd(pågående.kort)[:rader * kolumner]:
+            pågående.flip(index)
+        data = koda(pågående, "Kalle")
+        fall[f"sparpunkt_koda/sparpunkt.py/{storlek}"] = lambda m=pågående: koda(m, "Kalle")
+        fall[f"sparpunkt_läs/sparpunkt.py/{storlek}"] = lambda d=data: avkoda(d)
+        sparpunkt = Sparpunkt(os.path.join(katalog, f"spel_{storlek}.memspar"))
+        fall[f"sparpunkt_spara/sparpunkt.py/{storlek}"] = lambda s=sparpunkt, m=pågående: s.spara(m, "Kalle")
+
+        tolk = koordinater(rader, kolumner)
+        text = f"{tolk.namn(0)} {tolk.namn(rader * kolumner - 1)}"
+        fall[f"tolka_drag/drag.py/{storlek}"] = lambda t=tolk, text=text: t.tolka_drag(text)
+
+    #Att spara ett resultat: de äldre varianterna öppnar filen själva, de nyare går via highscore-lagret
+    spara_fil = os.path.join(katalog, "spara.txt")
+    for variant in ÄLDRE_VARIANTER:
+        spel = _spel(variant, highscore_fil=spara_fil, namn="Kalle", försök=20, storlek=(6, 6))
+        fall[f"spara_highscore/{variant}"] = spel.spara_highscore
+    lager = highscore.HighscoreLager(os.path.join(katalog, "lager.txt"))
+    fall["spara_highscore/HighscoreLager"] = lambda: lager.lägg_till("Kalle", rng.randint(18, 80), "6x6")
+    databas = highscore.öppna(os.path.join(katalog, "lager.db"))
+    fall["spara_highscore/SqliteHighscore"] = lambda: databas.lägg_till("Kalle", rng.randint(18, 80), "6x6")
+
+    for antal in HIGHSCORE_RADER:
+        fil = os.path.join(katalog, f"highscore_{antal}.txt")
+        skapa_highscorefil(fil, antal, rng)
+        fall[f"läs_highscore/HighscoreLager/{antal}"] = lambda fil=fil: highscore.HighscoreLager(fil).topplista("6x6")
+        db = highscore.öppna(os.path.join(katalog, f"highscore_{antal}.db"))
+        db.importera_text(fil)
+        fall[f"läs_highscore/SqliteHighscore/{antal}"] = lambda db=db: db.topplista("6x6")
+        fall[f"topplista_sida/SqliteHighscore/{antal}"] = lambda db=db: db.sida(0, 20, "namn")
+    return fall
+
+
+def kör(filter_text=None, stor=False, omgångar=5, utskrift=True):
+    katalog = tempfile.mkdtemp(prefix="memory_prestanda_")
+    gammal_katalog = os.getcwd()
+    try:
+        os.chdir(katalog)  #Varianterna som skriver filer med relativa sökvägar hamnar i den temporära katalogen
+        resultat = {}
+        for namn, funktion in mätningar(katalog, stor).items():
+            if filter_text and filter_text not in namn:
+                continue
+            resultat[namn] = mät(funktion, omgångar)
+            if utskrift:
+                print(f"{namn:<50} {resultat[namn]['median_s'] * 1e6:12.2f} µs", flush=True)
+        return {
+            "metadata": {
+                "python": platform.python_version(),
+                "plattform": platform.platform(),
+                "tid": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "resultat": resultat,
+        }
+    finally:
+        os.chdir(gammal_katalog)
+        ordlager.töm_cache()
+        shutil.rmtree(katalog, ignore_errors=True)
+
+
+#Jämför medianerna med en baslinje. Returnerar (namn, baslinje, nu, kvot) för varje gemensam mätning.
+def jämför(resultat, baslinje):
+    jämförelse = []
+    for namn, nu in resultat["resultat"].items():
+        före = baslinje["resultat"].get(namn)
+        if före:
+            jämförelse.append((namn, före["median_s"], nu["median_s"], nu["median_s"] / före["median_s"]))
+    return jämförelse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prestandamätningar för Memory.")
+    parser.add_argument("--filter", help="kör bara mätningar vars namn innehåller texten, t.ex. skapa_matris")
+    parser.add_argument("--stor", action="store_true", help="ta med ordlistor med en miljon ord")
+    parser.add_argument("--omgångar", type=int, default=5)
+    parser.add_argument("--json", help="skriv resultatet till en JSON-fil")
+    parser.add_argument("--spara-baslinje", help="skriv resultatet som ny baslinje")
+    parser.add_argument("--baslinje", help="jämför med en sparad baslinje")
+    parser.add_argument("--tolerans", type=float, default=0.25, help="tillåten försämring, 0.25 betyder 25 %%")
+    args = parser.parse_args(argv)
+
+    resultat = kör(args.filter, args.stor, args.omgångar)
+    for fil in (args.json, args.spara_baslinje):
+        if fil:
+            with open(fil, "w", encoding="utf-8") as f:
+                json.dump(resultat, f, indent=2, ensure_ascii=False)
+
+    if args.baslinje:
+        with open(args.baslinje, encoding="utf-8") as f:
+            baslinje = json.load(f)
+        försämringar = 0
+        print(f"\n{'Mätning':<50} {'Baslinje':>12} {'Nu':>12} {'Kvot':>7}")
+        for namn, före, nu, kvot in jämför(resultat, baslinje):
+            markering = ""
+            if kvot > 1 + args.tolerans:
+                markering = "  LÅNGSAMMARE"
+                försämringar += 1
+            elif kvot < 1 - args.tolerans:
+                markering = "  snabbare"
+            print(f"{namn:<50} {före * 1e6:10.2f}µs {nu * 1e6:10.2f}µs {kvot:7.2f}{markering}")
+        if försämringar:
+            print(f"\n{försämringar} mätningar är mer än {args.tolerans:.0%} långsammare än baslinjen")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#Pusselpaket: många förberäknade bräden av samma storlek i en fil, för dagens utmaning och turneringar.
+#Bräde nummer N läses direkt från sin plats i filen, utan att ordlistan behöver läsas eller något slumpas.
+#
+#Filformat:
+#   huvud:   magiskt värde (8 byte), rader, kolumner, antal bräden, postens storlek (uint32), ordtabellens start (uint64)
+#   poster:  en per bräde, alla lika stora: frö (uint64), ett ord-id per par (uint32), ett par-id per ruta
+#            (uint8, eller uint16/uint32 för större bräden)
+#   ord:     de ord som paketet använder, i samma format som ordbinar.py
+#
+#Varje bräde är samma bräde som motor.motor_för_frö ger för postens frö och den ursprungliga ordlistan,
+#så partier från ett paket kan loggas och spelas upp med repris.py som vanligt.
+#
+#Skapa ett paket:  python pusselpaket.py memo.txt dagens.mempak 6x6 --antal 365 --frö 2024
+import argparse
+import datetime
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+import ordbinar
+import ordlager
+from motor import MemoryMotor, kort_för_frö, välj_ord_index
+
+MAGI = b"MEMPAK\x01\x00"
+_HUVUD = struct.Struct("<8sIIIIQ")
+_FRÖ = struct.Struct("<Q")
+
+
+def _kortkod(par):
+    if par <= 0x100:
+        return 'B'
+    return 'H' if par <= 0x10000 else 'I'
+
+#Storleken på en post för ett bräde med det givna antalet rutor
+def postens_storlek(rader, kolumner):
+    par = rader * kolumner // 2
+    return _FRÖ.size + par * 4 + rader * kolumner * array(_kortkod(par)).itemsize
+
+
+#Skapar ett paket med antal bräden. Fröna dras ur en slumpgenerator med paketets frö, så samma
+#argument ger alltid samma paket. Filen skrivs först till en temporär fil och byter sedan namn.
+def skapa_paket(mål, rader, kolumner, antal, ord_fil="memo.txt", frö=0):
+    if rader * kolumner % 2 != 0:
+        raise ValueError("Matrisstorleken måste vara jämn")
+    ordlista = ordlager.hämta_ord(ord_fil)
+    par = rader * kolumner // 2
+    if par > len(ordlista):
+        raise ValueError(f"Brädet kräver {par} ord men ordlistan har bara {len(ordlista)}.")
+    rng = random.Random(frö)
+    kod = _kortkod(par)
+    storlek = postens_storlek(rader, kolumner)
+
+    nya_id = {}  #Ordets index i ordlistan -> index i paketets ordtabell
+    poster = bytearray()
+    for _ in range(antal):
+        bräda_frö = rng.getrandbits(64)
+        ord_id = array('I', (nya_id.setdefault(i, len(nya_id)) for i in välj_ord_index(len(ordlista), par, bräda_frö)))
+        kort = array(kod, kort_för_frö(par, bräda_frö))  #Samma placering som motorn och repris.py ger fröet
+        if sys.byteorder == "big":
+            ord_id.byteswap()
+            kort.byteswap()
+        poster += _FRÖ.pack(bräda_frö)
+        poster += ord_id.tobytes()
+        poster += kort.tobytes()
+
+    temp = f"{mål}.{os.getpid()}.tmp"
+    try:
+        with open(temp, 'wb') as f:
+            f.write(_HUVUD.pack(MAGI, rader, kolumner, antal, storlek, _HUVUD.size + len(poster)))
+            f.write(poster)
+            ordbinar.skriv(f, (ordlista[i] for i in nya_id))
+        os.replace(temp, mål)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return mål
+
+
+#Ett öppnat paket. Filen minnesmappas, så att läsa ett bräde kostar O(brädets storlek).
+class Pusselpaket:
+
+    def __init__(self, fil):
+        with open(fil, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magi, self.rader, self.kolumner, self._antal, self._storlek, ord_start = _HUVUD.unpack_from(self._mm, 0)
+        if magi != MAGI:
+            self._mm.close()
+            raise ValueError(f"Filen '{fil}' är inte ett pusselpaket.")
+        self.par = self.rader * self.kolumner // 2
+        self._kod = _kortkod(self.par)
+        self.ordlista = ordbinar.BinärOrdlista(self._mm, ord_start)
+
+    def __len__(self):
+        return self._antal
+
+    #Fröet, orden (ett per par) och placeringen (ett par-id per ruta) för bräde nummer n
+    def bräda(self, n):
+        if not 0 <= n < self._antal:
+            raise IndexError("brädet finns inte i paketet")
+        start = _HUVUD.size + n * self._storlek
+        (frö,) = _FRÖ.unpack_from(self._mm, start)
+        start += _FRÖ.size
+        ord_id = array('I', self._mm[start:start + self.par * 4])
+        start += self.par * 4
+        kort = array(self._kod, self._mm[start:start + self._storlek - _FRÖ.size - self.par * 4])
+        if sys.byteorder == "big":
+            ord_id.byteswap()
+            kort.byteswap()
+        return frö, [self.ordlista[i] for i in ord_id], kort
+
+    #En spelmotor för bräde nummer n
+    def motor(self, n, logga=False):
+        frö, ordlista, kort = self.bräda(n)
+        return MemoryMotor(ordlista, self.rader, self.kolumner, kort=kort, frö=frö, logga=logga)
+
+    #Numret på dagens bräde. Paketet går runt när alla bräden har använts.
+    def dagens(self, datum=None):
+        return (datum or datetime.date.today()).toordinal() % self._antal
+
+    def stäng(self):
+        self._mm.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skapa ett pusselpaket med förberäknade Memory-bräden.")
+    parser.add_argument("ordlista", help="ordlistfilen, t.ex. memo.txt")
+    parser.add_argument("mål", help="paketfilen som ska skapas")
+    parser.add_argument("storlek", help="brädets storlek, t.ex. 6x6")
+    parser.add_argument("--antal", type=int, default=365, help="antal bräden i paketet")
+    parser.add_argument("--frö", type=int, default=0)
+    args = parser.parse_args(argv)
+    rader, kolumner = (int(tal) for tal in args.storlek.split("x"))
+    skapa_paket(args.mål, rader, kolumner, args.antal, args.ordlista, args.frö)
+    paket = Pusselpaket(args.mål)
+    print(f"Skrev {len(paket)} bräden {rader}x{kolumner} med {len(paket.ordlista)} olika ord till {args.mål}")
+    paket.stäng()
+
+
+if __name__ == "__main__":
+    main()
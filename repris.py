@@ -0,0 +1,228 @@
+#Loggar av spelade partier och uppspelning av dem. Varje vunnet parti sparas sist i en loggfil med
+#spelarens namn, fröet som placerade paren, brädets storlek, antalet försök och alla vända rutor som
+#varint. Eftersom placeringen bara beror på fröet (se motor.kort_för_frö) kan partiet spelas upp igen
+#mot motorn utan ordlistan, och resultatet jämföras med det som står i highscore-listan.
+#
+#Filformat: MAGI följt av poster med
+#  namn (varint längd + UTF-8), frö, rader, kolumner, försök, antal byte med drag, antal drag, dragen
+#där alla tal är varint. När alla rutor har index under 128 är varje drag en enda byte.
+#
+#Kontrollera en logg:  python repris.py partier.memlog --highscore highscore.txt
+import argparse
+import json
+import os
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from highscore import SQLITE_ÄNDELSER, läs_poster
+from motor import MemoryMotor, OGILTIG, lägg_till_varint
+from simulator import sammanfatta
+
+MAGI = b"MEMLOG\x01\n"
+
+#Antal partier som skickas till processpoolen åt gången
+BLOCKSTORLEK = 5000
+
+#Ett parti i loggen. drag är en bytes när alla drag är en byte, annars en lista med index.
+Parti = namedtuple("Parti", "namn frö rader kolumner försök drag")
+
+
+#Kodar ett avslutat parti. Motorn måste ha skapats med frö och logga=True.
+def koda_parti(namn, motor):
+    if motor.frö is None or motor.logg is None:
+        raise ValueError("Partiet måste spelas med frö och logga=True för att kunna sparas.")
+    namn_byte = namn.encode("utf-8")
+    post = bytearray()
+    lägg_till_varint(post, len(namn_byte))
+    post += namn_byte
+    for tal in (motor.frö, motor.rader, motor.kolumner, motor.försök, len(motor.logg), _antal_drag(motor.logg)):
+        lägg_till_varint(post, tal)
+    post += motor.logg
+    return bytes(post)
+
+#Sant om partiet kan kodas. Ett spel som har fortsatt från en sparpunkt (se sparpunkt.py) kan ha
+#spelats utan logg, och då sparas bara resultatet.
+def kan_sparas(motor):
+    return motor.frö is not None and motor.logg is not None
+
+#Antal varint i en buffert, dvs. antalet byte som inte har fortsättningsbiten satt
+def _antal_drag(logg):
+    return len(logg) - sum(1 for b in logg if b & 0x80)
+
+#Sparar en eller flera kodade poster sist i loggfilen med en enda skrivning
+def spara_poster(fil, poster):
+    with open(fil, "ab") as f:
+        if f.tell() == 0:
+            f.write(MAGI)
+        f.write(b"".join(poster))
+
+def spara_parti(fil, namn, motor):
+    spara_poster(fil, [koda_parti(namn, motor)])
+
+
+def _läs_varint(data, pos):
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    tal = 0
+    skift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        tal |= (b & 0x7F) << skift
+        if b < 0x80:
+            return tal, pos
+        skift += 7
+
+#Läser alla partier i en loggfil. Kastar ValueError om filen inte är en logg eller slutar mitt i en post.
+def läs_partier(fil):
+    with open(fil, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGI):
+        raise ValueError(f"{fil} är inte en partilogg")
+    pos = len(MAGI)
+    slut = len(data)
+    try:
+        while pos < slut:
+            längd, pos = _läs_varint(data, pos)
+            namn = data[pos:pos + längd].decode("utf-8", "replace")
+            pos += längd
+            frö, pos = _läs_varint(data, pos)
+            rader, pos = _läs_varint(data, pos)
+            kolumner, pos = _läs_varint(data, pos)
+            försök, pos = _läs_varint(data, pos)
+            antal_byte, pos = _läs_varint(data, pos)
+            antal_drag, pos = _läs_varint(data, pos)
+            if pos + antal_byte > slut:
+                raise IndexError
+            if antal_byte == antal_drag:
+                drag = data[pos:pos + antal_byte]
+            else:
+                drag = []
+                delslut = pos + antal_byte
+                index_pos = pos
+                while index_pos < delslut:
+                    index, index_pos = _läs_varint(data, index_pos)
+                    drag.append(index)
+            pos += antal_byte
+            yield Parti(namn, frö, rader, kolumner, försök, drag)
+    except IndexError:
+        raise ValueError(f"{fil} slutar mitt i ett parti") from None
+
+
+#Spelar upp ett parti mot motorn. Returnerar antalet försök om partiet är möjligt och slutar med
+#att alla par är hittade, annars None (ett drag på en synlig ruta, för få drag eller drag efter vinsten).
+def spela_upp(parti):
+    try:
+        motor = MemoryMotor(range(parti.rader * parti.kolumner // 2), parti.rader, parti.kolumner, frö=parti.frö)
+    except ValueError:
+        return None
+    flip = motor.flip
+    for index in parti.drag:
+        if flip(index) == OGILTIG:
+            return None
+    return motor.försök if motor.är_vunnet() else None
+
+
+def _kontrollera_block(partier):
+    resultat = Counter()
+    fördelning = defaultdict(Counter)
+    omöjliga = 0
+    for parti in partier:
+        försök = spela_upp(parti)
+        if försök is None or försök != parti.försök:
+            omöjliga += 1
+            continue
+        storlek = f"{parti.rader}x{parti.kolumner}"
+        resultat[parti.namn, försök, storlek] += 1
+        fördelning[storlek][försök] += 1
+    return len(partier), omöjliga, resultat, fördelning
+
+def _block(partier):
+    block = []
+    for parti in partier:
+        block.append(parti)
+        if len(block) >= BLOCKSTORLEK:
+            yield block
+            block = []
+    if block:
+        yield block
+
+#Spelar upp alla partier i loggen, uppdelade i block som körs parallellt i en processpool.
+#Returnerar en dict med
+#  "partier", "giltiga" och "omöjliga" (partier som inte går att spela eller där försöken inte stämmer),
+#  "resultat": Counter med (namn, försök, storlek) för de giltiga partierna,
+#  "fördelning": storlek -> Counter med antal försök, för statistik med simulator.sammanfatta.
+def kontrollera(fil, processer=None):
+    resultat = Counter()
+    fördelning = defaultdict(Counter)
+    antal = omöjliga = 0
+    block = _block(läs_partier(fil))
+    if processer == 1:
+        delsvar = map(_kontrollera_block, block)
+    else:
+        pool = ProcessPoolExecutor(processer)
+        delsvar = pool.map(_kontrollera_block, block)
+    try:
+        for delantal, delomöjliga, delresultat, delfördelning in delsvar:
+            antal += delantal
+            omöjliga += delomöjliga
+            resultat.update(delresultat)
+            for storlek, försök in delfördelning.items():
+                fördelning[storlek].update(försök)
+    finally:
+        if processer != 1:
+            pool.shutdown()
+    return {"partier": antal, "giltiga": antal - omöjliga, "omöjliga": omöjliga,
+            "resultat": resultat, "fördelning": fördelning}
+
+#Alla resultat i en highscore-fil, både textfiler och SQLite
+def _highscore_poster(fil):
+    if fil.endswith(SQLITE_ÄNDELSER):
+        from highscore_sqlite import SqliteHighscore
+        databas = SqliteHighscore(fil)
+        try:
+            return list(databas.poster())
+        finally:
+            databas.stäng()
+    return läs_poster(fil)
+
+#Resultat i highscore-filen som inte har något giltigt parti i loggen, som (namn, försök, storlek)
+def overifierade(highscore_fil, resultat):
+    kvar = Counter(resultat)
+    saknas = []
+    for post in _highscore_poster(highscore_fil):
+        if kvar[post] > 0:
+            kvar[post] -= 1
+        else:
+            saknas.append(post)
+    return saknas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spela upp och kontrollera loggade Memory-partier.")
+    parser.add_argument("logg", help="partiloggen, t.ex. partier.memlog")
+    parser.add_argument("--highscore", help="highscore-fil att jämföra med loggen")
+    parser.add_argument("--processer", type=int, default=os.cpu_count())
+    parser.add_argument("--json", action="store_true", help="skriv resultatet som JSON")
+    args = parser.parse_args(argv)
+
+    svar = kontrollera(args.logg, args.processer)
+    statistik = {storlek: sammanfatta(f) for storlek, f in sorted(svar["fördelning"].items())}
+    saknas = overifierade(args.highscore, svar["resultat"]) if args.highscore and os.path.exists(args.highscore) else []
+
+    if args.json:
+        print(json.dumps({"partier": svar["partier"], "giltiga": svar["giltiga"], "omöjliga": svar["omöjliga"],
+                          "overifierade": saknas, "statistik": statistik}, indent=2, ensure_ascii=False))
+        return
+    print(f"{svar['partier']} partier, {svar['giltiga']} giltiga, {svar['omöjliga']} omöjliga")
+    for storlek, s in statistik.items():
+        print(f"{storlek:>8}: {s['spel']} spel, medel {s['medel']:.2f}, min {s['min']}, p50 {s['p50']}, max {s['max']}")
+    if args.highscore:
+        print(f"{len(saknas)} resultat i {args.highscore} saknar ett giltigt parti i loggen")
+        for namn, försök, storlek in saknas[:20]:
+            print(f"  {namn} - {försök} försök ({storlek})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#Nätverksserver för Memory. En process med en asyncio-händelseloop kan ha tusentals spel igång samtidigt.
+#Varje anslutning är en session som styrs med ett radbaserat textprotokoll (UTF-8, en rad per kommando):
+#
+#  NAMN Kalle      Namnet som sparas i highscore-listan          -> OK
+#  NY 4x3          Startar ett nytt spel (NY 6 betyder 6x6)       -> OK 4x3
+#  NY 4x3 svår     Med svårighet lätt, medel eller svår (se likhet.py)
+#  NY 2*4x4        Två bräden med 4x4 som spelas samtidigt        -> OK 2*4x4
+#  PUSSEL [n]      Spelar bräde n ur pusselpaketet, utan n dagens -> OK 6x6 <n>
+#  A1              Vänder rutan på rad A, kolumn 1 (se drag.py)   -> A1 <ord> FÖRSTA|PAR|MISS|VUNNET <försök>
+#  A1 F6           Flera drag på samma rad, ett svar per drag
+#  2B3             Rutan B3 på bräde 2, när spelet har flera bräden (se layout.py)
+#  STATUS          Försök och hittade par                          -> STATUS <försök> <hittade> <totala>
+#  SLUT            Avslutar anslutningen                           -> HEJDÅ
+#
+#Fel besvaras med "FEL <meddelande>". Ett felmatchat par döljs när nästa ruta vänds, precis som i Tk-versionen.
+#
+#Resultaten från vunna spel läggs i en kö. En skrivaruppgift tar dem ur kön och sparar dem i omgångar i en
+#egen tråd, så att filskrivningar och SQLite-commits aldrig blockerar händelseloopen för de andra spelarna.
+#
+#Starta:  python server.py --port 4000
+#Testa:   nc localhost 4000
+import argparse
+import asyncio
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import highscore
+import likhet
+import ordlager
+import repris
+from pusselpaket import Pusselpaket
+from layout import delad_layout, tolka_layout, delmotorer
+from motor import OGILTIG, FÖRSTA, PAR, MISS, VUNNET
+
+#Namn på händelserna i protokollet
+HÄNDELSER = {FÖRSTA: "FÖRSTA", PAR: "PAR", MISS: "MISS", VUNNET: "VUNNET"}
+
+#Längsta rad som servern tar emot
+MAX_RAD = 1024
+
+#Största antalet rader och kolumner på ett bräde. Alla bräden i ett spel har tillsammans högst MAX_SIDA² rutor.
+MAX_SIDA = 100
+
+#Antal resultat som skrivaren som mest sparar i en omgång
+BATCHSTORLEK = 500
+
+
+class Session:
+    __slots__ = ("server", "namn", "motor", "layout")
+
+    #Tillståndet för en ansluten spelare. Utan pågående spel är det bara namnet och en referens till servern.
+    def __init__(self, server):
+        self.server = server
+        self.namn = "-"
+        self.motor = None
+        self.layout = None  #Brädena i spelet, översätter drag som "B3" och "2B3" till rutornas index
+
+    #Hanterar en rad från klienten och returnerar svaret som en lista med rader
+    def hantera(self, rad):
+        delar = rad.split(None, 1)
+        if not delar:
+            return []
+        kommando = delar[0].upper()
+        argument = delar[1].strip() if len(delar) > 1 else ""
+        if kommando == "NY":
+            return [self.nytt_spel(argument)]
+        if kommando == "PUSSEL":
+            return [self.pussel(argument)]
+        if kommando == "NAMN":
+            if not argument or "," in argument:
+                return ["FEL Namnet får inte vara tomt eller innehålla kommatecken"]
+            self.namn = argument
+            return ["OK"]
+        if kommando == "STATUS":
+            if self.motor is None:
+                return ["FEL Inget spel har startats"]
+            motor = self.motor
+            return [f"STATUS {motor.försök} {motor.hittade_par} {motor.totala_par}"]
+        return [self.drag(val) for val in rad.split()]
+
+    def nytt_spel(self, argument):
+        storlek, _, nivå = argument.partition(" ")
+        nivå = nivå.strip().lower()
+        if nivå and nivå not in likhet.SVÅRIGHETER:
+            return f"FEL Svårigheten anges som {', '.join(likhet.SVÅRIGHETER)}"
+        try:
+            #Storleken kontrolleras innan layouten byggs, så en orimlig storlek blockerar inte händelseloopen.
+            #Layouterna delas mellan sessionerna, så sessionen håller bara en referens
+            layout = tolka_layout(storlek, MAX_SIDA, MAX_SIDA * MAX_SIDA)
+            self.motor = self.server.ny_motor(layout, likhet.SVÅRIGHETER.get(nivå))
+        except ValueError as e:
+            return f"FEL {e}"
+        self.layout = layout
+        return f"OK {layout.text()}"
+
+    def pussel(self, argument):
+        paket = self.server.paket
+        if paket is None:
+            return "FEL Servern har inget pusselpaket"
+        if argument and not argument.isdigit():
+            return "FEL Ange brädets nummer, t.ex. PUSSEL 12"
+        n = int(argument) if argument else paket.dagens()
+        if n >= len(paket):
+            return f"FEL Paketet har bara {len(paket)} bräden"
+        self.motor = paket.motor(n, logga=bool(self.server.partilogg))
+        self.layout = delad_layout(1, paket.rader, paket.kolumner)
+        return f"OK {paket.rader}x{paket.kolumner} {n}"
+
+    #Vänder en ruta, t.ex. "A1"
+    def drag(self, val):
+        motor = self.motor
+        if motor is None:
+            return "FEL Inget spel har startats"
+        index = self.layout.tolka(val)
+        if index is None:
+            return f"FEL Rutan {val} finns inte"
+        händelse = motor.flip(index)
+        if händelse == OGILTIG:
+            if not motor.är_synlig(index):
+                return f"FEL Rutan {val} ligger inte på samma bräde som den första"
+            return f"FEL Rutan {val} är redan vänd"
+        if händelse == VUNNET:
+            self.server.spara(self.namn, motor)
+        return f"{val.upper()} {motor.ord_vid(index)} {HÄNDELSER[händelse]} {motor.försök}"
+
+
+#Sparar en omgång resultat, (namn, försök, storlek, kodat parti eller None), i highscore-lagret och partiloggen.
+#Om en omgång inte går att spara (t.ex. låst databas eller full disk) skrivs felet ut och skrivaren
+#fortsätter med nästa omgång, så att en enda misslyckad skrivning inte stoppar alla senare resultat.
+def spara_omgång(poster, lager, highscore_fil, partilogg):
+    if poster and lager is not None:
+        try:
+            lager.lägg_till_många([post[:3] for post in poster])
+        except Exception as e:
+            print(f"Kunde inte spara {len(poster)} resultat i {highscore_fil}: {e}", file=sys.stderr)
+    partier = [post[3] for post in poster if post[3] is not None]  #Bräden utan logg har bara ett resultat
+    if partier and partilogg:
+        try:
+            repris.spara_poster(partilogg, partier)
+        except Exception as e:
+            print(f"Kunde inte spara {len(partier)} partier i {partilogg}: {e}", file=sys.stderr)
+
+
+class MemoryServer:
+
+    #Orden läses in en gång och delas av alla sessioner, så ett spel håller bara referenser till sina ord.
+    #Ordlistan är den minnesmappade listan från ordlagret och kopieras inte, så den kostar inget per ord.
+    #highscore_fil=None betyder att inga resultat sparas och partilogg=None att partierna inte loggas.
+    #Med paket (en paketfil från pusselpaket.py) kan spelarna välja förberäknade bräden med PUSSEL.
+    #ordlista och grannar kan ges om de redan är inlästa, annars läses de från ord_fil.
+    def __init__(self, ord_fil="memo.txt", highscore_fil="highscore.txt", partilogg=None, paket=None,
+                 ordlista=None, grannar=None):
+        self.ordlista = ordlista if ordlista is not None else ordlager.hämta_ord(ord_fil)
+        #Förväxlingsbara ord, för spel med svårighet
+        self.grannar = grannar if grannar is not None else likhet.hämta_grannar(ord_fil)
+        self.highscore_fil = highscore_fil
+        self.highscore = None  #Öppnas av skrivaren i dess tråd, eftersom en SQLite-anslutning hör till en tråd
+        self.partilogg = partilogg
+        self._kö = asyncio.Queue()  #Resultat som väntar på att sparas
+        self._skrivtråd = ThreadPoolExecutor(max_workers=1)
+        self._skrivare = None  #Uppgiften som tömmer kön, startas i starta()
+        self.paket = Pusselpaket(paket) if paket else None
+        self.sessioner = 0  #Antal anslutna klienter
+
+    def ny_motor(self, layout, svårighet=None):
+        return layout.skapa_motor(self.ordlista, random.getrandbits(64), bool(self.partilogg),
+                                  self.grannar, svårighet)
+
+    #Lägger ett vunnet parti i skrivarens kö, ett resultat per bräde. Partiet kodas direkt, eftersom
+    #motorn kan ändras av ett nytt spel i sessionen innan skrivaren hinner spara det.
+    def spara(self, namn, motor):
+        if not (self.highscore_fil or self.partilogg):
+            return
+        for bräda in delmotorer(motor):
+            parti = repris.koda_parti(namn, bräda) if self.partilogg and repris.kan_sparas(bräda) else None
+            self._kö.put_nowait((namn, bräda.försök, f"{bräda.rader}x{bräda.kolumner}", parti))
+
+    #Skrivaren. Väntar på ett resultat och tar sedan med allt som redan står i kön, upp till batchstorlek,
+    #och sparar omgången i skrivtråden medan händelseloopen fortsätter med de andra sessionerna.
+    async def _skriv(self):
+        loop = asyncio.get_running_loop()
+        if self.highscore_fil:
+            try:
+                self.highscore = await loop.run_in_executor(self._skrivtråd, highscore.öppna, self.highscore_fil)
+            except Exception as e:
+                print(f"Kunde inte öppna {self.highscore_fil}: {e}", file=sys.stderr)
+        while True:
+            poster = [await self._kö.get()]
+            while len(poster) < BATCHSTORLEK and not self._kö.empty():
+                poster.append(self._kö.get_nowait())
+            await loop.run_in_executor(self._skrivtråd, spara_omgång, poster, self.highscore,
+                                       self.highscore_fil, self.partilogg)
+            for _ in poster:
+                self._kö.task_done()
+
+    async def hantera_klient(self, läsare, skrivare):
+        session = Session(self)
+        self.sessioner += 1
+        try:
+            skrivare.write("MEMORY 1\n".encode())
+            while True:
+                try:
+                    rad = await läsare.readline()
+                except ValueError:  #Raden är längre än MAX_RAD
+                    skrivare.write("FEL För lång rad\n".encode())
+                    break
+                if not rad:
+                    break
+                text = rad.decode("utf-8", "replace").strip()
+                if text.upper() == "SLUT":
+                    skrivare.write("HEJDÅ\n".encode())
+                    break
+                svar = session.hantera(text)
+                if svar:
+                    skrivare.write(("\n".join(svar) + "\n").encode())
+                    await skrivare.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessioner -= 1
+            skrivare.close()
+
+    #backlog är större än standardvärdet så att många klienter kan ansluta på en gång
+    async def starta(self, värd="127.0.0.1", port=4000, backlog=1024):
+        if self._skrivare is None:
+            self._skrivare = asyncio.get_running_loop().create_task(self._skriv())
+        return await asyncio.start_server(self.hantera_klient, värd, port, limit=MAX_RAD, backlog=backlog)
+
+    #Väntar tills skrivaren har sparat allt i kön och stänger sedan highscore-lagret
+    async def stäng(self):
+        if self._skrivare is None:
+            return
+        await self._kö.join()
+        self._skrivare.cancel()
+        self._skrivare = None
+        if hasattr(self.highscore, "stäng"):
+            await asyncio.get_running_loop().run_in_executor(self._skrivtråd, self.highscore.stäng)
+        self._skrivtråd.shutdown()
+
+
+async def _kör(argument):
+    server = MemoryServer(argument.ord, argument.highscore or None, argument.partilogg or None, argument.paket)
+    tcp = await server.starta(argument.värd, argument.port)
+    print(f"Memory-servern lyssnar på {argument.värd}:{argument.port}")
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        await server.stäng()  #Sparar resultaten som fortfarande står i kön
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-server med ett radbaserat textprotokoll.")
+    parser.add_argument("--värd", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--ord", default="memo.txt", help="Ordlistfilen")
+    parser.add_argument("--highscore", default="highscore.txt", help="Highscore-fil, tom sträng för att inte spara")
+    parser.add_argument("--partilogg", default="partier.memlog", help="Logg med vunna partier, tom sträng för att inte logga")
+    parser.add_argument("--paket", default=None, help="Pusselpaket för kommandot PUSSEL")
+    argument = parser.parse_args()
+    try:
+        asyncio.run(_kör(argument))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
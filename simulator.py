@@ -0,0 +1,247 @@
+#Simulerar Memory utan mänsklig spelare för att mäta hur svåra olika brädstorlekar är.
+#
+#En strategi spelar ett helt spel mot spelmotorn och får bara titta på de rutor den själv har vänt.
+#Simuleringen delas upp i block som körs parallellt i en processpool, och resultatet är
+#fördelningen av antal försök per brädstorlek.
+#
+#Exempel:  python simulator.py 4x4 6x6 --spel 100000 --strategi glömsk --glömska 0.05
+import argparse
+import json
+import math
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from motor import MemoryMotor, MISS
+
+#Största antal spel som ett block i processpoolen kör innan resultatet skickas tillbaka
+BLOCKSTORLEK = 20000
+
+
+#Basklass för strategier. En strategi implementerar drag(), som vänder två rutor i motorn.
+class Strategi:
+
+    def __init__(self, rng=random):
+        self.rng = rng
+
+    #Förbereder strategin för ett nytt bräde med antal rutor
+    def nytt_spel(self, antal):
+        pass
+
+    def drag(self, motor):
+        raise NotImplementedError
+
+    #Spelar ett helt spel och returnerar antal försök
+    def spela(self, motor):
+        self.nytt_spel(len(motor))
+        while motor.hittade_par < motor.totala_par:
+            self.drag(motor)
+        return motor.försök
+
+
+#Vänder två slumpmässiga rutor som inte är matchade. Minns ingenting.
+class Slumpmässig(Strategi):
+
+    def nytt_spel(self, antal):
+        self.kvar = list(range(antal))  #Rutor som inte är matchade
+        self.plats = list(range(antal))  #Var varje ruta ligger i self.kvar
+
+    def _ta_bort(self, index):
+        kvar, plats = self.kvar, self.plats
+        sista = kvar.pop()
+        if sista != index:
+            kvar[plats[index]] = sista
+            plats[sista] = plats[index]
+
+    def drag(self, motor):
+        kvar = self.kvar
+        a = kvar[self.rng.randrange(len(kvar))]
+        b = a
+        while b == a:
+            b = kvar[self.rng.randrange(len(kvar))]
+        motor.flip(a)
+        if motor.flip(b) != MISS:
+            self._ta_bort(a)
+            self._ta_bort(b)
+
+
+#Minns alla rutor den har sett. Matchar ett känt par direkt, och vänder annars en okänd ruta först.
+class PerfektMinne(Strategi):
+
+    def nytt_spel(self, antal):
+        self.osedda = list(range(antal))  #Rutor som strategin inte vet något om
+        self.kända = {}  #Par-id -> ruta, för par där bara den ena rutan har setts
+        self.kända_par = []  #Par där båda rutorna har setts men inte matchats än
+
+    #Tar en slumpmässig osedd ruta
+    def _osedd(self):
+        osedda = self.osedda
+        i = self.rng.randrange(len(osedda))
+        osedda[i], osedda[-1] = osedda[-1], osedda[i]
+        return osedda.pop()
+
+    def drag(self, motor):
+        if self.kända_par:
+            a, b = self.kända_par.pop()
+            motor.flip(a)
+            motor.flip(b)
+            return
+
+        a = self._osedd()
+        motor.flip(a)
+        id_a = motor.kort[a]
+        b = self.kända.pop(id_a, -1)
+        if b >= 0:  #Den andra rutan i paret har redan setts
+            motor.flip(b)
+            return
+
+        b = self._osedd()
+        motor.flip(b)
+        id_b = motor.kort[b]
+        if id_b == id_a:
+            return
+        self.kända[id_a] = a
+        c = self.kända.pop(id_b, -1)
+        if c >= 0:  #Andra rutan hörde ihop med en tidigare sedd ruta, matchas nästa drag
+            self.kända_par.append((b, c))
+        else:
+            self.kända[id_b] = b
+
+
+#Som PerfektMinne, men efter varje försök glöms varje minne med sannolikheten glömska.
+#En glömd ruta blir okänd igen och kan väljas som osedd.
+class BegränsatMinne(PerfektMinne):
+
+    def __init__(self, rng=random, glömska=0.1):
+        super().__init__(rng)
+        self.glömska = glömska
+
+    def drag(self, motor):
+        super().drag(motor)
+        slump = self.rng.random
+        glömska = self.glömska
+        for par_id, ruta in list(self.kända.items()):
+            if slump() < glömska:
+                del self.kända[par_id]
+                self.osedda.append(ruta)
+        behållna = []
+        for a, b in self.kända_par:
+            if slump() < glömska:
+                self.osedda.append(a)
+                self.osedda.append(b)
+            else:
+                behållna.append((a, b))
+        self.kända_par = behållna
+
+
+STRATEGIER = {
+    "slump": Slumpmässig,
+    "perfekt": PerfektMinne,
+    "glömsk": BegränsatMinne,
+}
+
+#Skapar en strategi från dess namn. glömska används bara av strategin "glömsk".
+def skapa_strategi(namn, rng=random, glömska=0.1):
+    if namn not in STRATEGIER:
+        raise ValueError(f"Okänd strategi '{namn}'. Välj bland: {', '.join(STRATEGIER)}")
+    if namn == "glömsk":
+        return BegränsatMinne(rng, glömska)
+    return STRATEGIER[namn](rng)
+
+#Kör ett block med spel i en process och returnerar fördelningen av försök
+def _kör_block(rader, kolumner, antal, strateginamn, glömska, frö):
+    rng = random.Random(frö)
+    strategi = skapa_strategi(strateginamn, rng, glömska)
+    par = rader * kolumner // 2
+    ordlista = range(par)  #Orden spelar ingen roll för simuleringen, bara par-id:n
+    fördelning = Counter()
+    for _ in range(antal):
+        fördelning[strategi.spela(MemoryMotor(ordlista, rader, kolumner, rng))] += 1
+    return fördelning
+
+#Simulerar antal spel på ett bräde med rader x kolumner och returnerar en Counter {försök: antal spel}.
+#processer=1 kör allt i den egna processen, None använder alla kärnor.
+def simulera(rader, kolumner, antal, strategi="perfekt", glömska=0.1, frö=None, processer=None):
+    skapa_strategi(strategi, glömska=glömska)  #Kontrollerar namnet innan arbetet delas ut
+    if rader * kolumner % 2 != 0:
+        raise ValueError("Matrisstorleken måste vara jämn")
+    bas = random.Random(frö)
+    block = []
+    kvar = antal
+    while kvar > 0:
+        storlek = min(BLOCKSTORLEK, kvar)
+        block.append((rader, kolumner, storlek, strategi, glömska, bas.getrandbits(64)))
+        kvar -= storlek
+
+    fördelning = Counter()
+    if processer == 1 or len(block) == 1:
+        for argument in block:
+            fördelning.update(_kör_block(*argument))
+        return fördelning
+    with ProcessPoolExecutor(max_workers=processer) as pool:
+        for delresultat in pool.map(_kör_block, *zip(*block)):
+            fördelning.update(delresultat)
+    return fördelning
+
+#Räknar ut medelvärde, standardavvikelse och percentiler ur en fördelning
+def sammanfatta(fördelning):
+    antal = sum(fördelning.values())
+    if antal == 0:
+        return {"spel": 0}
+    medel = sum(f * n for f, n in fördelning.items()) / antal
+    varians = sum(n * (f - medel) ** 2 for f, n in fördelning.items()) / antal
+    gränser = {"p10": 0.10, "p50": 0.50, "p90": 0.90, "p99": 0.99}
+    percentiler = {}
+    ackumulerat = 0
+    for försök in sorted(fördelning):
+        ackumulerat += fördelning[försök]
+        for namn, andel in gränser.items():
+            if namn not in percentiler and ackumulerat >= andel * antal:
+                percentiler[namn] = försök
+    return {
+        "spel": antal,
+        "medel": medel,
+        "std": math.sqrt(varians),
+        "min": min(fördelning),
+        "max": max(fördelning),
+        **percentiler,
+    }
+
+#Tolkar en storlek som "4x3", eller "6" för ett kvadratiskt bräde
+def tolka_storlek(text):
+    if "x" in text:
+        rader, kolumner = text.split("x")
+        return int(rader), int(kolumner)
+    return int(text), int(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulera Memory med datorspelare.")
+    parser.add_argument("storlekar", nargs="+", help="brädstorlekar, t.ex. 4x4 6x6 3x4")
+    parser.add_argument("--spel", type=int, default=10000, help="antal spel per storlek")
+    parser.add_argument("--strategi", choices=sorted(STRATEGIER), default="perfekt")
+    parser.add_argument("--glömska", type=float, default=0.1, help="sannolikhet att glömma en ruta per försök")
+    parser.add_argument("--frö", type=int, default=None)
+    parser.add_argument("--processer", type=int, default=os.cpu_count())
+    parser.add_argument("--json", action="store_true", help="skriv resultatet som JSON")
+    args = parser.parse_args(argv)
+
+    resultat = {}
+    for text in args.storlekar:
+        rader, kolumner = tolka_storlek(text)
+        fördelning = simulera(rader, kolumner, args.spel, args.strategi, args.glömska, args.frö, args.processer)
+        resultat[f"{rader}x{kolumner}"] = sammanfatta(fördelning)
+
+    if args.json:
+        print(json.dumps(resultat, indent=2, ensure_ascii=False))
+        return
+    print(f"Strategi: {args.strategi}, {args.spel} spel per storlek")
+    print(f"{'Storlek':>8} {'Medel':>8} {'Std':>7} {'Min':>5} {'p10':>5} {'p50':>5} {'p90':>5} {'p99':>5} {'Max':>5}")
+    for storlek, s in resultat.items():
+        print(f"{storlek:>8} {s['medel']:8.2f} {s['std']:7.2f} {s['min']:5} {s['p10']:5} "
+              f"{s['p50']:5} {s['p90']:5} {s['p99']:5} {s['max']:5}")
+
+
+if __name__ == "__main__":
+    main()
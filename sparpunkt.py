@@ -0,0 +1,229 @@
+#Sparpunkter för pågående spel. Motorns tillstånd kodas till några hundra byte och skrivs atomärt till en fil,
+#så att ett spel kan fortsätta efter att programmet har avslutats eller kraschat.
+#
+#Filformat: MAGI, spelarens namn (varint längd + UTF-8) och antalet bräden följt av ett block per bräde:
+#  flaggor, rader, kolumner, (frö), försök, hittade_par, första_val + 1, väntande_a + 1, väntande_b + 1,
+#  orden, placeringen, synliga rutor (en bit per ruta) och (loggen)
+#och sist CRC-32 för allt före. Alla tal är varint som i repris.py. Orden sparas som text, utom för lata
+#bräden (se motor.LAT_GRÄNS) där de sparas som index i ordlistan. Placeringen sparas som den lagras i motorn,
+#utom för lata bräden där den räknas fram ur fröet igen. Med flera bräden (FlerMotor) står först vilket
+#bräde som är aktivt och det felmatchade paret.
+#
+#Ett 6x6-spel tar ungefär 200 byte och kodas på några mikrosekunder, så det går att spara efter varje drag.
+import os
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+
+from motor import MemoryMotor, FlerMotor, FeistelKort, OrdUrval, lägg_till_varint
+
+MAGI = b"MEMSPAR\x01"
+
+#Flaggor för ett bräde
+_ORD_ID = 1     #Orden är index i ordlistan
+_LAT = 2        #Placeringen räknas fram ur fröet
+_LOGG = 4       #Motorn loggar dragen
+_FRÖ = 8        #Motorn har ett frö
+
+#Ett sparat spel: spelarens namn och motorn
+Sparat = namedtuple("Sparat", "namn motor")
+
+
+def _läs_varint(data, pos):
+    tal = 0
+    skift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        tal |= (b & 0x7F) << skift
+        if b < 0x80:
+            return tal, pos
+        skift += 7
+
+def _koda_bräda(buffert, motor):
+    ord_, kort = motor.ord, motor.kort
+    if isinstance(kort, FeistelKort) and motor.frö is None:
+        raise ValueError("Ett lat bräde utan frö kan inte sparas")
+    flaggor = ((_ORD_ID if isinstance(ord_, OrdUrval) else 0) | (_LAT if isinstance(kort, FeistelKort) else 0)
+               | (_LOGG if motor.logg is not None else 0) | (_FRÖ if motor.frö is not None else 0))
+    lägg_till_varint(buffert, flaggor)
+    lägg_till_varint(buffert, motor.rader)
+    lägg_till_varint(buffert, motor.kolumner)
+    if motor.frö is not None:
+        lägg_till_varint(buffert, motor.frö)
+    for tal in (motor.försök, motor.hittade_par, motor.första_val + 1, motor.väntande_a + 1, motor.väntande_b + 1):
+        lägg_till_varint(buffert, tal)
+
+    if flaggor & _ORD_ID:
+        lägg_till_varint(buffert, len(ord_.ordlista))  #Kontrolleras mot ordlistan när spelet läses in
+        _lägg_till_tabell(buffert, array('I', ord_.ord_id))
+    else:
+        text = "\n".join(ord_).encode("utf-8")
+        lägg_till_varint(buffert, len(text))
+        buffert += text
+    if not flaggor & _LAT:
+        _lägg_till_tabell(buffert, kort if isinstance(kort, array) else array('I', kort))
+
+    buffert += motor.synlig
+    if motor.logg is not None:
+        lägg_till_varint(buffert, len(motor.logg))
+        buffert += motor.logg
+
+#En array som typkod, antal byte och innehållet i little endian
+def _lägg_till_tabell(buffert, tabell):
+    if sys.byteorder == "big":
+        tabell = array(tabell.typecode, tabell)
+        tabell.byteswap()
+    buffert.append(ord(tabell.typecode))
+    lägg_till_varint(buffert, len(tabell) * tabell.itemsize)
+    buffert += tabell
+
+def _läs_tabell(data, pos):
+    typkod = chr(data[pos])
+    längd, pos = _läs_varint(data, pos + 1)
+    tabell = array(typkod, data[pos:pos + längd])
+    if sys.byteorder == "big":
+        tabell.byteswap()
+    return tabell, pos + längd
+
+def _avkoda_bräda(data, pos, ordlista):
+    flaggor, pos = _läs_varint(data, pos)
+    rader, pos = _läs_varint(data, pos)
+    kolumner, pos = _läs_varint(data, pos)
+    frö = None
+    if flaggor & _FRÖ:
+        frö, pos = _läs_varint(data, pos)
+    tal = []
+    for _ in range(5):
+        värde, pos = _läs_varint(data, pos)
+        tal.append(värde)
+    försök, hittade_par, första_val, väntande_a, väntande_b = tal
+
+    if flaggor & _ORD_ID:
+        antal_ord, pos = _läs_varint(data, pos)
+        ord_id, pos = _läs_tabell(data, pos)
+        if ordlista is None or len(ordlista) != antal_ord:
+            raise ValueError("Spelet sparades med en annan ordlista")
+        ord_ = OrdUrval(ordlista, ord_id)
+    else:
+        längd, pos = _läs_varint(data, pos)
+        ord_ = data[pos:pos + längd].decode("utf-8").split("\n")
+        pos += längd
+    kort = None
+    if not flaggor & _LAT:
+        kort, pos = _läs_tabell(data, pos)
+
+    motor = MemoryMotor(ord_, rader, kolumner, kort=kort, frö=frö, logga=bool(flaggor & _LOGG))
+    storlek = len(motor.synlig)
+    motor.synlig[:] = data[pos:pos + storlek]
+    pos += storlek
+    if flaggor & _LOGG:
+        längd, pos = _läs_varint(data, pos)
+        motor.logg[:] = data[pos:pos + längd]
+        pos += längd
+
+    motor.försök = försök
+    motor.hittade_par = hittade_par
+    motor.första_val = första_val - 1
+    motor.väntande_a = väntande_a - 1
+    motor.väntande_b = väntande_b - 1
+    motor.dolda = len(motor) - int.from_bytes(motor.synlig, "little").bit_count()
+    return motor, pos
+
+#Kodar motorns tillstånd, en MemoryMotor eller FlerMotor, och spelarens namn
+def koda(motor, namn=""):
+    namn_byte = namn.encode("utf-8")
+    buffert = bytearray(MAGI)
+    lägg_till_varint(buffert, len(namn_byte))
+    buffert += namn_byte
+    if isinstance(motor, FlerMotor):
+        lägg_till_varint(buffert, len(motor.motorer))
+        for tal in (motor.aktiv + 1, motor.väntande_a + 1, motor.väntande_b + 1):
+            lägg_till_varint(buffert, tal)
+        for bräda in motor.motorer:
+            _koda_bräda(buffert, bräda)
+    else:
+        lägg_till_varint(buffert, 1)
+        _koda_bräda(buffert, motor)
+    buffert += zlib.crc32(buffert).to_bytes(4, "little")
+    return bytes(buffert)
+
+#Återskapar ett sparat spel. ordlista behövs bara för lata bräden, där orden sparas som index.
+#Kastar ValueError om datan inte är ett sparat spel eller är skadad.
+def avkoda(data, ordlista=None):
+    if not data.startswith(MAGI) or len(data) < len(MAGI) + 4:
+        raise ValueError("Filen är inte ett sparat spel")
+    if zlib.crc32(data[:-4]) != int.from_bytes(data[-4:], "little"):
+        raise ValueError("Det sparade spelet är skadat")
+    try:
+        längd, pos = _läs_varint(data, len(MAGI))
+        namn = data[pos:pos + längd].decode("utf-8")
+        antal, pos = _läs_varint(data, pos + längd)
+        if antal == 1:
+            motor, pos = _avkoda_bräda(data, pos, ordlista)
+            return Sparat(namn, motor)
+        fler = []
+        for _ in range(3):
+            värde, pos = _läs_varint(data, pos)
+            fler.append(värde)
+        motorer = []
+        for _ in range(antal):
+            bräda, pos = _avkoda_bräda(data, pos, ordlista)
+            motorer.append(bräda)
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ValueError("Det sparade spelet är skadat") from e
+    motor = FlerMotor(motorer)
+    motor.aktiv, motor.väntande_a, motor.väntande_b = (värde - 1 for värde in fler)
+    return Sparat(namn, motor)
+
+
+class Sparpunkt:
+
+    #Sparar det pågående spelet i fil var intervall:e drag. intervall=0 sparar bara när spara anropas.
+    #Varje variant har en egen fil, så att ett spel inte erbjuds i eller skrivs över av en annan variant.
+    def __init__(self, fil, intervall=1):
+        self.fil = fil
+        self.intervall = intervall
+        self._drag = 0  #Drag sedan spelet sparades senast
+
+    def finns(self):
+        return os.path.exists(self.fil)
+
+    #Läser det sparade spelet. Kastar OSError om filen inte går att läsa och ValueError om den är skadad.
+    def läs(self, ordlista=None):
+        with open(self.fil, "rb") as f:
+            return avkoda(f.read(), ordlista)
+
+    #Skriver spelet till en temporär fil som sedan byter plats med den gamla, så att filen alltid är hel.
+    #Den temporära filen skrivs till disken innan den byter plats, annars kan en krasch lämna en tom fil.
+    def spara(self, motor, namn=""):
+        data = koda(motor, namn)
+        temp = f"{self.fil}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.fil)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        self._drag = 0
+
+    #Anropas efter varje vänd ruta. Ett vunnet spel tas bort istället för att sparas.
+    def efter_drag(self, motor, namn=""):
+        if motor.är_vunnet():
+            self.ta_bort()
+            return
+        self._drag += 1
+        if self.intervall and self._drag >= self.intervall:
+            self.spara(motor, namn)
+
+    def ta_bort(self):
+        self._drag = 0
+        try:
+            os.remove(self.fil)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,152 @@
+#Ritar spelbrädet i textläge. Renderaren kommer ihåg den senast ritade bilden och skriver bara ut
+#de rutor som har ändrats, med ANSI-koder som flyttar markören. Varje bild skrivs med en enda write.
+#I terminaler utan stöd för ANSI (t.ex. TERM=dumb eller när utdata går till en fil) ritas hela brädet om.
+#
+#Brädet ritas alltid högst upp på skärmen. Allt som skrivs ut efter brädet (frågor och meddelanden)
+#hamnar under det och rensas när nästa bild ritas.
+import os
+import sys
+
+import drag
+from layout import Layout
+from ordbinar import visningsbredd
+
+#Bredaste ord som textversionerna lägger på ett bräde. Orden väljs ur ordlistans hinkar (se ordbinar.py),
+#så rutorna är lika breda i alla spel med samma ordlista.
+MAX_CELLBREDD = 12
+
+#Rutornas bredd. För en kompilerad ordlista är det den bredaste hinken upp till max_bredd, som står i
+#filens huvud och kostar O(1). Annars (t.ex. för ett sparat spel) mäts orden på brädet.
+def cellbredd(ordlista, ord_=(), max_bredd=MAX_CELLBREDD):
+    if hasattr(ordlista, "största_bredd"):
+        return max(3, min(ordlista.största_bredd, max_bredd))
+    return max(3, max(map(visningsbredd, ord_), default=0))
+
+#Antal ord i ordlistan som får plats i en ruta, för att kontrollera att ett bräde kan fyllas
+def får_plats(ordlista, max_bredd=MAX_CELLBREDD):
+    return ordlista.antal_högst(max_bredd) if hasattr(ordlista, "antal_högst") else len(ordlista)
+
+#Avgör om utdataströmmen är en terminal som förstår ANSI-koder
+def stöder_ansi(ut):
+    if not hasattr(ut, "isatty") or not ut.isatty():
+        return False
+    if os.environ.get("TERM", "dumb") in ("", "dumb"):
+        return os.name == "nt" and "WT_SESSION" in os.environ
+    return True
+
+#Högerjusterar texten efter hur bred den är i terminalen, inte efter antal tecken
+def högerjustera(text, bredd):
+    return " " * (bredd - visningsbredd(text)) + text
+
+#Texten som visas för varje ruta i motorn, dold betecknar en ruta som inte är vänd
+def celler(motor, dold="---"):
+    return [motor.ord_vid(i) if motor.är_synlig(i) else dold for i in range(len(motor))]
+
+
+class Renderare:
+
+    #radnamn ger etiketten för en rad (A, B, ..., Z, AA, ... som standard) och första_kolumn numret på
+    #den första kolumnen. ansi=None väljer läge automatiskt utifrån terminalen.
+    #Med layout (se layout.py) ritas alla bräden i layouten bredvid varandra och rader/kolumner används inte.
+    def __init__(self, rader, kolumner, bredd=3, ut=None, ansi=None, radnamn=None, första_kolumn=1, layout=None):
+        self.layout = layout if layout is not None else Layout.ett(rader, kolumner)
+        self.bredd = bredd
+        self.ut = ut if ut is not None else sys.stdout
+        self.ansi = stöder_ansi(self.ut) if ansi is None else ansi
+        self.radnamn = radnamn or drag.radnamn
+        self.första_kolumn = första_kolumn
+        self._förra = None  #Senast ritade celler, None betyder att hela brädet ska ritas
+
+        #Bilden som en lista med skärmrader. Varje skärmrad är en lista med fast text och index för rutor.
+        self._linjer = []
+        for rad in self.layout.rutnät:
+            if self._linjer:
+                self._linjer.append([""])
+            self._linjer += self._sida_vid_sida([self._block(b) for b in rad])
+        bildbredd = max(self._linjebredd(linje) for linje in self._linjer)
+        self._linjer.append(["=" * max(30, bildbredd)])
+
+        #ANSI-koden som flyttar markören till varje ruta, för att kunna rita om bara de rutor som har ändrats
+        self._positioner = [""] * len(self.layout)
+        for nummer, linje in enumerate(self._linjer, start=1):
+            kolumn = 1
+            for del_ in linje:
+                if isinstance(del_, int):
+                    self._positioner[del_] = f"\x1b[{nummer};{kolumn}H"
+                    kolumn += bredd
+                else:
+                    kolumn += len(del_)
+        self._under = f"\x1b[{len(self._linjer) + 1};1H\x1b[J"
+
+    #Skärmraderna för ett bräde: rubrik med kolumnnummer och en rad per brädrad med radens namn först
+    def _block(self, b):
+        rader, kolumner = self.layout.brädor[b]
+        bredd = self.bredd
+        namn = [self.radnamn(r) for r in range(rader)]
+        etikett = max(len(n) for n in namn)
+        linjer = []
+        if len(self.layout.brädor) > 1:
+            linjer.append([f"Bräde {b + self.första_kolumn}"])
+        linjer.append([" " * (etikett + 1) + " ".join(
+            f"{k:>{bredd}}" for k in range(self.första_kolumn, self.första_kolumn + kolumner))])
+        start = self.layout.start[b]
+        for r in range(rader):
+            linje = [f"{namn[r]:<{etikett}} "]
+            for k in range(kolumner):
+                if k:
+                    linje.append(" ")
+                linje.append(start + r * kolumner + k)
+            linjer.append(linje)
+        return linjer
+
+    def _linjebredd(self, linje):
+        return sum(self.bredd if isinstance(del_, int) else len(del_) for del_ in linje)
+
+    #Sätter ihop flera brädors skärmrader bredvid varandra med tre mellanslag emellan
+    def _sida_vid_sida(self, block):
+        bredder = [max(self._linjebredd(linje) for linje in linjer) for linjer in block]
+        höjd = max(len(linjer) for linjer in block)
+        resultat = []
+        for i in range(höjd):
+            linje = []
+            for nummer, (linjer, bredd) in enumerate(zip(block, bredder)):
+                del_ = linjer[i] if i < len(linjer) else [""]
+                if nummer + 1 < len(block):
+                    del_ = del_ + [" " * (bredd - self._linjebredd(del_) + 3)]
+                linje += del_
+            resultat.append(linje)
+        return resultat
+
+    #Tvingar nästa bild att rita hela brädet, t.ex. om skärmen har skrivits över
+    def ogiltigförklara(self):
+        self._förra = None
+
+    def _hel_bild(self, celler):
+        bredd = self.bredd
+        return "\n".join("".join(del_ if isinstance(del_, str) else högerjustera(celler[del_], bredd) for del_ in linje)
+                         for linje in self._linjer) + "\n"
+
+    #Ritar en bild. celler innehåller texten för varje ruta, radvis.
+    def rita(self, celler):
+        celler = list(celler)
+        if not self.ansi:
+            self.ut.write(self._hel_bild(celler))
+            self.ut.flush()
+            return
+
+        förra = self._förra
+        if förra is None:
+            #Rensa skärmen och rita allt från övre vänstra hörnet
+            buffert = ["\x1b[H\x1b[2J", self._hel_bild(celler)]
+        else:
+            buffert = []
+            bredd = self.bredd
+            positioner = self._positioner
+            for i, (ny, gammal) in enumerate(zip(celler, förra)):
+                if ny != gammal:
+                    buffert.append(positioner[i] + högerjustera(ny, bredd))
+            #Flytta markören under brädet och rensa gamla frågor och meddelanden
+            buffert.append(self._under)
+        self._förra = celler
+        self.ut.write("".join(buffert))
+        self.ut.flush()
@@ -0,0 +1,98 @@
+#Virtualiserad topplista för Tk. Trädvyn har bara så många rader som syns, och när listan rullas
+#eller sorteras om hämtas just de raderna från highscore-lagret (HighscoreLager eller SqliteHighscore).
+#Det gör att vyn öppnas direkt även när lagret har miljontals resultat.
+#
+#Med optimum (t.ex. losare.optimum) visas också hur långt varje resultat ligger från det förväntade
+#antalet försök med perfekt minne för storleken. Kolumnen räknas ut för de synliga raderna och kan inte sorteras.
+import tkinter as tk
+from tkinter import ttk
+
+#Kolumner i vyn: (rubrik, sortering i lagret)
+KOLUMNER = (("Namn", "namn"), ("Antal försök", "försök"), ("Storlek", "storlek"))
+
+
+class Topplista(tk.Frame):
+
+    def __init__(self, förälder, lager, synliga_rader=20, sortering="försök", optimum=None):
+        super().__init__(förälder)
+        self.lager = lager
+        self.optimum = optimum
+        self.synliga_rader = synliga_rader
+        self.sortering = sortering
+        self.fallande = False
+        self.start = 0  #Plats för den översta synliga raden
+        self.antal = lager.antal()
+
+        rubriker = [rubrik for rubrik, _ in KOLUMNER]
+        if optimum is not None:
+            rubriker.append("Mot optimum")
+        self.tom = ("",) * len(rubriker)
+        self.träd = ttk.Treeview(self, columns=rubriker, show="headings", height=synliga_rader)
+        for rubrik, kolumnens_sortering in KOLUMNER:
+            self.träd.heading(rubrik, text=rubrik, command=lambda s=kolumnens_sortering: self.sortera(s))
+        self.rullist = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._rulla)
+        self.rullist.pack(side=tk.RIGHT, fill=tk.Y)
+        self.träd.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        #Raderna i trädet återanvänds, bara texten byts när listan rullas
+        self._rader = [self.träd.insert("", "end", values=self.tom) for _ in range(synliga_rader)]
+
+        for händelse in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.träd.bind(händelse, self._mushjul)
+        self.träd.bind("<Prior>", lambda _: self.gå_till(self.start - self.synliga_rader))
+        self.träd.bind("<Next>", lambda _: self.gå_till(self.start + self.synliga_rader))
+        self.visa()
+
+    #Hämtar och visar de rader som syns från och med self.start
+    def visa(self):
+        poster = self.lager.sida(self.start, self.synliga_rader, self.sortering, self.fallande)
+        for rad_id, post in zip(self._rader, poster):
+            self.träd.item(rad_id, values=self._värden(post))
+        for rad_id in self._rader[len(poster):]:
+            self.träd.item(rad_id, values=self.tom)
+        if self.antal:
+            self.rullist.set(self.start / self.antal, min(1.0, (self.start + self.synliga_rader) / self.antal))
+        else:
+            self.rullist.set(0.0, 1.0)
+
+    #Värdena för en rad, med skillnaden mot optimum sist om den visas
+    def _värden(self, post):
+        if self.optimum is None:
+            return post
+        namn, försök, storlek = post
+        optimum = self.optimum(storlek)
+        return (namn, försök, storlek, "" if optimum is None else f"{försök - optimum:+.1f}")
+
+    def gå_till(self, start):
+        start = max(0, min(start, self.antal - self.synliga_rader))
+        if start != self.start:
+            self.start = start
+            self.visa()
+
+    #Sorterar om efter en kolumn. Ett nytt klick på samma kolumn vänder ordningen.
+    def sortera(self, sortering):
+        self.fallande = not self.fallande if sortering == self.sortering else False
+        self.sortering = sortering
+        self.start = 0
+        self.visa()
+
+    #Läser om antalet resultat, t.ex. efter att ett nytt resultat har sparats
+    def uppdatera(self):
+        self.antal = self.lager.antal()
+        self.visa()
+
+    #Anropas av rullisten med ("moveto", andel) eller ("scroll", steg, "units"/"pages")
+    def _rulla(self, åtgärd, värde, enhet=None):
+        if åtgärd == "moveto":
+            self.gå_till(int(float(värde) * self.antal))
+        elif enhet == "pages":
+            self.gå_till(self.start + int(värde) * self.synliga_rader)
+        else:
+            self.gå_till(self.start + int(värde))
+
+    def _mushjul(self, händelse):
+        if händelse.num == 4 or händelse.delta > 0:
+            self.gå_till(self.start - 3)
+        else:
+            self.gå_till(self.start + 3)
+        return "break"
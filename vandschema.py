@@ -0,0 +1,72 @@
+#Schemaläggare för vändningar i de grafiska versionerna. Istället för att låsa brädet medan ett
+#felmatchat par visas läggs varje klick i en kö och körs i tur och ordning. Paret döljs när tiden
+#har gått ut eller direkt när nästa ruta vänds, beroende på vad som händer först, så spelaren kan
+#klicka i full fart utan att några klick tappas eller körs i fel ordning.
+from collections import deque
+
+from motor import OGILTIG, MISS, VUNNET
+
+
+class VändSchema:
+
+    #widget är en Tk-widget (eller något annat med after och after_cancel). visa(index, ord) och
+    #dölj(rutor) uppdaterar brädet och vid_vinst() anropas när sista paret har hittats.
+    #vid_drag() anropas efter varje vänd ruta, t.ex. för att spara spelet (se sparpunkt.py).
+    #fördröjning är antalet millisekunder ett felmatchat par visas.
+    def __init__(self, motor, widget, visa, dölj, vid_vinst=None, fördröjning=1000, vid_drag=None):
+        self.motor = motor
+        self.widget = widget
+        self.visa = visa
+        self.dölj = dölj
+        self.vid_vinst = vid_vinst
+        self.vid_drag = vid_drag
+        self.fördröjning = fördröjning
+        self._kö = deque()  #Klick som väntar på att köras
+        self._kör = False  #Sant medan kön töms, t.ex. om vid_vinst öppnar en dialog med egen händelseloop
+        self._timer = None  #after-id för att dölja det felmatchade paret
+
+    #Lägger ett klick på en ruta i kön och kör kön om den inte redan körs
+    def klick(self, index):
+        self._kö.append(index)
+        if self._kör:
+            return
+        self._kör = True
+        try:
+            while self._kö:
+                self._vänd(self._kö.popleft())
+        finally:
+            self._kör = False
+
+    def _vänd(self, index):
+        if self.motor.väntande_a >= 0:
+            self.göm()
+        händelse = self.motor.flip(index)
+        if händelse == OGILTIG:
+            return
+        self.visa(index, self.motor.ord_vid(index))
+        if self.vid_drag is not None:
+            self.vid_drag()
+        if händelse == MISS:
+            self._timer = self.widget.after(self.fördröjning, self._tiden_ute)
+        elif händelse == VUNNET and self.vid_vinst is not None:
+            self.vid_vinst()
+
+    def _tiden_ute(self):
+        self._timer = None
+        self.göm()
+
+    #Döljer ett felmatchat par som fortfarande visas och stoppar timern
+    def göm(self):
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+        rutor = self.motor.dölj()
+        if rutor is not None:
+            self.dölj(rutor)
+
+    #Tömmer kön och stoppar timern, t.ex. när spelet avslutas eller brädet byggs om
+    def avbryt(self):
+        self._kö.clear()
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None